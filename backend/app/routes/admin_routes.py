@@ -7,11 +7,63 @@ Admin panel for managing users, orders, and platform settings
 from flask import Blueprint, request, jsonify
 from app.routes.auth_routes import require_admin
 from app.services.firebase_service import get_db
-from datetime import datetime, timedelta
+from app.services.cooker_registry import cooker_registry
+from app.services.dish_catalog import created_datetime
+from app.utils.cache import cached
+from app.utils.projection import parse_fields, select_fields, project
+from datetime import datetime, timedelta, timezone
 
 admin_bp = Blueprint('admin', __name__)
 
 
+# Platform stats stream several whole collections; serve them from a shared
+# cache that one caller refreshes while the others keep the previous numbers
+STATS_TTL = 60  # seconds
+
+
+def count_documents(query):
+    """Count the documents matching a query with an aggregation query (no documents are read)"""
+    return query.count().get()[0][0].value
+
+
+@cached(ttl=STATS_TTL)
+def compute_platform_stats():
+    """Count platform totals and revenue (expensive: streams every delivered order)"""
+    db = get_db()
+
+    # Count totals
+    users_count = count_documents(db.collection('users'))
+    chefs_count = count_documents(db.collection('cookers'))
+    dishes_count = count_documents(db.collection('dishes'))
+    orders_count = count_documents(db.collection('orders'))
+
+    # Revenue calculation (last 30 days)
+    thirty_days_ago = datetime.now(timezone.utc) - timedelta(days=30)
+    orders = db.collection('orders').where('status', '==', 'delivered').stream()
+
+    total_revenue = 0
+    monthly_revenue = 0
+
+    for order in orders:
+        order_data = order.to_dict()
+        amount = order_data.get('total', 0)
+        total_revenue += amount
+
+        # createdAt may be a Firestore timestamp or an ISO string
+        order_time = created_datetime(order_data.get('createdAt'))
+        if order_time and order_time > thirty_days_ago:
+            monthly_revenue += amount
+
+    return {
+        'totalUsers': users_count,
+        'totalChefs': chefs_count,
+        'totalDishes': dishes_count,
+        'totalOrders': orders_count,
+        'totalRevenue': total_revenue,
+        'monthlyRevenue': monthly_revenue
+    }
+
+
 @admin_bp.route('/stats', methods=['GET'])
 @require_admin
 def get_platform_stats():
@@ -21,36 +73,7 @@ def get_platform_stats():
         return jsonify({'error': 'Database unavailable'}), 503
     
     try:
-        # Count totals
-        users_count = len(db.collection('users').stream())
-        chefs_count = len(db.collection('cookers').stream())
-        dishes_count = len(db.collection('dishes').stream())
-        orders_count = len(db.collection('orders').stream())
-        
-        # Revenue calculation (last 30 days)
-        thirty_days_ago = datetime.now() - timedelta(days=30)
-        orders = db.collection('orders').where('status', '==', 'delivered').stream()
-        
-        total_revenue = 0
-        monthly_revenue = 0
-        
-        for order in orders:
-            order_data = order.to_dict()
-            amount = order_data.get('total', 0)
-            total_revenue += amount
-            
-            order_time = order_data.get('createdAt')
-            if order_time and order_time > thirty_days_ago:
-                monthly_revenue += amount
-        
-        return jsonify({
-            'totalUsers': users_count,
-            'totalChefs': chefs_count,
-            'totalDishes': dishes_count,
-            'totalOrders': orders_count,
-            'totalRevenue': total_revenue,
-            'monthlyRevenue': monthly_revenue
-        })
+        return jsonify(compute_platform_stats())
     
     except Exception as e:
         return jsonify({'error': str(e)}), 500
@@ -162,7 +185,7 @@ def list_chefs():
             chef_data['dishesCount'] = dishes_count
             
             # Count orders
-            orders = db.collection('orders').where('cookerId', '==', chef.id).stream()
+            orders = db.collection('orders').where('chefId', '==', chef.id).stream()
             total_orders = 0
             total_revenue = 0
             
@@ -210,7 +233,7 @@ def verify_chef(chef_id):
 @admin_bp.route('/orders', methods=['GET'])
 @require_admin
 def list_all_orders():
-    """List all orders with filters"""
+    """List all orders with filters (`fields=` returns only those fields plus id)"""
     db = get_db()
     if not db:
         return jsonify({'error': 'Database unavailable'}), 503
@@ -218,17 +241,22 @@ def list_all_orders():
     try:
         status_filter = request.args.get('status')
         limit = int(request.args.get('limit', 50))
+        try:
+            fields = parse_fields(request.args.get('fields'))
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
         
         orders_ref = db.collection('orders').order_by('createdAt', direction='DESCENDING').limit(limit)
         
         if status_filter:
             orders_ref = orders_ref.where('status', '==', status_filter)
+        orders_ref = select_fields(orders_ref, fields)
         
         orders = []
         for order in orders_ref.stream():
             order_data = order.to_dict()
             order_data['id'] = order.id
-            orders.append(order_data)
+            orders.append(project(order_data, fields))
         
         return jsonify({'orders': orders})
     
@@ -286,6 +314,8 @@ def resolve_report(report_id):
         
         if action == 'remove':
             db.collection(collection).document(report_id).delete()
+            if collection == 'cookers':
+                cooker_registry.remove(report_id)
         else:
             db.collection(collection).document(report_id).update({
                 'isReported': False,
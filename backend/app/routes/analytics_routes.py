@@ -30,7 +30,7 @@ def get_chef_overview():
         start_date = end_date - timedelta(days=int(period))
         
         # Get orders
-        orders_ref = db.collection('orders').where('cookerId', '==', chef_id)
+        orders_ref = db.collection('orders').where('chefId', '==', chef_id)
         orders = list(orders_ref.stream())
         
         # Calculate stats
@@ -89,34 +89,29 @@ def get_popular_dishes():
         # Get all chef's dishes
         dishes_ref = db.collection('dishes').where('cookerId', '==', chef_id).stream()
         
+        # One pass over the chef's orders, shared by every dish
+        order_count = defaultdict(int)
+        total_quantity = defaultdict(int)
+        total_revenue = defaultdict(float)
+        for order in db.collection('orders').where('chefId', '==', chef_id).stream():
+            for item in order.to_dict().get('items', []):
+                dish_id = item.get('dishId')
+                quantity = item.get('quantity', 1)
+                order_count[dish_id] += 1
+                total_quantity[dish_id] += quantity
+                total_revenue[dish_id] += item.get('price', 0) * quantity
+        
         dish_stats = []
         for dish in dishes_ref:
             dish_data = dish.to_dict()
             dish_id = dish.id
             
-            # Count orders containing this dish
-            orders = db.collection('orders').where('cookerId', '==', chef_id).stream()
-            order_count = 0
-            total_quantity = 0
-            total_revenue = 0
-            
-            for order in orders:
-                order_data = order.to_dict()
-                items = order_data.get('items', [])
-                
-                for item in items:
-                    if item.get('dishId') == dish_id:
-                        order_count += 1
-                        quantity = item.get('quantity', 1)
-                        total_quantity += quantity
-                        total_revenue += item.get('price', 0) * quantity
-            
             dish_stats.append({
                 'dishId': dish_id,
                 'dishName': dish_data.get('dishName', 'Unknown'),
-                'orderCount': order_count,
-                'totalQuantity': total_quantity,
-                'totalRevenue': total_revenue,
+                'orderCount': order_count[dish_id],
+                'totalQuantity': total_quantity[dish_id],
+                'totalRevenue': total_revenue[dish_id],
                 'imageUrl': dish_data.get('imageUrl')
             })
         
@@ -148,7 +143,7 @@ def get_revenue_chart():
         start_date = end_date - timedelta(days=days)
         
         # Get orders in period
-        orders_ref = db.collection('orders').where('cookerId', '==', chef_id)
+        orders_ref = db.collection('orders').where('chefId', '==', chef_id)
         orders = list(orders_ref.stream())
         
         # Group by date
@@ -194,7 +189,7 @@ def get_customer_insights():
         chef_id = request.user.get('uid')
         
         # Get orders
-        orders_ref = db.collection('orders').where('cookerId', '==', chef_id)
+        orders_ref = db.collection('orders').where('chefId', '==', chef_id)
         orders = list(orders_ref.stream())
         
         # Analyze customers
@@ -246,7 +241,7 @@ def get_peak_hours():
         chef_id = request.user.get('uid')
         
         # Get orders
-        orders_ref = db.collection('orders').where('cookerId', '==', chef_id)
+        orders_ref = db.collection('orders').where('chefId', '==', chef_id)
         orders = list(orders_ref.stream())
         
         # Count by hour
@@ -65,6 +65,12 @@ def require_chef(f):
     return decorated
 
 
+def is_admin(db, uid):
+    """True if the user's profile has admin privileges"""
+    user_doc = db.collection('users').document(uid).get()
+    return user_doc.exists and (user_doc.to_dict() or {}).get('isAdmin', False) is True
+
+
 def require_admin(f):
     """Decorator to require admin role"""
     @wraps(f)
@@ -5,9 +5,13 @@ Handles shopping cart operations (stored in Firestore per user)
 """
 
 from flask import Blueprint, request, jsonify
-from datetime import datetime
 from app.routes.auth_routes import require_auth
+from app.routes.order_routes import place_order
+from app.utils.idempotency import idempotent
+from app.services import order_service
 from app.services.firebase_service import get_db
+from app.services.cart_cache import cart_cache
+from app.services.cart_store import CartNotFoundError
 
 cart_bp = Blueprint('cart', __name__)
 
@@ -20,13 +24,8 @@ def get_cart():
     
     db = get_db()
     if db:
-        doc = db.collection('carts').document(uid).get()
-        
-        if doc.exists:
-            cart_data = doc.to_dict()
-            return jsonify(cart_data)
-        else:
-            return jsonify({'items': [], 'total': 0})
+        # Served from the write-behind cache: stored cart plus unwritten changes
+        return jsonify(cart_cache.get(db, uid))
     else:
         return jsonify({'error': 'Database unavailable'}), 503
 
@@ -77,51 +76,11 @@ def add_to_cart():
                 if cooker_doc.exists:
                     data['cookerName'] = cooker_doc.to_dict().get('name', '')
         
-        cart_ref = db.collection('carts').document(uid)
-        cart_doc = cart_ref.get()
-        
-        if cart_doc.exists:
-            cart_data = cart_doc.to_dict()
-            items = cart_data.get('items', [])
-        else:
-            items = []
-        
-        # Check if item already exists
-        existing_index = None
-        for i, item in enumerate(items):
-            if item.get('dishId') == data['dishId']:
-                existing_index = i
-                break
-        
-        if existing_index is not None:
-            # Update quantity
-            items[existing_index]['quantity'] += data['quantity']
-        else:
-            # Add new item
-            items.append({
-                'dishId': data['dishId'],
-                'dishName': data['dishName'],
-                'dishImage': data.get('dishImage', ''),
-                'price': data['price'],
-                'quantity': data['quantity'],
-                'cookerId': data.get('cookerId', ''),
-                'cookerName': data.get('cookerName', ''),
-                'addedAt': datetime.utcnow().isoformat()
-            })
-        
-        # Calculate total
-        total = sum(item['price'] * item['quantity'] for item in items)
-        
-        cart_ref.set({
-            'items': items,
-            'total': total,
-            'updatedAt': datetime.utcnow()
-        })
+        # Coalesced with the user's other changes into one delayed write
+        cart_cache.add(db, uid, data['dishId'], data['quantity'], data)
         
         return jsonify({
             'success': True,
-            'itemCount': len(items),
-            'total': total,
             'message': 'تمت الإضافة إلى السلة'
         })
     else:
@@ -143,42 +102,12 @@ def update_cart_item():
     
     db = get_db()
     if db:
-        cart_ref = db.collection('carts').document(uid)
-        cart_doc = cart_ref.get()
-        
-        if not cart_doc.exists:
-            return jsonify({'error': 'Cart not found'}), 404
-        
-        cart_data = cart_doc.to_dict()
-        items = cart_data.get('items', [])
-        
-        # Find and update item
-        item_found = False
-        for item in items:
-            if item.get('dishId') == data['dishId']:
-                if data['quantity'] <= 0:
-                    items.remove(item)
-                else:
-                    item['quantity'] = data['quantity']
-                item_found = True
-                break
+        try:
+            cart_cache.set_quantity(db, uid, data['dishId'], data['quantity'])
+        except CartNotFoundError as e:
+            return jsonify({'error': str(e)}), 404
         
-        if not item_found:
-            return jsonify({'error': 'Item not in cart'}), 404
-        
-        total = sum(item['price'] * item['quantity'] for item in items)
-        
-        cart_ref.set({
-            'items': items,
-            'total': total,
-            'updatedAt': datetime.utcnow()
-        })
-        
-        return jsonify({
-            'success': True,
-            'itemCount': len(items),
-            'total': total
-        })
+        return jsonify({'success': True})
     else:
         return jsonify({'error': 'Database unavailable'}), 503
 
@@ -191,28 +120,13 @@ def remove_from_cart(dish_id):
     
     db = get_db()
     if db:
-        cart_ref = db.collection('carts').document(uid)
-        cart_doc = cart_ref.get()
-        
-        if not cart_doc.exists:
-            return jsonify({'error': 'Cart not found'}), 404
-        
-        cart_data = cart_doc.to_dict()
-        items = [item for item in cart_data.get('items', []) 
-                 if item.get('dishId') != dish_id]
-        
-        total = sum(item['price'] * item['quantity'] for item in items)
-        
-        cart_ref.set({
-            'items': items,
-            'total': total,
-            'updatedAt': datetime.utcnow()
-        })
+        try:
+            cart_cache.remove(db, uid, dish_id)
+        except CartNotFoundError as e:
+            return jsonify({'error': str(e)}), 404
         
         return jsonify({
             'success': True,
-            'itemCount': len(items),
-            'total': total,
             'message': 'تمت الإزالة من السلة'
         })
     else:
@@ -227,10 +141,43 @@ def clear_cart():
     
     db = get_db()
     if db:
-        db.collection('carts').document(uid).delete()
+        cart_cache.clear(db, uid)
         return jsonify({
             'success': True,
             'message': 'تم تفريغ السلة'
         })
     else:
         return jsonify({'error': 'Database unavailable'}), 503
+
+
+@cart_bp.route('/checkout', methods=['POST'])
+@require_auth
+@idempotent('cart.checkout')
+def checkout():
+    """
+    Order the current user's cart and empty it, in one transaction
+    Expected body: {
+        deliveryAddress: string,
+        deliveryNotes: string,
+        paymentMethod: 'cash' | 'card',
+        scheduledFor: ISO date-time of a delivery slot (optional, for pre-orders)
+    }
+    Answers like POST /api/orders. On any error the cart is left as it was,
+    except that a stale-cart 409 updates repriced lines to their currentPrice.
+    """
+    data = request.get_json() or {}
+    uid = request.user.get('uid')
+    
+    if not data.get('deliveryAddress'):
+        return jsonify({'error': 'Delivery address is required'}), 400
+    
+    db = get_db()
+    if db:
+        def checkout_cart():
+            # Unwritten cart changes go out first; none are written during the transaction
+            with cart_cache.hold(db, uid):
+                return order_service.checkout_cart(db, request.user, data)
+        
+        return place_order(checkout_cart)
+    else:
+        return jsonify({'error': 'Database unavailable'}), 503
@@ -5,10 +5,74 @@ Handles chef registration, profile, dishes, and order management
 from flask import Blueprint, request, jsonify
 from firebase_admin import firestore
 from datetime import datetime
+from app.services.cooker_registry import cooker_registry
+from app.services.cooker_geo import cooker_geo, parse_point, valid_point
+from app.services.cooker_hours import cooker_hours
+from app.services import order_events, order_slots, order_state
+from app.routes.auth_routes import require_chef
+from app.utils.sse import sse_response, limit_streams
+from app.utils.projection import parse_fields, select_fields, project
 
 cooker_bp = Blueprint('cooker', __name__)
 db = firestore.client()
 
+# Cooker fields shown in public listings
+PUBLIC_COOKER_FIELDS = ['name', 'bio', 'specialties', 'address', 'profileImage',
+                        'rating', 'isVerified', 'deliverySettings', 'lat', 'lng']
+
+
+# ============== PUBLIC LISTING ==============
+
+@cooker_bp.route('/', methods=['GET'])
+def list_cookers():
+    """
+    List active chefs (public).
+    Pass `near=lat,lng` to keep only chefs delivering there, nearest first.
+    Pass `openNow=true` to keep only chefs within their working hours.
+    """
+    try:
+        near = request.args.get('near')
+        open_now = request.args.get('openNow', '').lower() == 'true'
+        limit = int(request.args.get('limit', 50))
+        
+        cooker_registry.ensure_ready()
+        active_cookers = cooker_registry.active()
+        if open_now:
+            open_ids = cooker_hours.open_now()
+            active_cookers = {cooker_id: active_cookers[cooker_id]
+                              for cooker_id in open_ids if cooker_id in active_cookers}
+        
+        if near:
+            try:
+                distances = cooker_geo.delivering_to(*parse_point(near))
+            except ValueError:
+                return jsonify({'error': 'Invalid near point, expected lat,lng'}), 400
+            cooker_ids = sorted((cooker_id for cooker_id in distances if cooker_id in active_cookers),
+                                key=lambda cooker_id: (distances[cooker_id], cooker_id))
+        else:
+            distances = None
+            cooker_ids = sorted(active_cookers,
+                                key=lambda cooker_id: (-(active_cookers[cooker_id].get('rating') or 0), cooker_id))
+        
+        cookers = []
+        for cooker_id in cooker_ids[:limit]:
+            cooker_data = active_cookers[cooker_id]
+            cooker = {field: cooker_data.get(field) for field in PUBLIC_COOKER_FIELDS}
+            cooker['id'] = cooker_id
+            if distances is not None:
+                cooker['distanceKm'] = distances[cooker_id]
+            cookers.append(cooker)
+        
+        return jsonify({
+            'success': True,
+            'cookers': cookers,
+            'count': len(cookers)
+        }), 200
+        
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+
 # ============== CHEF REGISTRATION & PROFILE ==============
 
 @cooker_bp.route('/register', methods=['POST'])
@@ -37,6 +101,9 @@ def register_chef():
                 'updatedAt': datetime.utcnow().isoformat(),
             })
         
+        # Coordinates drive the "near me" delivery-area index
+        lat, lng = valid_point(data.get('lat'), data.get('lng')) or (None, None)
+        
         # Create chef profile
         chef_data = {
             'userId': user_id,
@@ -47,6 +114,8 @@ def register_chef():
             'location': data.get('location', ''),
             'address': data.get('address', ''),
             'profileImage': data.get('profileImage', ''),
+            'lat': lat,
+            'lng': lng,
             'isActive': True,
             'isVerified': False,
             'rating': 0.0,
@@ -73,6 +142,7 @@ def register_chef():
         # Create cooker document
         cooker_ref = db.collection('cookers').document(user_id)
         cooker_ref.set(chef_data)
+        cooker_registry.upsert(user_id, chef_data)
         
         # Update user role
         user_ref.update({
@@ -140,9 +210,16 @@ def update_chef_profile():
             if field in data:
                 update_fields[field] = data[field]
         
+        if 'lat' in data or 'lng' in data:
+            point = valid_point(data.get('lat'), data.get('lng'))
+            if not point:
+                return jsonify({'error': 'lat and lng must be valid coordinates'}), 400
+            update_fields['lat'], update_fields['lng'] = point
+        
         update_fields['updatedAt'] = datetime.utcnow().isoformat()
         
         cooker_ref.update(update_fields)
+        cooker_registry.update(user_id, update_fields)
         
         return jsonify({
             'success': True,
@@ -164,11 +241,14 @@ def toggle_availability():
         if not user_id:
             return jsonify({'error': 'userId is required'}), 400
         
-        cooker_ref = db.collection('cookers').document(user_id)
-        cooker_ref.update({
+        availability_fields = {
             'isActive': is_active,
             'updatedAt': datetime.utcnow().isoformat()
-        })
+        }
+        cooker_ref = db.collection('cookers').document(user_id)
+        cooker_ref.update(availability_fields)
+        # Apply to this cooker's registry entry right away so listings hide/show them immediately
+        cooker_registry.update(user_id, availability_fields)
         
         status = 'متاح' if is_active else 'غير متاح'
         return jsonify({
@@ -181,6 +261,57 @@ def toggle_availability():
         return jsonify({'error': str(e)}), 500
 
 
+@cooker_bp.route('/slots', methods=['PUT'])
+@require_chef
+def update_slot_capacity():
+    """Set how many pre-orders the authenticated chef takes per delivery slot"""
+    try:
+        data = request.json or {}
+        user_id = request.user.get('uid')
+        capacity = data.get('capacity')
+        
+        if not isinstance(capacity, int) or isinstance(capacity, bool) \
+                or not 0 <= capacity <= order_slots.MAX_SLOT_CAPACITY:
+            return jsonify({'error': f'capacity must be an integer from 0 to {order_slots.MAX_SLOT_CAPACITY}'}), 400
+        
+        db.collection(order_slots.SLOTS_COLLECTION).document(user_id).set({
+            'capacity': capacity,
+            'updatedAt': datetime.utcnow()
+        }, merge=True)
+        
+        return jsonify({
+            'success': True,
+            'message': 'تم تحديث سعة المواعيد',
+            'capacity': capacity
+        }), 200
+        
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+
+@cooker_bp.route('/<cooker_id>/slots', methods=['GET'])
+def get_cooker_slots(cooker_id):
+    """Bookable pre-order delivery slots of a chef for the next 7 days"""
+    try:
+        cooker_registry.ensure_ready()
+        if not cooker_registry.is_active(cooker_id):
+            return jsonify({'error': 'Cooker not found'}), 404
+        
+        # Capacity and bookings live in one compact document
+        doc = db.collection(order_slots.SLOTS_COLLECTION).document(cooker_id).get()
+        slots = doc.to_dict() if doc.exists else {}
+        
+        return jsonify({
+            'success': True,
+            'slotMinutes': order_slots.SLOT_MINUTES,
+            'capacity': order_slots.capacity_of(slots),
+            'slots': order_slots.availability(cooker_id, slots)
+        }), 200
+        
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+
 @cooker_bp.route('/stats', methods=['GET'])
 def get_chef_stats():
     """Get chef statistics and dashboard data"""
@@ -212,11 +343,13 @@ def get_chef_stats():
         
         for order in orders:
             order_data = order.to_dict()
-            order_date = order_data.get('createdAt', '')[:10]
+            created = order_data.get('createdAt', '')
+            # Orders store datetimes; older documents may hold ISO strings
+            order_date = created.date().isoformat() if hasattr(created, 'date') else str(created)[:10]
             
             if order_date == today:
                 today_orders += 1
-                if order_data.get('status') == 'completed':
+                if order_data.get('chefStatus') == 'completed':
                     today_earnings += order_data.get('total', 0)
             
             if order_data.get('chefStatus') == 'pending':
@@ -262,14 +395,21 @@ def get_chef_stats():
 
 @cooker_bp.route('/dishes', methods=['GET'])
 def get_chef_dishes():
-    """Get all dishes for a chef"""
+    """Get all dishes for a chef (`fields=` returns only those fields plus id)"""
     try:
         user_id = request.args.get('userId')
         
         if not user_id:
             return jsonify({'error': 'userId is required'}), 400
         
+        try:
+            fields = parse_fields(request.args.get('fields'))
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
+        
         dishes_ref = db.collection('dishes').where('cookerId', '==', user_id)
+        # createdAt is read for sorting even if not requested
+        dishes_ref = select_fields(dishes_ref, fields, required=['createdAt'])
         dishes = []
         
         for doc in dishes_ref.stream():
@@ -286,6 +426,7 @@ def get_chef_dishes():
                 return created.timestamp()
             return 0
         dishes.sort(key=get_sort_key, reverse=True)
+        dishes = [project(dish, fields) for dish in dishes]
         
         return jsonify({
             'success': True,
@@ -299,6 +440,19 @@ def get_chef_dishes():
 
 # ============== CHEF'S ORDERS ==============
 
+def chef_of_order(user_id):
+    """Order authorization for chef endpoints: only the order's chef may act"""
+    return lambda order: order_state.ROLE_CHEF if user_id in order_state.order_chef_ids(order) else None
+
+
+def invalid_chef_status():
+    """400 for a status a chef may not set, listing the ones they may"""
+    return jsonify({
+        'error': f'status must be one of: {order_state.CHEF_TARGETS} '
+                 f'(or legacy names: {order_state.aliases_of(order_state.CHEF_TARGETS)})'
+    }), 400
+
+
 @cooker_bp.route('/orders', methods=['GET'])
 def get_chef_orders():
     """Get orders for a chef with filtering"""
@@ -350,6 +504,18 @@ def get_chef_orders():
         return jsonify({'error': str(e)}), 500
 
 
+@cooker_bp.route('/orders/events', methods=['GET'])
+@require_chef
+@limit_streams
+def chef_order_events():
+    """
+    Server-Sent Events stream of the chef's order queue: new, cancelled and
+    changed orders as they happen (replaces polling /orders)
+    """
+    subscription = order_events.subscribe_chef(request.user.get('uid'))
+    return sse_response(subscription, event='order')
+
+
 @cooker_bp.route('/orders/<order_id>/respond', methods=['PUT'])
 def respond_to_order(order_id):
     """Accept or reject an order"""
@@ -365,35 +531,20 @@ def respond_to_order(order_id):
         if action not in ['accept', 'reject']:
             return jsonify({'error': 'action must be accept or reject'}), 400
         
-        order_ref = db.collection('orders').document(order_id)
-        order_doc = order_ref.get()
-        
-        if not order_doc.exists:
-            return jsonify({'error': 'Order not found'}), 404
-        
-        order_data = order_doc.to_dict()
-        
-        if order_data.get('chefId') != user_id:
-            return jsonify({'error': 'Unauthorized'}), 403
-        
         if action == 'accept':
-            order_ref.update({
-                'chefStatus': 'accepted',
-                'status': 'confirmed',
-                'acceptedAt': datetime.utcnow().isoformat(),
-                'updatedAt': datetime.utcnow().isoformat()
-            })
+            target, extra_fields = order_state.ACCEPTED, None
             message = 'تم قبول الطلب'
         else:
-            order_ref.update({
-                'chefStatus': 'rejected',
-                'status': 'cancelled',
-                'rejectionReason': reason,
-                'rejectedAt': datetime.utcnow().isoformat(),
-                'updatedAt': datetime.utcnow().isoformat()
-            })
+            target = order_state.CANCELLED
+            extra_fields = {'chefStatus': 'rejected', 'rejectionReason': reason, 'cancelledBy': user_id}
             message = 'تم رفض الطلب'
         
+        try:
+            order_state.transition(db, order_id, target, authorize=chef_of_order(user_id),
+                                   extra_fields=extra_fields)
+        except order_state.TransitionError as e:
+            return jsonify({'error': e.message}), e.status_code
+        
         return jsonify({
             'success': True,
             'message': message
@@ -403,9 +554,51 @@ def respond_to_order(order_id):
         return jsonify({'error': str(e)}), 500
 
 
+@cooker_bp.route('/orders/status', methods=['PUT'])
+@require_chef
+def bulk_update_order_status():
+    """
+    Update the status of several of the authenticated chef's orders at once
+    Body: {orderIds: [...], status}
+    Orders that are not the chef's or cannot move are skipped and reported.
+    """
+    try:
+        data = request.json or {}
+        user_id = request.user.get('uid')
+        order_ids = data.get('orderIds')
+        new_status = data.get('status')
+        
+        if not new_status or not isinstance(order_ids, list) or not order_ids:
+            return jsonify({'error': 'orderIds and status are required'}), 400
+        
+        target = order_state.normalize_status(new_status)
+        if target not in order_state.CHEF_TARGETS:
+            return invalid_chef_status()
+        
+        # One read for every order, one transaction for every write
+        try:
+            results = order_state.transition_many(db, [str(order_id) for order_id in order_ids], target,
+                                                  authorize=chef_of_order(user_id))
+        except order_state.TransitionError as e:
+            return jsonify({'error': e.message}), e.status_code
+        
+        failed = {order_id: {'error': e.message, 'status': e.status_code}
+                  for order_id, e in results.items() if e is not None}
+        
+        return jsonify({
+            'success': not failed,
+            'status': target,
+            'updated': [order_id for order_id, e in results.items() if e is None],
+            'failed': failed
+        }), 200
+        
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+
 @cooker_bp.route('/orders/<order_id>/status', methods=['PUT'])
 def update_order_status(order_id):
-    """Update order status (preparing, ready, completed)"""
+    """Update order status (accepted, preparing, ready, on_the_way, delivered or a legacy name)"""
     try:
         data = request.json
         user_id = data.get('userId')
@@ -414,65 +607,29 @@ def update_order_status(order_id):
         if not user_id or not new_status:
             return jsonify({'error': 'userId and status are required'}), 400
         
-        valid_statuses = ['preparing', 'ready', 'out_for_delivery', 'completed']
-        if new_status not in valid_statuses:
-            return jsonify({'error': f'status must be one of: {valid_statuses}'}), 400
-        
-        order_ref = db.collection('orders').document(order_id)
-        order_doc = order_ref.get()
-        
-        if not order_doc.exists:
-            return jsonify({'error': 'Order not found'}), 404
-        
-        order_data = order_doc.to_dict()
-        
-        if order_data.get('chefId') != user_id:
-            return jsonify({'error': 'Unauthorized'}), 403
+        target = order_state.normalize_status(new_status)
+        if target not in order_state.CHEF_TARGETS:
+            return invalid_chef_status()
         
-        update_data = {
-            'chefStatus': new_status,
-            'updatedAt': datetime.utcnow().isoformat()
-        }
-        
-        # Map chef status to order status
-        status_mapping = {
-            'preparing': 'preparing',
-            'ready': 'ready',
-            'out_for_delivery': 'out_for_delivery',
-            'completed': 'delivered'
-        }
-        update_data['status'] = status_mapping.get(new_status, new_status)
-        
-        # Add timestamp for status
-        if new_status == 'preparing':
-            update_data['preparingAt'] = datetime.utcnow().isoformat()
-        elif new_status == 'ready':
-            update_data['readyAt'] = datetime.utcnow().isoformat()
-        elif new_status == 'completed':
-            update_data['completedAt'] = datetime.utcnow().isoformat()
-            # Update chef earnings
-            cooker_ref = db.collection('cookers').document(user_id)
-            cooker_doc = cooker_ref.get()
-            if cooker_doc.exists:
-                current_earnings = cooker_doc.to_dict().get('totalEarnings', 0)
-                current_orders = cooker_doc.to_dict().get('totalOrders', 0)
-                cooker_ref.update({
-                    'totalEarnings': current_earnings + order_data.get('subtotal', 0),
-                    'totalOrders': current_orders + 1
-                })
-        
-        order_ref.update(update_data)
+        # Completing an order also credits the chef and bumps dish popularity,
+        # inside the same transaction as the status change
+        try:
+            order_state.transition(db, order_id, target, authorize=chef_of_order(user_id))
+        except order_state.TransitionError as e:
+            return jsonify({'error': e.message}), e.status_code
         
         status_messages = {
-            'preparing': 'جاري تحضير الطلب',
-            'ready': 'الطلب جاهز',
-            'out_for_delivery': 'الطلب في الطريق',
-            'completed': 'تم إكمال الطلب'
+            order_state.ACCEPTED: 'تم قبول الطلب',
+            order_state.PREPARING: 'جاري تحضير الطلب',
+            order_state.READY: 'الطلب جاهز',
+            order_state.ON_THE_WAY: 'الطلب في الطريق',
+            order_state.DELIVERED: 'تم إكمال الطلب'
         }
         
         return jsonify({
             'success': True,
-            'message': status_messages.get(new_status, 'تم تحديث الحالة')
+            'message': status_messages.get(target, 'تم تحديث الحالة'),
+            'status': target
         }), 200
         
     except Exception as e:
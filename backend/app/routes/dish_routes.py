@@ -4,100 +4,130 @@ Handles dish CRUD operations for chefs
 """
 from flask import Blueprint, request, jsonify
 from firebase_admin import firestore
-from datetime import datetime
+from datetime import datetime, timezone
 from functools import lru_cache
-from time import time
+from app.services.cooker_registry import cooker_registry
+from app.services.cooker_geo import cooker_geo, parse_point
+from app.services.cooker_hours import cooker_hours
+from app.services.dish_catalog import dish_catalog, order_key, created_datetime
+from app.services.dish_categories import DISH_CATEGORIES, category_id, category_key
+from app.services.dish_facets import dish_facets
+from app.services.dish_search import dish_search
+from app.services.popular_dishes import popular_dishes
+from app.utils.cursor import encode_cursor, decode_cursor
+from app.utils.projection import parse_fields, select_fields, project
 
 dish_bp = Blueprint('dish', __name__)
 db = firestore.client()
 
-# Simple cache for active cookers (TTL: 5 minutes)
-_cooker_cache = {'data': None, 'timestamp': 0}
-CACHE_TTL = 300  # 5 minutes
-
+# Types createdAt is stored as: (lowest value of the type, a UTC time as stored in it)
+CREATED_AT_TYPES = (
+    (datetime(1970, 1, 1, tzinfo=timezone.utc), lambda created: created),
+    ('', lambda created: created.replace(tzinfo=None).isoformat()),
+)
 
 def get_active_cookers():
-    """Get active cookers with caching"""
-    current_time = time()
-    
-    # Check if cache is valid
-    if _cooker_cache['data'] and (current_time - _cooker_cache['timestamp']) < CACHE_TTL:
-        return _cooker_cache['data']
-    
-    # Fetch from database
-    active_cookers = {}
-    for cooker_doc in db.collection('cookers').stream():
-        cooker_data = cooker_doc.to_dict()
-        if cooker_data.get('isActive', True):
-            active_cookers[cooker_doc.id] = cooker_data
-    
-    # Update cache
-    _cooker_cache['data'] = active_cookers
-    _cooker_cache['timestamp'] = current_time
-    
-    return active_cookers
+    """Get active cookers from the live cooker registry"""
+    cooker_registry.ensure_ready()
+    return cooker_registry.active()
+
+
+def cookers_near(active_cookers, near):
+    """
+    Restrict active cookers to those delivering to a `lat,lng` point.
+    Returns (cookers, distances) - distances maps cooker id -> km.
+    Raises ValueError for a malformed point.
+    """
+    distances = cooker_geo.delivering_to(*parse_point(near))
+    cookers = {cooker_id: active_cookers[cooker_id] for cooker_id in distances if cooker_id in active_cookers}
+    return cookers, distances
+
+
+def cookers_open_now(active_cookers):
+    """Restrict active cookers to those whose working hours include the current time"""
+    open_ids = cooker_hours.open_now()
+    return {cooker_id: active_cookers[cooker_id] for cooker_id in open_ids if cooker_id in active_cookers}
+
+
+def add_cooker_info(dish, cooker_data):
+    """Decorate a dish with its cooker's display info"""
+    dish['cookerName'] = cooker_data.get('name', dish.get('cookerName', ''))
+    dish['cookerImage'] = cooker_data.get('profileImage', '')
+    dish['cookerRating'] = cooker_data.get('rating', 0)
+    return dish
 
 
 # ============== GET ALL DISHES (Public) ==============
 
 @dish_bp.route('/', methods=['GET'])
 def get_all_dishes():
-    """Get all available dishes (for customers)"""
+    """
+    Get all available dishes (for customers)
+    Pass `cursor` (empty for the first page) to use keyset pagination;
+    old clients keep using page/perPage.
+    Pass `near=lat,lng` to keep only dishes whose chef delivers there.
+    Pass `openNow=true` to keep only dishes whose chef is within working hours.
+    Pass `fields=name,price,image` to return only those fields (plus id).
+    """
     try:
         category = request.args.get('category')
         cooker_id = request.args.get('cookerId')
         search = request.args.get('search', '').lower()
+        cursor = request.args.get('cursor')
+        near = request.args.get('near')
+        open_now = request.args.get('openNow', '').lower() == 'true'
         page = int(request.args.get('page', 1))
         per_page = int(request.args.get('perPage', 20))
+        try:
+            fields = parse_fields(request.args.get('fields'))
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
         
-        # Use cached cookers
+        # Active cookers from the live registry
         active_cookers = get_active_cookers()
-        
-        # Base query - only available dishes
-        dishes_ref = db.collection('dishes').where('isAvailable', '==', True)
+        distances = None
+        if near:
+            try:
+                active_cookers, distances = cookers_near(active_cookers, near)
+            except ValueError:
+                return jsonify({'error': 'Invalid near point, expected lat,lng'}), 400
+        if open_now:
+            active_cookers = cookers_open_now(active_cookers)
+        
+        if cursor is not None:
+            try:
+                after = decode_cursor(cursor) if cursor else None
+            except ValueError:
+                return jsonify({'error': 'Invalid cursor'}), 400
+            return get_dishes_page(after, per_page, category, cooker_id, search, active_cookers,
+                                   distances, fields, cookers_filtered=bool(near or open_now))
+        
+        # Available dishes from the live catalog index (newest first)
+        dish_catalog.ensure_ready()
+        search_ids = set(dish_search.search_ids(search)) if search else None
         
         dishes = []
-        for doc in dishes_ref.stream():
-            dish = doc.to_dict()
-            dish['id'] = doc.id
-            
+        for dish in dish_catalog.list_dishes(category=category, cooker_id=cooker_id):
             # Check if chef is active using cache
             chef_id = dish.get('cookerId', '')
             if chef_id not in active_cookers:
                 continue  # Skip dishes from inactive chefs
             
             # Apply filters
-            if category and dish.get('category', '').lower() != category.lower():
-                continue
-            if cooker_id and dish.get('cookerId') != cooker_id:
-                continue
-            if search and search not in dish.get('name', '').lower() and search not in dish.get('description', '').lower():
+            if search_ids is not None and dish['id'] not in search_ids:
                 continue
             
             # Add cooker info from cache
-            cooker_data = active_cookers[chef_id]
-            dish['cookerName'] = cooker_data.get('name', dish.get('cookerName', ''))
-            dish['cookerImage'] = cooker_data.get('profileImage', '')
-            dish['cookerRating'] = cooker_data.get('rating', 0)
-            
+            add_cooker_info(dish, active_cookers[chef_id])
+            if distances is not None:
+                dish['distanceKm'] = distances[chef_id]
             dishes.append(dish)
         
-        # Sort by createdAt descending (handle Firestore timestamps)
-        def get_sort_key(x):
-            created = x.get('createdAt')
-            if created is None:
-                return 0
-            if hasattr(created, 'timestamp'):
-                return created.timestamp()
-            return 0
-        
-        dishes.sort(key=get_sort_key, reverse=True)
-        
         # Paginate
         total = len(dishes)
         start = (page - 1) * per_page
         end = start + per_page
-        paginated_dishes = dishes[start:end]
+        paginated_dishes = [project(dish, fields) for dish in dishes[start:end]]
         
         return jsonify({
             'success': True,
@@ -111,6 +141,84 @@ def get_all_dishes():
         return jsonify({'error': str(e)}), 500
 
 
+def get_dishes_page(after, per_page, category, cooker_id, search, active_cookers,
+                    distances=None, fields=None, cookers_filtered=False):
+    """
+    One keyset page of available dishes, ordered by (createdAt desc, id).
+    after is a decoded (createdAt, id) cursor or None for the first page.
+    distances (cooker id -> km) is set for `near` queries.
+    fields limits the returned fields (None for full documents).
+    cookers_filtered is set when active_cookers was narrowed (near, openNow).
+    Reads about per_page dishes from the catalog, at most twice that from Firestore.
+    """
+    dish_catalog.start()
+    # Pages filtered by cooker (distance, hours) are only dense when read from the catalog,
+    # and categories are matched by id (whichever name a dish stores), which Firestore cannot do
+    if search or category or cookers_filtered or dish_catalog.is_ready():
+        dish_catalog.ensure_ready()
+        search_ids = set(dish_search.search_ids(search)) if search else None
+        
+        def matches(dish):
+            if dish.get('cookerId', '') not in active_cookers:
+                return False
+            return search_ids is None or dish['id'] in search_ids
+        
+        page = dish_catalog.list_dishes(
+            category=category,
+            cooker_id=cooker_id,
+            after=order_key(*after) if after else None,
+            limit=per_page + 1,
+            predicate=matches
+        )
+        has_more = len(page) > per_page
+        page = page[:per_page]
+        last = page[-1] if page else None
+    else:
+        # Catalog still warming up - read only this page from Firestore.
+        # createdAt is a timestamp on some dishes and an ISO string on others, and
+        # Firestore orders values by type, so each type is read on its own and the
+        # two merged in catalog order: a cursor then means the same from either path
+        base = db.collection('dishes').where('isAvailable', '==', True)
+        if cooker_id:
+            base = base.where('cookerId', '==', cooker_id)
+        since = created_datetime(after[0]) if after else None
+        after_key = order_key(*after) if after else None
+        page = []
+        for lowest, stored in CREATED_AT_TYPES:
+            query = base.where('createdAt', '>=', lowest)\
+                .order_by('createdAt', direction='DESCENDING').order_by('__name__')
+            if since is not None:
+                query = query.start_after({'createdAt': stored(since), '__name__': after[1]})
+            # cookerId and createdAt are needed for the active-chef filter and the cursor
+            query = select_fields(query, fields, required=['cookerId', 'createdAt'])
+            for doc in query.limit(per_page + 1).stream():
+                dish = doc.to_dict()
+                dish['id'] = doc.id
+                if after_key is None or order_key(dish.get('createdAt'), doc.id) > after_key:
+                    page.append(dish)
+        page.sort(key=lambda dish: order_key(dish.get('createdAt'), dish['id']))
+        has_more = len(page) > per_page
+        page = page[:per_page]
+        # The cursor follows the last document read, even if its chef is inactive
+        last = page[-1] if page else None
+        page = [dish for dish in page if dish.get('cookerId', '') in active_cookers]
+    
+    dishes = [add_cooker_info(dish, active_cookers[dish.get('cookerId', '')]) for dish in page]
+    if distances is not None:
+        for dish in dishes:
+            dish['distanceKm'] = distances[dish['cookerId']]
+    # Always a UTC timestamp, whatever type the dish stores, so both paths read it alike
+    next_cursor = encode_cursor(created_datetime(last.get('createdAt')), last['id']) if has_more and last else None
+    
+    return jsonify({
+        'success': True,
+        'dishes': [project(dish, fields) for dish in dishes],
+        'perPage': per_page,
+        'nextCursor': next_cursor,
+        'hasMore': next_cursor is not None
+    }), 200
+
+
 @dish_bp.route('/<dish_id>', methods=['GET'])
 def get_dish(dish_id):
     """Get a single dish by ID"""
@@ -197,6 +305,7 @@ def create_dish():
         doc_ref = db.collection('dishes').add(dish_data)
         dish_id = doc_ref[1].id
         dish_data['id'] = dish_id
+        dish_catalog.upsert(dish_id, dish_data)
         
         return jsonify({
             'success': True,
@@ -249,6 +358,7 @@ def update_dish(dish_id):
         update_fields['updatedAt'] = datetime.utcnow().isoformat()
         
         dish_ref.update(update_fields)
+        dish_catalog.update(dish_id, update_fields)
         
         return jsonify({
             'success': True,
@@ -284,6 +394,7 @@ def delete_dish(dish_id):
         
         # Delete the dish
         dish_ref.delete()
+        dish_catalog.remove(dish_id)
         
         return jsonify({
             'success': True,
@@ -319,10 +430,12 @@ def toggle_dish_availability(dish_id):
         if dish_data.get('cookerId') != user_id:
             return jsonify({'error': 'Unauthorized'}), 403
         
-        dish_ref.update({
+        availability_fields = {
             'isAvailable': is_available,
             'updatedAt': datetime.utcnow().isoformat()
-        })
+        }
+        dish_ref.update(availability_fields)
+        dish_catalog.update(dish_id, availability_fields)
         
         status = 'متاح' if is_available else 'غير متاح'
         return jsonify({
@@ -343,31 +456,20 @@ def get_popular_dishes():
     try:
         limit = int(request.args.get('limit', 10))
         
-        # Use cached cookers
+        # Active cookers from the live registry
         active_cookers = get_active_cookers()
         
-        dishes_ref = db.collection('dishes').where('isAvailable', '==', True)
+        # Top K straight from the leaderboard (no Firestore reads)
+        dish_catalog.ensure_ready()
+        dishes = popular_dishes.top(limit, predicate=lambda dish: dish.get('cookerId', '') in active_cookers)
         
-        dishes = []
-        for doc in dishes_ref.stream():
-            dish = doc.to_dict()
-            dish['id'] = doc.id
-            
-            # Check if chef is active using cache
-            chef_id = dish.get('cookerId', '')
-            if chef_id not in active_cookers:
-                continue
-                
-            cooker_data = active_cookers[chef_id]
+        for dish in dishes:
+            cooker_data = active_cookers[dish.get('cookerId', '')]
             dish['cookerName'] = cooker_data.get('name', dish.get('cookerName', ''))
-            dishes.append(dish)
-        
-        # Sort by ordersCount descending (or popularity)
-        dishes.sort(key=lambda x: x.get('ordersCount', x.get('isPopular', 0)), reverse=True)
         
         return jsonify({
             'success': True,
-            'dishes': dishes[:limit]
+            'dishes': dishes
         }), 200
         
     except Exception as e:
@@ -380,16 +482,7 @@ def get_popular_dishes():
 def get_categories():
     """Get all dish categories"""
     try:
-        categories = [
-            {'id': 'seafood', 'name': 'بحري', 'icon': '🦐'},
-            {'id': 'couscous', 'name': 'كسكسي', 'icon': '🍲'},
-            {'id': 'pasta', 'name': 'مقرونة', 'icon': '🍝'},
-            {'id': 'traditional', 'name': 'تقليدي', 'icon': '🥘'},
-            {'id': 'grilled', 'name': 'مشوي', 'icon': '🍖'},
-            {'id': 'salads', 'name': 'سلطات', 'icon': '🥗'},
-            {'id': 'desserts', 'name': 'حلويات', 'icon': '🍰'},
-            {'id': 'drinks', 'name': 'مشروبات', 'icon': '🥤'},
-        ]
+        categories = [dict(category) for category in DISH_CATEGORIES]
         
         return jsonify({
             'success': True,
@@ -400,6 +493,22 @@ def get_categories():
         return jsonify({'error': str(e)}), 500
 
 
+# ============== FACET COUNTS ==============
+
+@dish_bp.route('/facets', methods=['GET'])
+def get_dish_facets():
+    """Counts of available dishes per category, vegetarian, spicy and price bucket"""
+    try:
+        # Counters are maintained by the catalog and registry listeners
+        cooker_registry.ensure_ready()
+        dish_catalog.ensure_ready()
+        
+        return jsonify(dict(dish_facets.counts(), success=True)), 200
+        
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+
 # ============== SEARCH DISHES ==============
 
 @dish_bp.route('/search', methods=['GET'])
@@ -407,7 +516,7 @@ def search_dishes():
     """Search dishes by name, description, or category"""
     try:
         query = request.args.get('q', '').lower().strip()
-        category = request.args.get('category', '').lower()
+        category = request.args.get('category', '')
         min_price = float(request.args.get('minPrice', 0))
         max_price = float(request.args.get('maxPrice', 999999))
         limit = int(request.args.get('limit', 20))
@@ -419,34 +528,27 @@ def search_dishes():
                 'message': 'Please provide a search query or category'
             }), 200
         
-        # Use cached cookers
+        # Active cookers from the live registry
         active_cookers = get_active_cookers()
         
-        # Get all available dishes
-        dishes_ref = db.collection('dishes').where('isAvailable', '==', True)
+        # Ranked matches from the search index, or the whole catalog for category-only browsing
+        dish_catalog.ensure_ready()
+        if query:
+            candidates = dish_catalog.get_many(dish_search.search_ids(query))
+        else:
+            candidates = dish_catalog.list_dishes()
         
         results = []
-        for doc in dishes_ref.stream():
-            dish = doc.to_dict()
-            dish['id'] = doc.id
-            
+        for dish in candidates:
             # Check if chef is active
             chef_id = dish.get('cookerId', '')
             if chef_id not in active_cookers:
                 continue
             
-            # Apply search filter
-            name = dish.get('name', '').lower()
-            description = dish.get('description', '').lower()
-            dish_category = dish.get('category', '').lower()
             price = dish.get('price', 0)
             
-            # Match query
-            if query and query not in name and query not in description:
-                continue
-            
-            # Match category
-            if category and category != dish_category:
+            # Match category (by id, as in the facet counts)
+            if category and category_key(category) != category_id(dish):
                 continue
             
             # Match price range
@@ -458,13 +560,8 @@ def search_dishes():
             dish['cookerName'] = cooker_data.get('name', '')
             
             results.append(dish)
-        
-        # Sort by relevance (name matches first)
-        if query:
-            results.sort(key=lambda x: (
-                0 if query in x.get('name', '').lower() else 1,
-                -x.get('rating', 0)
-            ))
+            if len(results) >= limit:
+                break
         
         return jsonify({
             'success': True,
@@ -5,28 +5,40 @@ Handles order creation, status updates, and order history
 """
 
 from flask import Blueprint, request, jsonify
-from datetime import datetime
-from app.routes.auth_routes import require_auth
+from app.routes.auth_routes import require_auth, is_admin
+from app.utils.idempotency import idempotent
 from app.services.firebase_service import get_db
 from app.services.auto_notifications import handle_order_status_change
+from app.services import order_events, order_service, order_state
+from app.services.order_service import (
+    ChefClosedError, InvalidOrderError, OrderConflictError, SlotFullError, StaleCartError,
+)
+from app.services.order_eta import kitchen_load
+from app.utils.cursor import encode_cursor, decode_cursor
+from app.utils.sse import sse_response, limit_streams
 
 order_bp = Blueprint('orders', __name__)
 
+MAX_ORDERS_PAGE = 50
+
 
 @order_bp.route('/', methods=['POST'])
 @require_auth
+@idempotent('orders.create')
 def create_order():
     """
     Create a new order
     Expected body: {
-        items: [{dishId, dishName, quantity, price, cookerId, cookerName}],
+        items: [{dishId, quantity, price}],
         deliveryAddress: string,
         deliveryNotes: string,
-        paymentMethod: 'cash' | 'card'
+        paymentMethod: 'cash' | 'card',
+        scheduledFor: ISO date-time of a delivery slot (optional, for pre-orders)
     }
+    Prices come from the stored dishes; a cart with deleted, unavailable or
+    repriced dishes is rejected with 409 and the list of stale items.
     """
-    data = request.get_json()
-    uid = request.user.get('uid')
+    data = request.get_json() or {}
     
     # Validate required fields
     if not data.get('items') or len(data['items']) == 0:
@@ -35,77 +47,117 @@ def create_order():
     if not data.get('deliveryAddress'):
         return jsonify({'error': 'Delivery address is required'}), 400
     
-    # Calculate totals
-    subtotal = sum(item['price'] * item['quantity'] for item in data['items'])
-    delivery_fee = 3.0  # TND - could be dynamic based on distance
-    total = subtotal + delivery_fee
-    
-    # Create order document
-    order = {
-        'userId': uid,
-        'userEmail': request.user.get('email'),
-        'items': data['items'],
-        'subtotal': subtotal,
-        'deliveryFee': delivery_fee,
-        'total': total,
-        'deliveryAddress': data['deliveryAddress'],
-        'deliveryNotes': data.get('deliveryNotes', ''),
-        'paymentMethod': data.get('paymentMethod', 'cash'),
-        'status': 'pending',  # pending -> confirmed -> preparing -> on_the_way -> delivered
-        'createdAt': datetime.utcnow(),
-        'updatedAt': datetime.utcnow()
-    }
-    
     db = get_db()
     if db:
-        doc_ref = db.collection('orders').add(order)
-        order_id = doc_ref[1].id
-        
-        # Send auto-notification to chef
+        # Prices, availability and the order write all happen server-side in one transaction
+        return place_order(lambda: order_service.create_order(db, request.user, data))
+    else:
+        return jsonify({'error': 'Database unavailable'}), 503
+
+
+def place_order(create):
+    """
+    Run an order_service call that creates orders and answer like POST /api/orders:
+    error responses for bad, stale, unbookable or contended carts, otherwise
+    publish and notify each sub-order and return the group with its ETAs.
+    """
+    try:
+        group_id, group, orders = create()
+    except InvalidOrderError as e:
+        return jsonify({'error': str(e)}), 400
+    except OrderConflictError as e:
+        return jsonify({'error': str(e)}), 409
+    except StaleCartError as e:
+        return jsonify({
+            'error': 'Cart is out of date',
+            'staleItems': e.problems
+        }), 409
+    except ChefClosedError as e:
+        return jsonify({
+            'error': 'Chef is closed at that time',
+            'closedChefs': e.chef_ids
+        }), 409
+    except SlotFullError as e:
+        return jsonify({
+            'error': 'Delivery slot is full',
+            'fullChefs': e.chef_ids
+        }), 409
+    
+    # Send auto-notification to each chef
+    for order_id, order in orders:
+        order_events.publish_order(order_id, order)
         try:
             handle_order_status_change(order_id, None, 'pending', order)
         except Exception as e:
             print(f"Failed to send order notification: {e}")
-        
-        return jsonify({
-            'success': True,
-            'orderId': order_id,
-            'total': total,
-            'message': 'تم إنشاء الطلب بنجاح'
-        }), 201
-    else:
-        return jsonify({'error': 'Database unavailable'}), 503
+    
+    # The cart arrives with its slowest chef
+    etas = {order_id: kitchen_load.eta(order_id, order) for order_id, order in orders}
+    eta_minutes = max(eta['etaMinutes'] for eta in etas.values())
+    
+    return jsonify({
+        'success': True,
+        'orderId': orders[0][0],
+        'orderIds': group['orderIds'],
+        'groupId': group_id,
+        'total': group['total'],
+        'etaMinutes': eta_minutes,
+        'etas': etas,
+        'message': 'تم إنشاء الطلب بنجاح'
+    }), 201
 
 
 @order_bp.route('/', methods=['GET'])
 @require_auth
 def get_user_orders():
-    """Get all orders for current user"""
+    """
+    Get the current user's orders, newest first.
+    Pass `limit` (default and max 50) and `cursor` (nextCursor of the previous page).
+    Pass `active=true` to get only in-flight orders.
+    """
     uid = request.user.get('uid')
+    active = request.args.get('active', '').lower() == 'true'
+    cursor = request.args.get('cursor')
+    try:
+        limit = min(max(int(request.args.get('limit', MAX_ORDERS_PAGE)), 1), MAX_ORDERS_PAGE)
+        after = decode_cursor(cursor) if cursor else None
+    except ValueError:
+        return jsonify({'error': 'Invalid limit or cursor'}), 400
     
     db = get_db()
     if db:
         try:
-            # Simple query without orderBy to avoid composite index requirement
-            orders_ref = db.collection('orders')\
-                .where('userId', '==', uid)\
-                .stream()
+            # Served by the (userId, createdAt desc) and (userId, status, createdAt desc) indexes
+            query = db.collection('orders').where('userId', '==', uid)
+            if active:
+                # Orders written by older routes are in flight as 'confirmed' or 'out_for_delivery'
+                query = query.where('status', 'in', order_state.ACTIVE + order_state.aliases_of(order_state.ACTIVE))
+            query = query.order_by('createdAt', direction='DESCENDING').order_by('__name__')
+            if after:
+                query = query.start_after({'createdAt': after[0], '__name__': after[1]})
+            docs = list(query.limit(limit + 1).stream())
             
             orders = []
-            for doc in orders_ref:
+            for doc in docs[:limit]:
                 order_data = doc.to_dict()
                 order_data['id'] = doc.id
-                # Convert timestamps
-                if order_data.get('createdAt'):
-                    order_data['createdAt'] = order_data['createdAt'].isoformat() if hasattr(order_data['createdAt'], 'isoformat') else str(order_data['createdAt'])
-                if order_data.get('updatedAt'):
-                    order_data['updatedAt'] = order_data['updatedAt'].isoformat() if hasattr(order_data['updatedAt'], 'isoformat') else str(order_data['updatedAt'])
                 orders.append(order_data)
             
-            # Sort in Python instead of Firestore
-            orders.sort(key=lambda x: x.get('createdAt', ''), reverse=True)
+            next_cursor = None
+            if len(docs) > limit:
+                next_cursor = encode_cursor(orders[-1].get('createdAt'), orders[-1]['id'])
             
-            return jsonify({'orders': orders[:50]})  # Limit to 50
+            # Convert timestamps
+            for order_data in orders:
+                for field in ('createdAt', 'updatedAt'):
+                    if order_data.get(field):
+                        order_data[field] = order_data[field].isoformat() if hasattr(order_data[field], 'isoformat') else str(order_data[field])
+            
+            return jsonify({
+                'orders': orders,
+                'nextCursor': next_cursor,
+                'hasMore': next_cursor is not None
+            })
         except Exception as e:
             print(f"Error getting orders: {e}")
             return jsonify({'error': str(e)}), 500
@@ -133,6 +185,7 @@ def get_order(order_id):
             return jsonify({'error': 'Unauthorized'}), 403
         
         order_data['id'] = doc.id
+        order_data.update(kitchen_load.eta(doc.id, order_data) or {})
         if order_data.get('createdAt'):
             order_data['createdAt'] = order_data['createdAt'].isoformat()
         if order_data.get('updatedAt'):
@@ -143,40 +196,99 @@ def get_order(order_id):
         return jsonify({'error': 'Database unavailable'}), 503
 
 
-@order_bp.route('/<order_id>/cancel', methods=['POST'])
+@order_bp.route('/<order_id>/events', methods=['GET'])
 @require_auth
-def cancel_order(order_id):
-    """Cancel an order (only if still pending)"""
+@limit_streams
+def order_events_stream(order_id):
+    """
+    Server-Sent Events stream of an order's status.
+    Sends the current status, then every change until the order is delivered or cancelled.
+    """
+    uid = request.user.get('uid')
+    
+    db = get_db()
+    if db:
+        # Subscribe before reading so no change between the read and the subscription is lost
+        subscription = order_events.subscribe_order(order_id)
+        try:
+            doc = db.collection('orders').document(order_id).get()
+            if not doc.exists:
+                subscription.close()
+                return jsonify({'error': 'Order not found'}), 404
+            order_data = doc.to_dict()
+            if order_data.get('userId') != uid and uid not in order_state.order_chef_ids(order_data):
+                subscription.close()
+                return jsonify({'error': 'Unauthorized'}), 403
+        except Exception:
+            subscription.close()
+            raise
+        
+        return sse_response(
+            subscription,
+            initial=[order_events.order_event(order_id, order_data)],
+            event='status',
+            until=lambda event: event.get('status') in order_state.TERMINAL
+        )
+    else:
+        return jsonify({'error': 'Database unavailable'}), 503
+
+
+@order_bp.route('/groups/<group_id>', methods=['GET'])
+@require_auth
+def get_order_group(group_id):
+    """Get a cart-level order group with its per-chef sub-orders"""
     uid = request.user.get('uid')
     
     db = get_db()
     if db:
-        doc_ref = db.collection('orders').document(order_id)
-        doc = doc_ref.get()
+        doc = db.collection('order_groups').document(group_id).get()
         
         if not doc.exists:
             return jsonify({'error': 'Order not found'}), 404
         
-        order_data = doc.to_dict()
+        group = doc.to_dict()
         
-        if order_data.get('userId') != uid:
+        # Verify ownership
+        if group.get('userId') != uid:
             return jsonify({'error': 'Unauthorized'}), 403
         
-        if order_data.get('status') != 'pending':
-            return jsonify({'error': 'Only pending orders can be cancelled'}), 400
+        order_refs = [db.collection('orders').document(order_id) for order_id in group.get('orderIds', [])]
+        orders = []
+        for snapshot in db.get_all(order_refs):
+            if snapshot.exists:
+                order_data = snapshot.to_dict()
+                order_data['id'] = snapshot.id
+                order_data.update(kitchen_load.eta(snapshot.id, order_data) or {})
+                orders.append(order_data)
         
-        doc_ref.update({
-            'status': 'cancelled',
-            'cancelledBy': uid,
-            'updatedAt': datetime.utcnow()
-        })
+        group['id'] = doc.id
+        group['orders'] = orders
+        for data in [group] + orders:
+            for field in ('createdAt', 'updatedAt'):
+                if hasattr(data.get(field), 'isoformat'):
+                    data[field] = data[field].isoformat()
         
-        # Send cancellation notification
-        order_data['cancelledBy'] = uid
+        return jsonify(group)
+    else:
+        return jsonify({'error': 'Database unavailable'}), 503
+
+
+@order_bp.route('/<order_id>/cancel', methods=['POST'])
+@require_auth
+def cancel_order(order_id):
+    """Cancel an order (only if still pending)"""
+    uid = request.user.get('uid')
+    
+    db = get_db()
+    if db:
         try:
-            handle_order_status_change(order_id, 'pending', 'cancelled', order_data)
-        except Exception as e:
-            print(f"Failed to send cancellation notification: {e}")
+            order_state.transition(
+                db, order_id, order_state.CANCELLED,
+                authorize=lambda order: order_state.ROLE_CUSTOMER if order.get('userId') == uid else None,
+                extra_fields={'cancelledBy': uid}
+            )
+        except order_state.TransitionError as e:
+            return jsonify({'error': e.message}), e.status_code
         
         return jsonify({
             'success': True,
@@ -189,49 +301,35 @@ def cancel_order(order_id):
 @order_bp.route('/<order_id>/status', methods=['PUT'])
 @require_auth
 def update_order_status(order_id):
-    """Update order status (for chef/admin)"""
+    """Update order status (for the order's chef or an admin, or the customer cancelling)"""
     uid = request.user.get('uid')
-    data = request.get_json()
-    new_status = data.get('status')
+    data = request.get_json() or {}
+    new_status = order_state.normalize_status(data.get('status'))
     
-    valid_statuses = ['pending', 'accepted', 'preparing', 'ready', 'on_the_way', 'delivered', 'cancelled']
-    if new_status not in valid_statuses:
-        return jsonify({'error': f'Invalid status. Must be one of: {valid_statuses}'}), 400
+    if new_status is None:
+        return jsonify({'error': f'Invalid status. Must be one of: {order_state.STATUSES}'}), 400
     
     db = get_db()
     if db:
-        doc_ref = db.collection('orders').document(order_id)
-        doc = doc_ref.get()
-        
-        if not doc.exists:
-            return jsonify({'error': 'Order not found'}), 404
-        
-        order_data = doc.to_dict()
+        # Read once, outside the transaction (authorize runs on every retry)
+        admin = is_admin(db, uid)
         
-        # Check if user is the chef for this order or the customer
-        items = order_data.get('items', [])
-        chef_ids = set(item.get('cookerId', '') for item in items)
-        
-        # Allow if user is customer (for cancellation) or chef (for status updates)
-        if uid != order_data.get('userId') and uid not in chef_ids:
-            # Check if user is a registered cooker
-            cooker_doc = db.collection('cookers').document(uid).get()
-            if not cooker_doc.exists:
-                return jsonify({'error': 'Unauthorized'}), 403
+        def authorize(order):
+            role = order_state.actor_role(order, uid)
+            if role is None and admin:
+                # Admins may move any order forward or cancel it
+                return order_state.ROLE_ADMIN
+            return role
         
-        old_status = order_data.get('status')
-        
-        doc_ref.update({
-            'status': new_status,
-            'updatedAt': datetime.utcnow()
-        })
-        
-        # Send auto-notification
+        # Read, check and write happen in one transaction; the notification is sent once
         try:
-            order_data['status'] = new_status
-            handle_order_status_change(order_id, old_status, new_status, order_data)
-        except Exception as e:
-            print(f"Failed to send status change notification: {e}")
+            order_state.transition(
+                db, order_id, new_status,
+                authorize=authorize,
+                extra_fields={'cancelledBy': uid} if new_status == order_state.CANCELLED else None
+            )
+        except order_state.TransitionError as e:
+            return jsonify({'error': e.message}), e.status_code
         
         return jsonify({
             'success': True,
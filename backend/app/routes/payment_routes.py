@@ -8,6 +8,7 @@ from flask import Blueprint, request, jsonify
 from firebase_admin import firestore
 from datetime import datetime
 from app.routes.auth_routes import require_auth
+from app.utils.idempotency import idempotent
 
 payment_bp = Blueprint('payments', __name__)
 db = firestore.client()
@@ -99,39 +100,66 @@ def create_payment_intent():
 
 @payment_bp.route('/confirm', methods=['POST'])
 @require_auth
+@idempotent('payments.confirm')
 def confirm_payment():
-    """Confirm payment and update order status"""
+    """
+    Confirm payment and update order status
+    Expected body: { groupId or orderId, paymentMethod, paymentId }
+    A cart is paid as a whole: an orderId is resolved to its group, the
+    group total is charged and every sub-order is marked.
+    """
     try:
         data = request.get_json()
         order_id = data.get('orderId')
+        group_id = data.get('groupId')
         payment_method = data.get('paymentMethod')
         payment_id = data.get('paymentId')  # Stripe/PayPal payment ID
         
-        if not order_id or not payment_method:
-            return jsonify({'error': 'orderId and paymentMethod are required'}), 400
+        if not (order_id or group_id) or not payment_method:
+            return jsonify({'error': 'groupId or orderId, and paymentMethod are required'}), 400
         
-        # Verify order exists
-        order_ref = db.collection('orders').document(order_id)
-        order_doc = order_ref.get()
-        
-        if not order_doc.exists:
-            return jsonify({'error': 'Order not found'}), 404
-        
-        # Update order with payment info
-        order_ref.update({
-            'paymentStatus': 'paid' if payment_method != 'cash' else 'pending',
-            'paymentMethod': payment_method,
-            'paymentId': payment_id,
-            'paidAt': firestore.SERVER_TIMESTAMP if payment_method != 'cash' else None,
-            'updatedAt': firestore.SERVER_TIMESTAMP
-        })
+        if not group_id:
+            # Verify order exists
+            order_doc = db.collection('orders').document(order_id).get()
+            
+            if not order_doc.exists:
+                return jsonify({'error': 'Order not found'}), 404
+            
+            order_data = order_doc.to_dict()
+            group_id = order_data.get('groupId')
+        
+        if group_id:
+            group_doc = db.collection('order_groups').document(group_id).get()
+            if not group_doc.exists:
+                return jsonify({'error': 'Order not found'}), 404
+            group = group_doc.to_dict()
+            order_ids = group.get('orderIds', [])
+            amount = group.get('total', 0)
+        else:
+            # Orders placed before carts were split per chef have no group
+            order_ids = [order_id]
+            amount = order_data.get('total', 0)
+        
+        # Update every sub-order with payment info in one batch
+        batch = db.batch()
+        for sub_order_id in order_ids:
+            batch.update(db.collection('orders').document(sub_order_id), {
+                'paymentStatus': 'paid' if payment_method != 'cash' else 'pending',
+                'paymentMethod': payment_method,
+                'paymentId': payment_id,
+                'paidAt': firestore.SERVER_TIMESTAMP if payment_method != 'cash' else None,
+                'updatedAt': firestore.SERVER_TIMESTAMP
+            })
+        batch.commit()
         
         # Create payment record
         payment_ref = db.collection('payments').document()
         payment_ref.set({
-            'orderId': order_id,
+            'orderId': order_ids[0] if order_ids else order_id,
+            'orderIds': order_ids,
+            'groupId': group_id,
             'userId': request.user.get('uid'),
-            'amount': order_doc.to_dict().get('total', 0),
+            'amount': amount,
             'currency': 'TND',
             'paymentMethod': payment_method,
             'paymentId': payment_id,
@@ -142,6 +170,8 @@ def confirm_payment():
         return jsonify({
             'success': True,
             'message': 'Payment confirmed',
+            'amount': amount,
+            'orderIds': order_ids,
             'paymentStatus': 'paid' if payment_method != 'cash' else 'pending'
         }), 200
         
@@ -258,13 +258,16 @@ def notify_payment_confirmed(order_id, order_data):
 
 # Auto-trigger function to be called from order routes
 def handle_order_status_change(order_id, old_status, new_status, order_data):
-    """Main function to handle order status changes and trigger appropriate notifications"""
+    """
+    Main function to handle order status changes and trigger appropriate notifications.
+    Statuses are the canonical ones from app.services.order_state.
+    """
     try:
         status_handlers = {
             'pending': notify_order_created,
             'accepted': notify_order_accepted,
             'ready': notify_order_ready,
-            'delivering': notify_order_out_for_delivery,
+            'on_the_way': notify_order_out_for_delivery,
             'delivered': notify_order_delivered,
             'cancelled': notify_order_cancelled,
         }
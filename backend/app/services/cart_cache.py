@@ -0,0 +1,356 @@
+"""
+Cart Cache
+==========
+Write-behind cache of carts. Mutations are applied in memory and answered
+at once; a cart's changes are coalesced per line and written to
+`carts/{uid}` in one merge write FLUSH_DELAY seconds after the first of
+them (or right away through flush(), e.g. at checkout), so five taps on
+"+" cost one write. GET /api/cart is served from the cache: the stored
+cart plus the changes not written yet.
+
+Write-behind is only safe with a single worker process, so it is off
+unless CART_WRITE_BEHIND=True. Until its flush, a change lives only in
+the memory of the worker that answered it: a crash or SIGKILL loses it
+(pending writes are flushed at a clean exit only), and other workers
+serve the cart without it. Without write-behind every mutation is one
+write made before its request returns, with no read first (an add is an
+increment, a quantity change or removal an update of its line), and the
+stored copy is read again on each GET, so any worker sees it.
+
+With write-behind, the stored copy is read again once it is older than
+MAX_AGE and the cart has nothing pending, and quantity changes and adds
+to lines already stored write only the quantity. Idle carts with nothing
+left to write are dropped after IDLE_SECONDS.
+"""
+
+import atexit
+import os
+import threading
+import time
+from contextlib import contextmanager
+from datetime import datetime
+
+from app.services import cart_store
+from app.services.cart_store import CartNotFoundError
+
+FLUSH_DELAY = 2  # seconds
+# How long a stored copy is served before it is read again
+MAX_AGE = FLUSH_DELAY
+IDLE_SECONDS = 60
+# Single-worker deployments only (see above)
+WRITE_BEHIND = os.getenv('CART_WRITE_BEHIND', 'False') == 'True'
+
+
+def _apply(lines, dish_id, change):
+    """Apply one change (see cart_store.write_changes) to a {dishId: line} dict"""
+    if change[0] == 'add':
+        line = lines.get(dish_id)
+        if line is None:
+            lines[dish_id] = cart_store.new_line(change[2], change[1])
+        else:
+            lines[dish_id] = dict(line, quantity=line.get('quantity', 0) + change[1])
+    elif change[0] == 'quantity':
+        if dish_id in lines:
+            lines[dish_id] = dict(lines[dish_id], quantity=change[1])
+    elif change[0] == 'set':
+        lines[dish_id] = change[1]
+    else:
+        lines.pop(dish_id, None)
+
+
+def _combine(earlier, later):
+    """One change with the effect of earlier followed by later"""
+    if later[0] == 'quantity':
+        if earlier[0] == 'set':
+            return ('set', dict(earlier[1], quantity=later[1]))
+        if earlier[0] == 'add':
+            # A line added in this batch has nothing stored to keep
+            return ('set', cart_store.new_line(earlier[2], later[1]))
+        return later
+    if later[0] != 'add':
+        return later
+    if earlier[0] == 'add':
+        return ('add', earlier[1] + later[1], dict(later[2], addedAt=earlier[2]['addedAt']))
+    if earlier[0] == 'set':
+        return ('set', dict(earlier[1], quantity=earlier[1]['quantity'] + later[1]))
+    if earlier[0] == 'quantity':
+        return ('quantity', earlier[1] + later[1])
+    return ('set', cart_store.new_line(later[2], later[1]))
+
+
+class _CartEntry:
+    """One user's cart: stored lines (None until read) and changes not written yet"""
+
+    __slots__ = ('db', 'lines', 'loaded_at', 'pending', 'flushing', 'timer', 'used', 'write_lock')
+
+    def __init__(self, db):
+        self.db = db
+        self.lines = None
+        self.loaded_at = 0.0
+        self.pending = {}
+        self.flushing = {}
+        self.timer = None
+        self.used = 0.0
+        # Serializes this cart's reads, flushes and deletes against each other
+        self.write_lock = threading.Lock()
+
+    def view(self):
+        lines = dict(self.lines or {})
+        for changes in (self.flushing, self.pending):
+            for dish_id, change in changes.items():
+                _apply(lines, dish_id, change)
+        return lines
+
+    def idle(self):
+        return not self.pending and not self.flushing and self.timer is None
+
+
+class CartCache:
+    """
+    Per-user carts with coalesced, delayed writes. With write_behind=False
+    each mutation is written directly before it returns and every read
+    goes to Firestore.
+    """
+
+    def __init__(self, flush_delay=FLUSH_DELAY, max_age=MAX_AGE, idle_seconds=IDLE_SECONDS, clock=time.monotonic,
+                 write_behind=True):
+        self._write_behind = write_behind
+        self._flush_delay = flush_delay
+        self._max_age = max_age if write_behind else 0
+        self._idle_seconds = idle_seconds
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._carts = {}
+        self._swept = clock()
+
+    # ---------- entries ----------
+
+    def _entry(self, db, uid):
+        """Cart entry of a user (call with the lock held)"""
+        now = self._clock()
+        if now - self._swept >= self._idle_seconds:
+            self._swept = now
+            for key in [key for key, entry in self._carts.items()
+                        if entry.idle() and now - entry.used >= self._idle_seconds]:
+                del self._carts[key]
+        entry = self._carts.get(uid)
+        if entry is None:
+            entry = self._carts[uid] = _CartEntry(db)
+        entry.db = db
+        entry.used = now
+        return entry
+
+    def _fresh(self, entry):
+        """True while the stored copy can be served (call with the lock held)"""
+        if entry.lines is None:
+            return False
+        # Pending changes are flushed within FLUSH_DELAY; the copy is re-read after that
+        if self._write_behind and entry.pending:
+            return True
+        return self._clock() - entry.loaded_at < self._max_age
+
+    def _loaded(self, db, uid):
+        """Cart entry with a recent copy of its stored lines"""
+        with self._lock:
+            entry = self._entry(db, uid)
+            if self._fresh(entry):
+                return entry
+        with entry.write_lock:
+            with self._lock:
+                if self._fresh(entry):
+                    return entry
+            doc = db.collection(cart_store.CARTS_COLLECTION).document(uid).get()
+            stored = doc.to_dict() if doc.exists else None
+            lines = cart_store.items_map(cart_store.cart_items(stored))
+            # Carts saved before items became a map are converted on first read
+            if stored and isinstance(stored.get('items'), list):
+                db.collection(cart_store.CARTS_COLLECTION).document(uid).set({
+                    'items': lines,
+                    'updatedAt': datetime.utcnow(),
+                })
+            with self._lock:
+                entry.lines = lines
+                entry.loaded_at = self._clock()
+        return entry
+
+    def _queue(self, entry, uid, dish_id, change):
+        """Record a change and schedule the cart's flush (call with the lock held)"""
+        earlier = entry.pending.get(dish_id)
+        entry.pending[dish_id] = change if earlier is None else _combine(earlier, change)
+        self._schedule(entry, uid)
+
+    def _schedule(self, entry, uid):
+        """Start the cart's flush timer if it has none (call with the lock held)"""
+        if self._write_behind and entry.timer is None:
+            entry.timer = threading.Timer(self._flush_delay, self._flush_later, args=(uid,))
+            entry.timer.daemon = True
+            entry.timer.start()
+
+    def _write_through(self, db, uid, write, *args):
+        """Make one write without reading the cart, kept out of a checkout holding it"""
+        with self._lock:
+            entry = self._entry(db, uid)
+        with entry.write_lock:
+            try:
+                write(db, uid, *args)
+            finally:
+                with self._lock:
+                    entry.lines = None
+
+    # ---------- reads ----------
+
+    def get(self, db, uid):
+        """{'items', 'itemCount', 'total'} of a user's cart"""
+        entry = self._loaded(db, uid)
+        with self._lock:
+            return cart_store.cart_view({'items': entry.view()})
+
+    # ---------- mutations ----------
+
+    def add(self, db, uid, dish_id, quantity, details):
+        """Add quantity of a dish (no read: written as an increment)"""
+        details = {field: details.get(field, '') for field in cart_store.ITEM_FIELDS}
+        details['addedAt'] = datetime.utcnow().isoformat()
+        if not self._write_behind:
+            self._write_through(db, uid, cart_store.add_item, dish_id, quantity, details)
+            return
+        with self._lock:
+            entry = self._entry(db, uid)
+            self._queue(entry, uid, dish_id, ('add', quantity, details))
+
+    def set_quantity(self, db, uid, dish_id, quantity):
+        """
+        Set the quantity of a line (0 or less removes it). Raises CartNotFoundError
+        (without write-behind only for a missing cart: the line is not read)
+        """
+        if not self._write_behind:
+            self._write_through(db, uid, cart_store.set_quantity, dish_id, quantity)
+            return
+        entry = self._loaded(db, uid)
+        with self._lock:
+            lines = entry.view()
+            if not lines:
+                raise CartNotFoundError('Cart not found')
+            if dish_id not in lines:
+                raise CartNotFoundError('Item not in cart')
+            if quantity <= 0:
+                change = ('delete',)
+            else:
+                # Only the quantity is written, so other fields written elsewhere survive
+                change = ('quantity', quantity)
+                if dish_id in (entry.lines or {}) and entry.pending.get(dish_id, ('',))[0] == 'add':
+                    # The line is stored: its new quantity replaces the pending increment
+                    del entry.pending[dish_id]
+            self._queue(entry, uid, dish_id, change)
+
+    def remove(self, db, uid, dish_id):
+        """Remove a line. Raises CartNotFoundError"""
+        if not self._write_behind:
+            self._write_through(db, uid, cart_store.remove_item, dish_id)
+            return
+        entry = self._loaded(db, uid)
+        with self._lock:
+            if not entry.view():
+                raise CartNotFoundError('Cart not found')
+            self._queue(entry, uid, dish_id, ('delete',))
+
+    def clear(self, db, uid):
+        """Delete a user's cart, dropping changes not written yet"""
+        with self._lock:
+            entry = self._entry(db, uid)
+            if entry.timer is not None:
+                entry.timer.cancel()
+                entry.timer = None
+            entry.pending = {}
+        with entry.write_lock:
+            db.collection(cart_store.CARTS_COLLECTION).document(uid).delete()
+            with self._lock:
+                entry.lines = {}
+                entry.loaded_at = self._clock()
+
+    @contextmanager
+    def hold(self, db, uid):
+        """
+        Flush a user's cart and keep its writes out while the caller changes
+        the stored cart directly (checkout). The cart is read again afterwards;
+        changes made meanwhile stay pending and are written after it.
+        """
+        with self._lock:
+            entry = self._entry(db, uid)
+        self.flush(uid)
+        with entry.write_lock:
+            try:
+                yield
+            finally:
+                with self._lock:
+                    entry.lines = None
+
+    # ---------- flushing ----------
+
+    def flush(self, uid):
+        """Write a cart's pending changes now, in one write"""
+        with self._lock:
+            entry = self._carts.get(uid)
+            if entry is None:
+                return
+            if entry.timer is not None:
+                entry.timer.cancel()
+                entry.timer = None
+            adding = any(change[0] == 'add' for change in entry.pending.values())
+
+        if adding:
+            # Adds to lines already stored are written as bare increments,
+            # which needs the stored lines
+            try:
+                self._loaded(entry.db, uid)
+            except Exception:
+                with self._lock:
+                    if entry.pending:
+                        self._schedule(entry, uid)
+                raise
+
+        with entry.write_lock:
+            with self._lock:
+                changes, entry.pending = entry.pending, {}
+                entry.flushing = changes
+                stored = entry.lines or {}
+                writes = {
+                    dish_id: ('add', change[1], None) if change[0] == 'add' and dish_id in stored else change
+                    for dish_id, change in changes.items()
+                }
+            if not changes:
+                return
+            try:
+                cart_store.write_changes(entry.db, uid, writes)
+            except Exception:
+                with self._lock:
+                    entry.flushing = {}
+                    # Put the changes back in front of any made meanwhile and retry later
+                    for dish_id, change in entry.pending.items():
+                        changes[dish_id] = _combine(changes[dish_id], change) if dish_id in changes else change
+                    entry.pending = {}
+                    for dish_id, change in changes.items():
+                        self._queue(entry, uid, dish_id, change)
+                raise
+            with self._lock:
+                if entry.lines is not None:
+                    for dish_id, change in changes.items():
+                        _apply(entry.lines, dish_id, change)
+                entry.flushing = {}
+
+    def _flush_later(self, uid):
+        try:
+            self.flush(uid)
+        except Exception as e:
+            print(f"Cart flush failed for {uid}: {e}")
+
+    def flush_all(self):
+        """Write every cart's pending changes (at shutdown)"""
+        with self._lock:
+            uids = list(self._carts)
+        for uid in uids:
+            self._flush_later(uid)
+
+
+cart_cache = CartCache(write_behind=WRITE_BEHIND)
+atexit.register(cart_cache.flush_all)
@@ -0,0 +1,126 @@
+"""
+Cart Store
+==========
+Carts live in `carts/{uid}` with their items in a map keyed by dishId:
+
+    {'items': {dishId: {dishId, dishName, price, quantity, ...}}, 'updatedAt'}
+
+so any set of changed lines is a single field-level write (quantities
+move with `Increment`) and concurrent writers never overwrite each other's
+lines. Totals are computed when the cart is read. Routes go through the
+cache in cart_cache, which writes each change with add_item, set_quantity
+or remove_item, or batches them through write_changes when writes are
+behind.
+"""
+
+import re
+from datetime import datetime
+
+from firebase_admin import firestore
+from google.api_core.exceptions import NotFound
+
+CARTS_COLLECTION = 'carts'
+
+ITEM_FIELDS = ('dishName', 'dishImage', 'price', 'cookerId', 'cookerName')
+
+_SIMPLE_FIELD = re.compile(r'^[_a-zA-Z][_a-zA-Z0-9]*$')
+
+
+class CartNotFoundError(Exception):
+    """The cart (or the item being changed) does not exist"""
+
+
+def field_path(*parts):
+    """Firestore field path, quoting segments that are not plain identifiers"""
+    quoted = []
+    for part in parts:
+        if _SIMPLE_FIELD.match(part):
+            quoted.append(part)
+        else:
+            quoted.append('`' + part.replace('\\', '\\\\').replace('`', '\\`') + '`')
+    return '.'.join(quoted)
+
+
+def cart_items(cart):
+    """Items of a cart document as a list, oldest first (reads legacy list carts too)"""
+    items = (cart or {}).get('items') or {}
+    if isinstance(items, dict):
+        items = [dict(item, dishId=dish_id) for dish_id, item in items.items()]
+    items = [item for item in items if item.get('quantity', 0) > 0 and 'price' in item]
+    return sorted(items, key=lambda item: str(item.get('addedAt', '')))
+
+
+def cart_view(cart):
+    """API shape of a cart: {'items': [...], 'itemCount', 'total'}"""
+    items = cart_items(cart)
+    return {
+        'items': items,
+        'itemCount': len(items),
+        'total': sum(item['price'] * item['quantity'] for item in items),
+    }
+
+
+def items_map(items):
+    """Stored form of a list of items"""
+    return {item['dishId']: {key: value for key, value in item.items() if key != 'dishId'} for item in items}
+
+
+def new_line(details, quantity):
+    """A cart line for a dish from its details"""
+    line = {field: details.get(field, '') for field in ITEM_FIELDS}
+    line['quantity'] = quantity
+    line['addedAt'] = details.get('addedAt') or datetime.utcnow().isoformat()
+    return line
+
+
+def write_changes(db, uid, changes):
+    """
+    Write changed lines of a cart in one merge set (creating the cart as needed).
+    changes maps dishId to one of:
+        ('add', quantity, details)  quantity incremented in place; the line's
+                                    other fields are written only with details
+                                    (None for a line already stored)
+        ('quantity', quantity)      only the quantity set
+        ('set', line)               the whole line
+        ('delete',)                 line removed
+    """
+    items = {}
+    for dish_id, change in changes.items():
+        if change[0] == 'add':
+            # Merged per field, so a stored line keeps its addedAt and price
+            line = new_line(change[2], 0) if change[2] is not None else {}
+            line['quantity'] = firestore.Increment(change[1])
+            items[dish_id] = line
+        elif change[0] == 'quantity':
+            items[dish_id] = {'quantity': change[1]}
+        elif change[0] == 'set':
+            items[dish_id] = change[1]
+        else:
+            items[dish_id] = firestore.DELETE_FIELD
+    db.collection(CARTS_COLLECTION).document(uid).set({
+        'items': items,
+        'updatedAt': datetime.utcnow(),
+    }, merge=True)
+
+
+def add_item(db, uid, dish_id, quantity, details):
+    """Add quantity of a dish in one merge set, without reading (creates the cart and the line as needed)"""
+    write_changes(db, uid, {dish_id: ('add', quantity, details)})
+
+
+def set_quantity(db, uid, dish_id, quantity):
+    """Set the quantity of a line (0 or less removes it) in one update. Raises CartNotFoundError"""
+    value = firestore.DELETE_FIELD if quantity <= 0 else quantity
+    path = field_path('items', dish_id) if quantity <= 0 else field_path('items', dish_id, 'quantity')
+    try:
+        db.collection(CARTS_COLLECTION).document(uid).update({
+            path: value,
+            'updatedAt': datetime.utcnow(),
+        })
+    except NotFound:
+        raise CartNotFoundError('Cart not found')
+
+
+def remove_item(db, uid, dish_id):
+    """Remove a line in one update. Raises CartNotFoundError"""
+    set_quantity(db, uid, dish_id, 0)
@@ -0,0 +1,158 @@
+"""
+Cooker Delivery Area Index
+==========================
+Grid index over active cookers' delivery areas, kept in sync with the cooker
+registry as an observer. Each cooker is filed under every grid cell its
+delivery disc touches, so "who delivers to this point" is one cell lookup
+plus an exact distance check on a handful of candidates.
+"""
+
+import math
+import threading
+
+from app.services.cooker_registry import cooker_registry, is_active_cooker
+
+EARTH_RADIUS_KM = 6371.0
+KM_PER_DEGREE = 111.32
+
+# Grid cell size in degrees (~11 km of latitude)
+CELL_DEGREES = 0.1
+
+DEFAULT_DELIVERY_RADIUS = 10  # km, same default as chef registration
+# Upper bound on a delivery radius, so one cooker never covers thousands of cells
+MAX_DELIVERY_RADIUS = 50  # km
+
+
+def haversine_km(lat1, lng1, lat2, lng2):
+    """Great-circle distance between two points in km"""
+    phi1, phi2 = math.radians(lat1), math.radians(lat2)
+    dphi = phi2 - phi1
+    dlambda = math.radians(lng2 - lng1)
+    a = math.sin(dphi / 2) ** 2 + math.cos(phi1) * math.cos(phi2) * math.sin(dlambda / 2) ** 2
+    return 2 * EARTH_RADIUS_KM * math.asin(min(1.0, math.sqrt(a)))
+
+
+def valid_point(lat, lng):
+    """(lat, lng) as floats, or None when missing or out of range"""
+    try:
+        lat, lng = float(lat), float(lng)
+    except (TypeError, ValueError):
+        return None
+    if math.isnan(lat) or math.isnan(lng) or not (-90 <= lat <= 90 and -180 <= lng <= 180):
+        return None
+    return lat, lng
+
+
+def parse_point(value):
+    """Parse a `lat,lng` query value; raises ValueError if it is not a valid point"""
+    parts = (value or '').split(',')
+    point = valid_point(*parts) if len(parts) == 2 else None
+    if point is None:
+        raise ValueError(f'Invalid point: {value}')
+    return point
+
+
+def cooker_point(cooker):
+    """A cooker's (lat, lng), from lat/lng fields or a location map/GeoPoint"""
+    point = valid_point(cooker.get('lat'), cooker.get('lng'))
+    if point is not None:
+        return point
+    location = cooker.get('location')
+    if isinstance(location, dict):
+        return valid_point(location.get('lat', location.get('latitude')),
+                           location.get('lng', location.get('longitude')))
+    if hasattr(location, 'latitude') and hasattr(location, 'longitude'):
+        return valid_point(location.latitude, location.longitude)
+    return None
+
+
+def delivery_radius(cooker):
+    """Delivery radius in km, or None if the cooker doesn't deliver"""
+    settings = cooker.get('deliverySettings') or {}
+    if not settings.get('offersDelivery', True):
+        return None
+    try:
+        radius = float(settings.get('deliveryRadius', DEFAULT_DELIVERY_RADIUS))
+    except (TypeError, ValueError):
+        radius = DEFAULT_DELIVERY_RADIUS
+    if radius <= 0:
+        return None
+    return min(radius, MAX_DELIVERY_RADIUS)
+
+
+def cell_of(lat, lng):
+    return (math.floor(lat / CELL_DEGREES), math.floor(lng / CELL_DEGREES))
+
+
+def cells_covering(lat, lng, radius_km):
+    """Grid cells touched by the bounding box of a disc"""
+    dlat = radius_km / KM_PER_DEGREE
+    dlng = radius_km / (KM_PER_DEGREE * max(math.cos(math.radians(lat)), 0.01))
+    row_min, col_min = cell_of(max(lat - dlat, -90), max(lng - dlng, -180))
+    row_max, col_max = cell_of(min(lat + dlat, 90), min(lng + dlng, 180))
+    return [(row, col)
+            for row in range(row_min, row_max + 1)
+            for col in range(col_min, col_max + 1)]
+
+
+class CookerGeoIndex:
+    """Active delivering cookers by grid cell"""
+
+    def __init__(self):
+        self._lock = threading.RLock()
+        self.clear()
+
+    # ---------- registry observer ----------
+
+    def clear(self):
+        with self._lock:
+            self._cells = {}   # cell -> {cooker_id, ...}
+            self._areas = {}   # cooker_id -> (lat, lng, radius_km, cells)
+
+    def upsert(self, cooker_id, cooker):
+        with self._lock:
+            self._remove(cooker_id)
+            if not is_active_cooker(cooker):
+                return
+            point = cooker_point(cooker)
+            radius = delivery_radius(cooker)
+            if point is None or radius is None:
+                return
+            cells = cells_covering(point[0], point[1], radius)
+            for cell in cells:
+                self._cells.setdefault(cell, set()).add(cooker_id)
+            self._areas[cooker_id] = (point[0], point[1], radius, cells)
+
+    def remove(self, cooker_id):
+        with self._lock:
+            self._remove(cooker_id)
+
+    def _remove(self, cooker_id):
+        area = self._areas.pop(cooker_id, None)
+        if area is None:
+            return
+        for cell in area[3]:
+            members = self._cells.get(cell)
+            if members is None:
+                continue
+            members.discard(cooker_id)
+            if not members:
+                del self._cells[cell]
+
+    # ---------- queries ----------
+
+    def delivering_to(self, lat, lng):
+        """Map of cooker id -> distance in km for cookers that deliver to (lat, lng)"""
+        result = {}
+        with self._lock:
+            for cooker_id in self._cells.get(cell_of(lat, lng), ()):
+                cooker_lat, cooker_lng, radius, _ = self._areas[cooker_id]
+                distance = haversine_km(lat, lng, cooker_lat, cooker_lng)
+                if distance <= radius:
+                    result[cooker_id] = round(distance, 2)
+        return result
+
+
+# Shared index, kept in sync with the cooker registry
+cooker_geo = CookerGeoIndex()
+cooker_registry.add_observer(cooker_geo)
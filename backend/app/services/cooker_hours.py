@@ -0,0 +1,163 @@
+"""
+Cooker Working Hours Index
+==========================
+Weekly `workingHours` schedules of active cookers compiled into one interval
+timeline per weekday, kept in sync with the cooker registry as an observer.
+"Who is open now" is a bisect into the day's timeline instead of parsing
+every cooker's schedule per request.
+"""
+
+import threading
+from bisect import bisect_right
+from datetime import datetime, timedelta, timezone
+
+from app.services.cooker_registry import cooker_registry, is_active_cooker
+
+try:
+    from zoneinfo import ZoneInfo
+    LOCAL_TZ = ZoneInfo('Africa/Tunis')
+except (ImportError, KeyError):
+    # No tz database available: Tunisia is UTC+1 all year (no DST)
+    LOCAL_TZ = timezone(timedelta(hours=1), 'Africa/Tunis')
+
+# workingHours keys, in datetime.weekday() order
+WEEKDAYS = ['monday', 'tuesday', 'wednesday', 'thursday', 'friday', 'saturday', 'sunday']
+MINUTES_PER_DAY = 24 * 60
+
+
+def parse_time(value):
+    """'HH:MM' -> minutes since midnight ('24:00' allowed), or None"""
+    try:
+        hours, minutes = str(value).strip().split(':')
+        hours, minutes = int(hours), int(minutes)
+    except (ValueError, AttributeError):
+        return None
+    if not (0 <= hours <= 24 and 0 <= minutes < 60) or hours * 60 + minutes > MINUTES_PER_DAY:
+        return None
+    return hours * 60 + minutes
+
+
+def compile_schedule(working_hours):
+    """
+    Weekly schedule -> {weekday index: [(start, end), ...]} in minutes.
+    Cookers without a schedule are open all week; a closing time at or before
+    the opening time runs past midnight into the next day.
+    """
+    if not isinstance(working_hours, dict):
+        return {day: [(0, MINUTES_PER_DAY)] for day in range(7)}
+
+    intervals = {}
+    for day, name in enumerate(WEEKDAYS):
+        hours = working_hours.get(name)
+        if not isinstance(hours, dict) or not hours.get('isOpen', True):
+            continue
+        start, end = parse_time(hours.get('open')), parse_time(hours.get('close'))
+        if start is None or end is None:
+            continue
+        if end > start:
+            intervals.setdefault(day, []).append((start, end))
+        else:
+            # Overnight: split at midnight
+            if start < MINUTES_PER_DAY:
+                intervals.setdefault(day, []).append((start, MINUTES_PER_DAY))
+            if end > 0:
+                intervals.setdefault((day + 1) % 7, []).append((0, end))
+    return intervals
+
+
+def local_now():
+    return datetime.now(LOCAL_TZ)
+
+
+class _DayTimeline:
+    """One weekday: cooker intervals plus a compiled boundary -> open-set timeline"""
+
+    def __init__(self):
+        self.intervals = {}     # cooker_id -> [(start, end), ...]
+        self.dirty = True
+        self.boundaries = []    # sorted minutes where the open set changes
+        self.open_sets = []     # open_sets[i] applies from boundaries[i] to boundaries[i + 1]
+
+    def compile(self):
+        events = {}
+        for cooker_id, intervals in self.intervals.items():
+            for start, end in intervals:
+                events.setdefault(start, []).append((cooker_id, 1))
+                events.setdefault(end, []).append((cooker_id, -1))
+
+        # Count overlapping intervals so a cooker with two shifts stays consistent
+        open_counts = {}
+        boundaries, open_sets = [], []
+        for minute in sorted(events):
+            for cooker_id, delta in events[minute]:
+                count = open_counts.get(cooker_id, 0) + delta
+                if count:
+                    open_counts[cooker_id] = count
+                else:
+                    open_counts.pop(cooker_id, None)
+            boundaries.append(minute)
+            open_sets.append(frozenset(open_counts))
+
+        self.boundaries, self.open_sets = boundaries, open_sets
+        self.dirty = False
+
+    def open_at(self, minute):
+        index = bisect_right(self.boundaries, minute) - 1
+        return self.open_sets[index] if index >= 0 else frozenset()
+
+
+class CookerHoursIndex:
+    """Active cookers' opening intervals by weekday"""
+
+    def __init__(self):
+        self._lock = threading.RLock()
+        self.clear()
+
+    # ---------- registry observer ----------
+
+    def clear(self):
+        with self._lock:
+            self._days = [_DayTimeline() for _ in range(7)]
+            self._cooker_days = {}   # cooker_id -> weekdays with intervals
+
+    def upsert(self, cooker_id, cooker):
+        with self._lock:
+            self._remove(cooker_id)
+            if not is_active_cooker(cooker):
+                return
+            schedule = compile_schedule(cooker.get('workingHours'))
+            for day, intervals in schedule.items():
+                self._days[day].intervals[cooker_id] = intervals
+                self._days[day].dirty = True
+            self._cooker_days[cooker_id] = list(schedule)
+
+    def remove(self, cooker_id):
+        with self._lock:
+            self._remove(cooker_id)
+
+    def _remove(self, cooker_id):
+        for day in self._cooker_days.pop(cooker_id, ()):
+            self._days[day].intervals.pop(cooker_id, None)
+            self._days[day].dirty = True
+
+    # ---------- queries ----------
+
+    def open_at(self, when):
+        """Ids of cookers open at a datetime (naive values are taken as Tunis time)"""
+        if when.tzinfo is not None:
+            when = when.astimezone(LOCAL_TZ)
+        with self._lock:
+            timeline = self._days[when.weekday()]
+            if timeline.dirty:
+                # Schedules changed since the last query: recompile this day once
+                timeline.compile()
+            return timeline.open_at(when.hour * 60 + when.minute)
+
+    def open_now(self):
+        """Ids of cookers open right now in Tunis"""
+        return self.open_at(local_now())
+
+
+# Shared index, kept in sync with the cooker registry
+cooker_hours = CookerHoursIndex()
+cooker_registry.add_observer(cooker_hours)
@@ -0,0 +1,70 @@
+"""
+Cooker Registry
+===============
+Live in-memory mirror of the `cookers` collection. Replaces the 5-minute
+TTL cache: the snapshot listener applies each cooker change as it happens,
+and cooker write paths update their entry directly so a chef going offline
+is hidden immediately.
+"""
+
+from app.services.live_collection import LiveCollection
+
+
+def is_active_cooker(cooker):
+    """Cookers are active unless explicitly switched off"""
+    return bool(cooker.get('isActive', True))
+
+
+class CookerRegistry(LiveCollection):
+    """Cookers by id, plus a ready-made map of the active ones"""
+
+    def __init__(self, collection='cookers'):
+        super().__init__(collection)
+        self._bulk_loading = False
+        self._clear_indexes()
+
+    # ---------- index hooks ----------
+
+    def _clear_indexes(self):
+        # Copy-on-write: readers get this dict and may hold it across changes
+        self._active = {}
+
+    def _index(self, cooker_id, cooker):
+        if self._bulk_loading:
+            return
+        if is_active_cooker(cooker):
+            active = dict(self._active)
+            active[cooker_id] = cooker
+            self._active = active
+
+    def _unindex(self, cooker_id, cooker):
+        if cooker_id in self._active:
+            active = dict(self._active)
+            del active[cooker_id]
+            self._active = active
+
+    def _reset(self, items):
+        # Rebuild the active map in one pass rather than copying it per cooker
+        self._bulk_loading = True
+        try:
+            super()._reset(items)
+        finally:
+            self._bulk_loading = False
+        self._active = {cooker_id: self._docs[cooker_id] for cooker_id in self._docs
+                        if is_active_cooker(self._docs[cooker_id])}
+
+    # ---------- reads ----------
+
+    def active(self):
+        """
+        Map of active cooker id -> cooker document.
+        The map is a snapshot that is never modified in place; treat it as read-only.
+        """
+        return self._active
+
+    def is_active(self, cooker_id):
+        return cooker_id in self._active
+
+
+# Shared registry for the whole process
+cooker_registry = CookerRegistry()
@@ -0,0 +1,126 @@
+"""
+Dish Catalog Index
+==================
+In-memory mirror of the `dishes` collection, kept fresh by a Firestore
+on_snapshot listener so listing endpoints never stream the collection.
+"""
+
+from bisect import bisect_left, bisect_right, insort
+from collections import defaultdict
+from datetime import datetime, timezone
+
+from app.services.dish_categories import category_id, category_key
+from app.services.live_collection import LiveCollection
+
+
+def created_datetime(created):
+    """A createdAt value (Firestore timestamp, datetime or ISO string) as an aware UTC datetime, or None"""
+    if isinstance(created, str):
+        try:
+            created = datetime.fromisoformat(created)
+        except ValueError:
+            return None
+    if not isinstance(created, datetime):
+        return None
+    if created.tzinfo is None:
+        # Backend writes naive UTC strings (datetime.utcnow().isoformat())
+        return created.replace(tzinfo=timezone.utc)
+    return created.astimezone(timezone.utc)
+
+
+def created_sort_value(created):
+    """Convert a createdAt value (Firestore timestamp, datetime or ISO string) to epoch seconds"""
+    created = created_datetime(created)
+    return created.timestamp() if created is not None else 0
+
+
+def order_key(created, dish_id):
+    """Position of a dish in the catalog order (newest first, then by id)"""
+    return (-created_sort_value(created), dish_id)
+
+
+class DishCatalog(LiveCollection):
+    """
+    Dishes indexed by id, category id (see dish_categories, as in the facet
+    counts) and cookerId, ordered by createdAt (newest first)
+    """
+
+    def __init__(self, collection='dishes'):
+        super().__init__(collection)
+        self._clear_indexes()
+
+    # ---------- index hooks ----------
+
+    def _clear_indexes(self):
+        self._by_category = defaultdict(set)
+        self._by_cooker = defaultdict(set)
+        self._available = set()
+        self._keys = {}   # dish id -> order key
+        self._order = []  # sorted (-createdAt, id)
+
+    def _index(self, dish_id, dish):
+        self._by_category[category_id(dish)].add(dish_id)
+        self._by_cooker[dish.get('cookerId', '')].add(dish_id)
+        if dish.get('isAvailable') is True:
+            self._available.add(dish_id)
+
+        key = order_key(dish.get('createdAt'), dish_id)
+        self._keys[dish_id] = key
+        insort(self._order, key)
+
+    def _unindex(self, dish_id, dish):
+        category = category_id(dish)
+        self._by_category[category].discard(dish_id)
+        if not self._by_category[category]:
+            del self._by_category[category]
+        cooker_id = dish.get('cookerId', '')
+        self._by_cooker[cooker_id].discard(dish_id)
+        if not self._by_cooker[cooker_id]:
+            del self._by_cooker[cooker_id]
+        self._available.discard(dish_id)
+
+        key = self._keys.pop(dish_id)
+        index = bisect_left(self._order, key)
+        if index < len(self._order) and self._order[index] == key:
+            del self._order[index]
+
+    # ---------- reads ----------
+
+    def list_dishes(self, category=None, cooker_id=None, available_only=True,
+                    after=None, limit=None, predicate=None):
+        """
+        Get copies of matching dishes, newest first.
+        category: a category id or any name stored for it (see dish_categories)
+        after: order key (see order_key) to resume after, for keyset pagination
+        limit: stop after this many dishes
+        predicate: extra filter, called with the indexed dish (must not modify it)
+        """
+        with self._lock:
+            if category or cooker_id:
+                ids = None
+                if category:
+                    ids = set(self._by_category.get(category_key(category), ()))
+                if cooker_id:
+                    cooker_ids = self._by_cooker.get(cooker_id, set())
+                    ids = set(cooker_ids) if ids is None else ids & cooker_ids
+                keys = sorted(self._keys[dish_id] for dish_id in ids)
+            else:
+                keys = self._order
+
+            start = bisect_right(keys, after) if after else 0
+            result = []
+            for index in range(start, len(keys)):
+                dish_id = keys[index][1]
+                if available_only and dish_id not in self._available:
+                    continue
+                dish = self._docs[dish_id]
+                if predicate is not None and not predicate(dish):
+                    continue
+                result.append(dict(dish))
+                if limit and len(result) >= limit:
+                    break
+            return result
+
+
+# Shared catalog for the whole process
+dish_catalog = DishCatalog()
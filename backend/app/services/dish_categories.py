@@ -0,0 +1,44 @@
+"""
+Dish Categories
+===============
+The dish category vocabulary. Dishes store a category id, its Arabic name
+or an older name; category_id maps any of them to the id served by
+GET /api/dishes/categories, so the catalog's category filter and the
+facet counts group dishes the same way.
+"""
+
+# Categories shown in the app (served by GET /api/dishes/categories)
+DISH_CATEGORIES = [
+    {'id': 'seafood', 'name': 'بحري', 'icon': '🦐'},
+    {'id': 'couscous', 'name': 'كسكسي', 'icon': '🍲'},
+    {'id': 'pasta', 'name': 'مقرونة', 'icon': '🍝'},
+    {'id': 'traditional', 'name': 'تقليدي', 'icon': '🥘'},
+    {'id': 'grilled', 'name': 'مشوي', 'icon': '🍖'},
+    {'id': 'appetizers', 'name': 'مقبلات', 'icon': '🥟'},
+    {'id': 'salads', 'name': 'سلطات', 'icon': '🥗'},
+    {'id': 'desserts', 'name': 'حلويات', 'icon': '🍰'},
+    {'id': 'drinks', 'name': 'مشروبات', 'icon': '🥤'},
+]
+OTHER_CATEGORY = 'other'
+
+# Older dishes (and scripts/seed_database.py) use names outside the vocabulary
+LEGACY_CATEGORIES = {
+    'أطباق رئيسية': 'traditional',  # main dishes
+    'شوربة': 'traditional',         # soups
+}
+
+# Dishes store either the category id or its Arabic name
+_CATEGORY_IDS = dict(LEGACY_CATEGORIES)
+for _category in DISH_CATEGORIES:
+    _CATEGORY_IDS[_category['id']] = _category['id']
+    _CATEGORY_IDS[_category['name']] = _category['id']
+
+
+def category_key(value):
+    """Category id for a stored or requested category name, or 'other'"""
+    return _CATEGORY_IDS.get(str(value or '').strip().lower(), OTHER_CATEGORY)
+
+
+def category_id(dish):
+    """Category id from get_categories for a dish, or 'other'"""
+    return category_key(dish.get('category', ''))
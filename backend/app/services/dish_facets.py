@@ -0,0 +1,161 @@
+"""
+Dish Facet Counts
+=================
+Counts of available dishes from active cookers per category, vegetarian,
+spicy and price bucket. The counters observe both the dish catalog and the
+cooker registry and are adjusted per change, so reading them costs the same
+whatever the catalog size.
+"""
+
+import threading
+from collections import Counter, defaultdict
+
+from app.services.cooker_registry import cooker_registry, is_active_cooker
+from app.services.dish_catalog import dish_catalog
+from app.services.dish_categories import DISH_CATEGORIES, OTHER_CATEGORY, category_id
+
+# Price buckets in TND: (id, min inclusive, max exclusive or None)
+PRICE_BUCKETS = [
+    ('under_10', 0, 10),
+    ('10_20', 10, 20),
+    ('20_40', 20, 40),
+    ('40_plus', 40, None),
+]
+
+
+def price_bucket(dish):
+    """Price bucket id for a dish, or None if it has no usable price"""
+    try:
+        price = float(dish.get('price'))
+    except (TypeError, ValueError):
+        return None
+    for bucket_id, low, high in PRICE_BUCKETS:
+        if price >= low and (high is None or price < high):
+            return bucket_id
+    return None
+
+
+def facet_keys(dish):
+    """Counter keys a dish contributes to"""
+    keys = ['total', 'category:' + category_id(dish)]
+    bucket = price_bucket(dish)
+    if bucket is not None:
+        keys.append('price:' + bucket)
+    if dish.get('isVegetarian') is True:
+        keys.append('vegetarian')
+    if dish.get('isSpicy') is True:
+        keys.append('spicy')
+    return tuple(keys)
+
+
+class _CookerObserver:
+    """Registry side of the facet index: tracks which cookers are active"""
+
+    def __init__(self, facets):
+        self._facets = facets
+
+    def clear(self):
+        self._facets._clear_cookers()
+
+    def upsert(self, cooker_id, cooker):
+        self._facets._set_cooker_active(cooker_id, is_active_cooker(cooker))
+
+    def remove(self, cooker_id):
+        self._facets._set_cooker_active(cooker_id, False)
+
+
+class DishFacetIndex:
+    """Facet counters over available dishes whose cooker is active"""
+
+    def __init__(self):
+        self._lock = threading.RLock()
+        self._dish_keys = {}                 # dish_id -> (cooker_id, facet keys) for available dishes
+        self._by_cooker = defaultdict(set)   # cooker_id -> available dish ids
+        self._active_cookers = set()
+        self._counts = Counter()
+        self.cookers = _CookerObserver(self)
+
+    # ---------- catalog observer ----------
+
+    def clear(self):
+        with self._lock:
+            self._dish_keys = {}
+            self._by_cooker = defaultdict(set)
+            self._counts = Counter()
+
+    def upsert(self, dish_id, dish):
+        with self._lock:
+            self._remove(dish_id)
+            if dish.get('isAvailable') is not True:
+                return
+            cooker_id = dish.get('cookerId', '')
+            keys = facet_keys(dish)
+            self._dish_keys[dish_id] = (cooker_id, keys)
+            self._by_cooker[cooker_id].add(dish_id)
+            if cooker_id in self._active_cookers:
+                self._counts.update(keys)
+
+    def remove(self, dish_id):
+        with self._lock:
+            self._remove(dish_id)
+
+    def _remove(self, dish_id):
+        entry = self._dish_keys.pop(dish_id, None)
+        if entry is None:
+            return
+        cooker_id, keys = entry
+        self._by_cooker[cooker_id].discard(dish_id)
+        if not self._by_cooker[cooker_id]:
+            del self._by_cooker[cooker_id]
+        if cooker_id in self._active_cookers:
+            self._counts.subtract(keys)
+
+    # ---------- registry side ----------
+
+    def _clear_cookers(self):
+        with self._lock:
+            self._active_cookers = set()
+            self._counts = Counter()
+
+    def _set_cooker_active(self, cooker_id, active):
+        with self._lock:
+            if active == (cooker_id in self._active_cookers):
+                return
+            if active:
+                self._active_cookers.add(cooker_id)
+            else:
+                self._active_cookers.discard(cooker_id)
+            # Only this cooker's dishes move in or out of the counts
+            for dish_id in self._by_cooker.get(cooker_id, ()):
+                keys = self._dish_keys[dish_id][1]
+                if active:
+                    self._counts.update(keys)
+                else:
+                    self._counts.subtract(keys)
+
+    # ---------- queries ----------
+
+    def counts(self):
+        """Facet counts, with categories in the get_categories order"""
+        with self._lock:
+            counts = dict(self._counts)
+
+        categories = [dict(category, count=counts.get('category:' + category['id'], 0))
+                      for category in DISH_CATEGORIES]
+        categories.append({'id': OTHER_CATEGORY, 'name': 'أخرى', 'icon': '🍽️',
+                           'count': counts.get('category:' + OTHER_CATEGORY, 0)})
+        return {
+            'total': counts.get('total', 0),
+            'categories': categories,
+            'vegetarian': counts.get('vegetarian', 0),
+            'spicy': counts.get('spicy', 0),
+            'priceBuckets': [{'id': bucket_id, 'min': low, 'max': high,
+                              'count': counts.get('price:' + bucket_id, 0)}
+                             for bucket_id, low, high in PRICE_BUCKETS],
+        }
+
+
+# Shared facet counters, kept in sync with the catalog and the cooker registry
+dish_facets = DishFacetIndex()
+cooker_registry.add_observer(dish_facets.cookers)
+dish_catalog.add_observer(dish_facets)
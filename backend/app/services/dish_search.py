@@ -0,0 +1,331 @@
+"""
+Dish Search Engine
+==================
+Token-level inverted index over the dish catalog with Arabic normalization
+and BM25 ranking. Follows the catalog as an observer, so it is updated
+incrementally whenever a dish is created, updated or deleted.
+
+Typo tolerance: vocabulary terms are also indexed by the trigrams of a
+phonetic key (Tunisian transliteration variants folded together), so a
+query token with no exact or prefix match expands to similar terms
+("koskosi" -> couscous, "makrouna" -> makroudh) without scanning dishes.
+"""
+
+import heapq
+import math
+import re
+import threading
+import unicodedata
+from bisect import bisect_left, insort
+from collections import Counter, defaultdict
+
+from app.services.dish_catalog import dish_catalog
+
+# Field weights (BM25F-style: term frequencies are weighted per field)
+FIELD_WEIGHTS = {
+    'name': 3.0,
+    'nameAr': 3.0,
+    'tags': 2.0,
+    'ingredients': 1.0,
+    'description': 1.0,
+}
+
+# BM25 parameters
+BM25_K1 = 1.2
+BM25_B = 0.75
+
+# Max vocabulary terms a trailing prefix (search-as-you-type) can expand to
+MAX_PREFIX_EXPANSIONS = 50
+PREFIX_MATCH_WEIGHT = 0.5
+
+# Fuzzy matching: Dice similarity of phonetic-key trigrams
+FUZZY_THRESHOLD = 0.5
+FUZZY_MATCH_WEIGHT = 0.6
+MAX_FUZZY_EXPANSIONS = 10
+MIN_FUZZY_LENGTH = 3
+
+_TATWEEL = '\u0640'
+_TOKEN_RE = re.compile(r'\w+', re.UNICODE)
+
+_ARABIC_FOLD = str.maketrans({
+    'أ': 'ا', 'إ': 'ا', 'آ': 'ا', 'ٱ': 'ا',  # alef / hamza forms
+    'ة': 'ه',  # taa marbuta
+    'ى': 'ي',  # alef maqsura
+    'ؤ': 'و',
+    'ئ': 'ي',
+})
+
+
+def normalize_text(text):
+    """Lowercase, strip Latin accents and Arabic tashkeel, fold Arabic letter variants"""
+    if not text:
+        return ''
+    # NFKD splits accents, hamza marks and presentation forms into base letters
+    # plus combining marks; dropping the marks removes tashkeel as well
+    decomposed = unicodedata.normalize('NFKD', str(text).lower())
+    text = ''.join(ch for ch in decomposed if not unicodedata.combining(ch) and ch != _TATWEEL)
+    return text.translate(_ARABIC_FOLD)
+
+
+def _strip_article(token):
+    """Remove the Arabic definite article (ال) from longer tokens"""
+    if token.startswith('ال') and len(token) > 3:
+        return token[2:]
+    return token
+
+
+def tokenize(text):
+    """Split text into normalized search tokens"""
+    return [_strip_article(token) for token in _TOKEN_RE.findall(normalize_text(text))]
+
+
+# Arabizi digits used in Tunisian transliteration (mlou7ia, 3ejja, 9alb)
+_ARABIZI = str.maketrans({'2': 'a', '3': 'a', '5': 'kh', '7': 'h', '8': 'gh', '9': 'k'})
+
+# Latin spelling variants folded to one form, applied in order
+_LATIN_FOLDS = [
+    ('ch', 'sh'), ('ou', 'u'), ('oo', 'u'), ('ck', 'k'), ('ph', 'f'),
+    ('c', 'k'), ('q', 'k'), ('o', 'u'), ('w', 'u'), ('y', 'i'),
+]
+_REPEATS = re.compile(r'(.)\1+')
+
+
+def phonetic_key(term):
+    """
+    Spelling-insensitive key of a normalized token: Latin transliterations
+    of the same word (couscous / kuskus / koskosi-ish) share most trigrams.
+    Arabic tokens are already folded by normalize_text and are returned as is.
+    """
+    if not term.isascii():
+        return term
+    if not term.isdigit():
+        term = term.translate(_ARABIZI)
+    for variant, folded in _LATIN_FOLDS:
+        term = term.replace(variant, folded)
+    return _REPEATS.sub(r'\1', term)
+
+
+def trigrams(key):
+    """Set of character trigrams of a key, padded so short words still have some"""
+    padded = f' {key} '
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+def _field_text(value):
+    """Flatten list fields (tags, ingredients) into a single string"""
+    if isinstance(value, (list, tuple)):
+        return ' '.join(str(v) for v in value if v)
+    return value or ''
+
+
+class DishSearchIndex:
+    """Inverted index of available dishes, ranked with BM25"""
+
+    def __init__(self):
+        self._lock = threading.RLock()
+        self.clear()
+
+    # ---------- catalog observer ----------
+
+    def clear(self):
+        with self._lock:
+            self._postings = {}                 # term -> {dish_id: weighted tf}
+            self._doc_terms = {}                # dish_id -> {term: weighted tf}
+            self._doc_len = {}
+            self._total_len = 0.0
+            self._vocab = []                    # sorted terms, for prefix lookups
+            self._key_terms = {}                # phonetic key -> {term, ...}
+            self._gram_keys = {}                # trigram -> {phonetic key, ...}
+
+    def upsert(self, dish_id, dish):
+        with self._lock:
+            self._remove(dish_id)
+            if dish.get('isAvailable') is not True:
+                return
+
+            terms = defaultdict(float)
+            for field, weight in FIELD_WEIGHTS.items():
+                for token in tokenize(_field_text(dish.get(field))):
+                    terms[token] += weight
+            if not terms:
+                return
+
+            for term, tf in terms.items():
+                if term not in self._postings:
+                    self._add_term(term)
+                self._postings.setdefault(term, {})[dish_id] = tf
+            self._doc_terms[dish_id] = dict(terms)
+            length = sum(terms.values())
+            self._doc_len[dish_id] = length
+            self._total_len += length
+
+    def remove(self, dish_id):
+        with self._lock:
+            self._remove(dish_id)
+
+    def _remove(self, dish_id):
+        terms = self._doc_terms.pop(dish_id, None)
+        if terms is None:
+            return
+        for term in terms:
+            postings = self._postings.get(term)
+            if postings is None:
+                continue
+            postings.pop(dish_id, None)
+            if not postings:
+                del self._postings[term]
+                self._drop_term(term)
+        self._total_len -= self._doc_len.pop(dish_id, 0.0)
+
+    def _add_term(self, term):
+        """A term entered the vocabulary: index it for prefix and fuzzy lookups"""
+        insort(self._vocab, term)
+        key = phonetic_key(term)
+        terms = self._key_terms.setdefault(key, set())
+        if not terms:
+            for gram in trigrams(key):
+                self._gram_keys.setdefault(gram, set()).add(key)
+        terms.add(term)
+
+    def _drop_term(self, term):
+        """A term left the vocabulary"""
+        index = bisect_left(self._vocab, term)
+        if index < len(self._vocab) and self._vocab[index] == term:
+            del self._vocab[index]
+        key = phonetic_key(term)
+        terms = self._key_terms.get(key)
+        if terms is None:
+            return
+        terms.discard(term)
+        if terms:
+            return
+        del self._key_terms[key]
+        for gram in trigrams(key):
+            keys = self._gram_keys.get(gram)
+            if keys is None:
+                continue
+            keys.discard(key)
+            if not keys:
+                del self._gram_keys[gram]
+
+    # ---------- queries ----------
+
+    def _prefix_terms(self, prefix):
+        """Vocabulary terms starting with prefix (bounded)"""
+        start = bisect_left(self._vocab, prefix)
+        terms = []
+        for term in self._vocab[start:start + MAX_PREFIX_EXPANSIONS]:
+            if not term.startswith(prefix):
+                break
+            terms.append(term)
+        return terms
+
+    def _fuzzy_terms(self, token):
+        """
+        Vocabulary terms similar to token, as {term: weight}.
+        Candidates come from the trigram index only: the cost depends on how
+        many keys share a trigram with the token, not on the number of dishes.
+        """
+        key = phonetic_key(token)
+        if len(key) < MIN_FUZZY_LENGTH:
+            return {}
+        grams = trigrams(key)
+        shared = defaultdict(int)
+        for gram in grams:
+            for candidate in self._gram_keys.get(gram, ()):
+                shared[candidate] += 1
+
+        scored = []
+        for candidate, count in shared.items():
+            similarity = 2.0 * count / (len(grams) + len(trigrams(candidate)))
+            if similarity >= FUZZY_THRESHOLD:
+                scored.append((similarity, candidate))
+
+        variants = {}
+        for similarity, candidate in heapq.nlargest(MAX_FUZZY_EXPANSIONS, scored):
+            for term in self._key_terms[candidate]:
+                variants[term] = max(variants.get(term, 0.0), FUZZY_MATCH_WEIGHT * similarity)
+        return variants
+
+    def _expand(self, tokens):
+        """
+        Map each query token to {term: weight}. The last token also matches as
+        a prefix; tokens that match nothing fall back to fuzzy matches.
+        """
+        expanded = []
+        for position, token in enumerate(tokens):
+            variants = {token: 1.0} if token in self._postings else {}
+            if position == len(tokens) - 1:
+                for term in self._prefix_terms(token):
+                    variants.setdefault(term, PREFIX_MATCH_WEIGHT)
+            if not variants:
+                variants = self._fuzzy_terms(token)
+            expanded.append(variants)
+        return expanded
+
+    def _matches(self, expanded):
+        """Dish ids matching each expanded query token"""
+        matches = []
+        for variants in expanded:
+            ids = set()
+            for term in variants:
+                ids.update(self._postings[term])
+            matches.append(ids)
+        return matches
+
+    def search(self, query, limit=None):
+        """
+        Rank dishes for a query.
+        All query tokens must match; if no dish has them all, queries of three
+        or more tokens fall back to dishes matching all but one.
+        Returns a list of (dish_id, score), best first.
+        """
+        tokens = tokenize(query)
+        if not tokens:
+            return []
+
+        with self._lock:
+            if not self._doc_terms:
+                return []
+            expanded = self._expand(tokens)
+            matches = self._matches(expanded)
+
+            if len(tokens) > 1 and not all(matches):
+                # Words split by the user ("cous cous") may be one indexed word
+                compact = self._expand([''.join(tokens)])
+                compact_matches = self._matches(compact)
+                if all(compact_matches):
+                    expanded, matches = compact, compact_matches
+
+            candidates = set.intersection(*matches)
+            if not candidates and len(matches) > 2:
+                # A longer query may carry one word no dish shares with the rest
+                hits = Counter(dish_id for ids in matches for dish_id in ids)
+                candidates = {dish_id for dish_id, count in hits.items() if count >= len(matches) - 1}
+
+            # Term-at-a-time BM25: idf is computed once per term, not per document
+            n_docs = len(self._doc_terms)
+            avg_len = self._total_len / n_docs
+            scores = dict.fromkeys(candidates, 0.0)
+            for variants in expanded:
+                for term, weight in variants.items():
+                    postings = self._postings[term]
+                    df = len(postings)
+                    idf = math.log(1 + (n_docs - df + 0.5) / (df + 0.5))
+                    for dish_id in candidates.intersection(postings):
+                        tf = postings[dish_id]
+                        norm = BM25_K1 * (1 - BM25_B + BM25_B * self._doc_len[dish_id] / avg_len)
+                        scores[dish_id] += weight * idf * tf * (BM25_K1 + 1) / (tf + norm)
+
+        if limit:
+            return heapq.nsmallest(limit, scores.items(), key=lambda item: (-item[1], item[0]))
+        return sorted(scores.items(), key=lambda item: (-item[1], item[0]))
+
+    def search_ids(self, query, limit=None):
+        """Ranked dish ids for a query"""
+        return [dish_id for dish_id, _ in self.search(query, limit)]
+
+
+# Shared index, kept in sync with the dish catalog
+dish_search = DishSearchIndex()
+dish_catalog.add_observer(dish_search)
@@ -0,0 +1,143 @@
+"""
+Event Hub
+=========
+In-process publish/subscribe by topic, used to push changes to streaming
+(SSE) clients. A topic's source - typically a Firestore listener - is
+attached when its first subscriber arrives and detached when the last one
+leaves, so N clients watching the same thing share one listener.
+"""
+
+import queue
+import threading
+from collections import OrderedDict
+
+# Events a slow subscriber may fall behind before it is dropped
+MAX_PENDING_EVENTS = 100
+# Dedupe keys remembered per topic
+RECENT_KEYS = 64
+
+# Returned by Subscription.get() once the subscription is closed
+CLOSED = object()
+
+
+class Subscription:
+    """One subscriber's queue of events for a topic"""
+
+    def __init__(self, hub, topic):
+        self.hub = hub
+        self.topic = topic
+        self.closed = False
+        self._queue = queue.Queue(maxsize=MAX_PENDING_EVENTS)
+
+    def get(self, timeout=None):
+        """Next event, None on timeout, or CLOSED once the subscription ended"""
+        if self.closed and self._queue.empty():
+            return CLOSED
+        try:
+            return self._queue.get(timeout=timeout)
+        except queue.Empty:
+            return CLOSED if self.closed else None
+
+    def close(self):
+        """Stop receiving events (idempotent)"""
+        self.hub._unsubscribe(self)
+
+    def _offer(self, event):
+        try:
+            self._queue.put_nowait(event)
+            return True
+        except queue.Full:
+            return False
+
+    def _end(self):
+        self.closed = True
+        # Wake a reader blocked in get()
+        try:
+            self._queue.put_nowait(CLOSED)
+        except queue.Full:
+            pass
+
+
+class EventHub:
+    """
+    Topic -> subscribers fan-out.
+
+    attach(topic, publish) is called for a topic's first subscriber and
+    returns a detach callable (or None); publish(event) feeds the topic.
+    """
+
+    def __init__(self, attach=None):
+        self._attach = attach
+        self._lock = threading.Lock()
+        self._subscribers = {}
+        self._detach = {}
+        self._recent_keys = {}
+
+    def subscribe(self, topic):
+        """Open a subscription, attaching the topic's source if needed"""
+        subscription = Subscription(self, topic)
+        with self._lock:
+            first = topic not in self._subscribers
+            self._subscribers.setdefault(topic, set()).add(subscription)
+        if first and self._attach is not None:
+            try:
+                detach = self._attach(topic, lambda event, key=None: self.publish(topic, event, key))
+            except Exception as e:
+                print(f"Failed to attach event source for {topic}: {e}")
+                detach = None
+            with self._lock:
+                if topic in self._subscribers:
+                    self._detach[topic] = detach
+                    detach = None
+            # Everyone left while attaching
+            if detach is not None:
+                detach()
+        return subscription
+
+    def publish(self, topic, event, key=None):
+        """
+        Deliver an event to the topic's subscribers; returns how many got it.
+        Events whose key was recently published on the topic are dropped, so
+        a change reported by two sources reaches clients once.
+        """
+        with self._lock:
+            subscribers = list(self._subscribers.get(topic, ()))
+            if not subscribers:
+                return 0
+            if key is not None:
+                recent = self._recent_keys.setdefault(topic, OrderedDict())
+                if key in recent:
+                    return 0
+                recent[key] = True
+                if len(recent) > RECENT_KEYS:
+                    recent.popitem(last=False)
+        delivered = 0
+        for subscription in subscribers:
+            if subscription._offer(event):
+                delivered += 1
+            else:
+                # Too far behind: end the stream, the client reconnects and resyncs
+                subscription.close()
+        return delivered
+
+    def subscriber_count(self, topic):
+        with self._lock:
+            return len(self._subscribers.get(topic, ()))
+
+    def _unsubscribe(self, subscription):
+        detach = None
+        with self._lock:
+            subscribers = self._subscribers.get(subscription.topic)
+            if subscribers is None or subscription not in subscribers:
+                return
+            subscribers.discard(subscription)
+            if not subscribers:
+                del self._subscribers[subscription.topic]
+                self._recent_keys.pop(subscription.topic, None)
+                detach = self._detach.pop(subscription.topic, None)
+        subscription._end()
+        if detach is not None:
+            try:
+                detach()
+            except Exception as e:
+                print(f"Failed to detach event source for {subscription.topic}: {e}")
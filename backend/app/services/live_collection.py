@@ -0,0 +1,187 @@
+"""
+Live Collection Mirror
+======================
+Base class for in-memory mirrors of a Firestore collection, kept fresh by an
+on_snapshot listener. Subclasses add their own indexes through the
+_clear_indexes / _index / _unindex hooks; secondary indexes in other modules
+follow changes as observers.
+"""
+
+import threading
+
+from app.services.firebase_service import get_db
+from app.utils.cache import SingleFlight
+
+# How long a request waits for the listener's first snapshot before
+# falling back to a one-off load of the collection
+READY_TIMEOUT = 3  # seconds
+
+# Fallback loads are shared: requests that time out together stream the
+# collection once instead of once each
+_fallback_loads = SingleFlight()
+
+
+class LiveCollection:
+    """Documents of one collection by id, updated from a snapshot listener"""
+
+    def __init__(self, collection):
+        self._collection = collection
+        self._lock = threading.RLock()
+        self._ready = threading.Event()
+        self._watch = None
+        self._docs = {}
+        self._observers = []
+
+    # ---------- listener ----------
+
+    def start(self):
+        """Attach the snapshot listener (no-op if already running)"""
+        with self._lock:
+            if self._watch is not None and getattr(self._watch, 'is_active', True):
+                return
+            db = get_db()
+            if not db:
+                return
+            self._watch = db.collection(self._collection).on_snapshot(self._on_snapshot)
+
+    def stop(self):
+        """Detach the snapshot listener"""
+        with self._lock:
+            if self._watch is not None:
+                self._watch.unsubscribe()
+                self._watch = None
+
+    def ensure_ready(self, timeout=READY_TIMEOUT):
+        """Make sure the mirror holds data before it is queried"""
+        self.start()
+        if self._ready.wait(timeout):
+            return
+        # Listener hasn't delivered yet - load once so this request can be served.
+        # The first snapshot replaces this state when it arrives.
+        _fallback_loads.do(self._collection, self._load_if_not_ready)
+
+    def is_ready(self):
+        """True once the mirror holds a full copy of the collection"""
+        return self._ready.is_set()
+
+    def load(self):
+        """Populate the mirror from a single stream of the collection"""
+        db = get_db()
+        if not db:
+            return
+        docs = db.collection(self._collection).stream()
+        with self._lock:
+            self._reset((doc.id, doc.to_dict()) for doc in docs)
+        self._ready.set()
+
+    def _load_if_not_ready(self):
+        if not self._ready.is_set():
+            self.load()
+
+    def _on_snapshot(self, docs, changes, read_time):
+        """Firestore listener callback (runs on the watch thread)"""
+        try:
+            with self._lock:
+                if not self._ready.is_set():
+                    # First snapshot carries the full collection
+                    self._reset((doc.id, doc.to_dict()) for doc in docs)
+                else:
+                    for change in changes:
+                        doc = change.document
+                        if change.type.name == 'REMOVED':
+                            self._remove(doc.id)
+                        else:
+                            self._upsert(doc.id, doc.to_dict())
+            self._ready.set()
+        except Exception as e:
+            print(f"{self._collection} snapshot error: {e}")
+
+    # ---------- observers ----------
+
+    def add_observer(self, observer):
+        """
+        Register a secondary index that follows changes.
+        Observers implement clear(), upsert(doc_id, doc) and remove(doc_id);
+        they are called under the mirror lock and must not call back into it.
+        """
+        with self._lock:
+            self._observers.append(observer)
+            observer.clear()
+            for doc_id, doc in self._docs.items():
+                observer.upsert(doc_id, doc)
+
+    # ---------- writes ----------
+
+    def upsert(self, doc_id, data):
+        """Insert or replace a document (used by write paths for read-your-writes)"""
+        with self._lock:
+            self._upsert(doc_id, data)
+
+    def update(self, doc_id, fields):
+        """Merge updated fields into a mirrored document"""
+        with self._lock:
+            current = self._docs.get(doc_id)
+            if current is None:
+                return
+            merged = dict(current)
+            merged.update(fields)
+            self._upsert(doc_id, merged)
+
+    def remove(self, doc_id):
+        """Drop a document from the mirror"""
+        with self._lock:
+            self._remove(doc_id)
+
+    def _reset(self, items):
+        for observer in self._observers:
+            observer.clear()
+        self._docs = {}
+        self._clear_indexes()
+        for doc_id, data in items:
+            self._upsert(doc_id, data)
+
+    def _upsert(self, doc_id, data):
+        self._remove(doc_id)
+        # Stored documents are replaced, never mutated, so observers may keep references
+        doc = dict(data or {})
+        doc['id'] = doc_id
+        self._docs[doc_id] = doc
+        self._index(doc_id, doc)
+        for observer in self._observers:
+            observer.upsert(doc_id, doc)
+
+    def _remove(self, doc_id):
+        doc = self._docs.pop(doc_id, None)
+        if doc is None:
+            return
+        self._unindex(doc_id, doc)
+        for observer in self._observers:
+            observer.remove(doc_id)
+
+    # ---------- index hooks ----------
+
+    def _clear_indexes(self):
+        pass
+
+    def _index(self, doc_id, doc):
+        pass
+
+    def _unindex(self, doc_id, doc):
+        pass
+
+    # ---------- reads ----------
+
+    def get(self, doc_id):
+        """Get a copy of a single document, or None"""
+        with self._lock:
+            doc = self._docs.get(doc_id)
+            return dict(doc) if doc is not None else None
+
+    def get_many(self, doc_ids):
+        """Get copies of the given documents in the same order, skipping unknown ids"""
+        with self._lock:
+            return [dict(self._docs[doc_id]) for doc_id in doc_ids if doc_id in self._docs]
+
+    def __len__(self):
+        with self._lock:
+            return len(self._docs)
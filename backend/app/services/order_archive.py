@@ -0,0 +1,177 @@
+"""
+Order Archive
+=============
+Moves cold orders (delivered or cancelled, untouched for N days) out of the
+hot `orders` collection into `orders_archive`, and keeps a local copy as
+gzip-compressed NDJSON partitions by month:
+
+    <out_dir>/orders/2026-03/part-<first order id>.ndjson.gz
+
+Cold orders are found by `updatedAt`, which is a Firestore timestamp on
+most orders and an ISO string on those finished through the older cooker
+routes; each kind gets its own pass. Orders are moved a page at a time:
+the page is written to its partition files first, then copied and deleted
+in one Firestore batch, then the checkpoint is saved. A run that stops part-way resumes after the last
+checkpoint with the same cutoff; re-running a page rewrites the same part
+files, so nothing is duplicated.
+"""
+
+import gzip
+import json
+import os
+from collections import defaultdict
+from datetime import datetime, timedelta
+
+from app.services.order_statuses import TERMINAL
+
+ARCHIVE_COLLECTION = 'orders_archive'
+ARCHIVABLE_STATUSES = sorted(TERMINAL)
+DEFAULT_AGE_DAYS = 90
+# Each order is one archive write and one delete; Firestore batches take 500 writes
+BATCH_SIZE = 200
+CHECKPOINT_FILE = 'checkpoint.json'
+# Orders written through the older cooker routes carry ISO-string timestamps,
+# so cold orders are found in two passes: timestamp updatedAt, then string
+PASSES = ('timestamp', 'string')
+
+
+def partition_key(order):
+    """Month partition of an order ('YYYY-MM'), by when it was placed"""
+    for field in ('createdAt', 'updatedAt'):
+        value = order.get(field)
+        if isinstance(value, str):
+            try:
+                value = datetime.fromisoformat(value)
+            except ValueError:
+                continue
+        if isinstance(value, datetime):
+            return value.strftime('%Y-%m')
+    return 'unknown'
+
+
+def to_json_line(order_id, order):
+    record = dict(order, id=order_id)
+    return json.dumps(record, ensure_ascii=False, sort_keys=True,
+                      default=lambda value: value.isoformat() if hasattr(value, 'isoformat') else str(value))
+
+
+class OrderArchiver:
+    """One archival run over the orders collection"""
+
+    def __init__(self, db, out_dir, age_days=DEFAULT_AGE_DAYS, batch_size=BATCH_SIZE, now=None):
+        self.db = db
+        self.out_dir = out_dir
+        self.age_days = age_days
+        self.batch_size = min(batch_size, BATCH_SIZE)
+        self.now = now or datetime.utcnow()
+
+    # ---------- checkpoint ----------
+
+    @property
+    def checkpoint_path(self):
+        return os.path.join(self.out_dir, CHECKPOINT_FILE)
+
+    def load_checkpoint(self):
+        """Saved state of an unfinished run, or None"""
+        try:
+            with open(self.checkpoint_path, encoding='utf-8') as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return None
+
+    def save_checkpoint(self, state):
+        tmp_path = self.checkpoint_path + '.tmp'
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(state, f)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, self.checkpoint_path)
+
+    # ---------- run ----------
+
+    def run(self, max_batches=None, log=print):
+        """Archive cold orders; returns how many were moved in this run"""
+        os.makedirs(self.out_dir, exist_ok=True)
+        state = self.load_checkpoint()
+        if state:
+            log(f"Resuming run with cutoff {state['cutoff']} ({state['archived']} archived so far)")
+            state.setdefault('pass', PASSES[0])
+        else:
+            state = {
+                'cutoff': (self.now - timedelta(days=self.age_days)).isoformat(),
+                'pass': PASSES[0],
+                'after': None,
+                'archived': 0,
+            }
+        cutoff = datetime.fromisoformat(state['cutoff'])
+
+        moved = 0
+        batches = 0
+        while max_batches is None or batches < max_batches:
+            docs = self.fetch_page(cutoff, state['after'], state['pass'])
+            if not docs:
+                if state['pass'] != PASSES[-1]:
+                    state['pass'] = PASSES[PASSES.index(state['pass']) + 1]
+                    state['after'] = None
+                    continue
+                # Finished: the next run starts over with a new cutoff
+                if os.path.exists(self.checkpoint_path):
+                    os.remove(self.checkpoint_path)
+                break
+            self.write_partitions(docs)
+            self.move(docs)
+
+            last = docs[-1]
+            updated = last.to_dict().get('updatedAt')
+            state['after'] = [updated.isoformat() if hasattr(updated, 'isoformat') else updated, last.id]
+            state['archived'] += len(docs)
+            self.save_checkpoint(state)
+
+            moved += len(docs)
+            batches += 1
+            log(f"Archived {len(docs)} orders ({state['archived']} total)")
+        return moved
+
+    def fetch_page(self, cutoff, after, kind=PASSES[0]):
+        """
+        Next page of cold orders, oldest first (served by the (status, updatedAt) index).
+        kind picks the orders whose updatedAt is a Firestore timestamp or an ISO
+        string: a range filter only matches values of its own type.
+        """
+        bound = cutoff if kind == 'timestamp' else cutoff.isoformat()
+        query = self.db.collection('orders')\
+            .where('status', 'in', ARCHIVABLE_STATUSES)\
+            .where('updatedAt', '<', bound)\
+            .order_by('updatedAt')\
+            .order_by('__name__')
+        if after:
+            last = datetime.fromisoformat(after[0]) if kind == 'timestamp' else after[0]
+            query = query.start_after({'updatedAt': last, '__name__': after[1]})
+        return list(query.limit(self.batch_size).stream())
+
+    def write_partitions(self, docs):
+        """Write a page to its month partitions (one part file per partition, named by the page)"""
+        lines = defaultdict(list)
+        for doc in docs:
+            order = doc.to_dict()
+            lines[partition_key(order)].append(to_json_line(doc.id, order))
+
+        part_name = f'part-{docs[0].id}.ndjson.gz'
+        for partition, partition_lines in lines.items():
+            directory = os.path.join(self.out_dir, 'orders', partition)
+            os.makedirs(directory, exist_ok=True)
+            path = os.path.join(directory, part_name)
+            tmp_path = path + '.tmp'
+            with gzip.open(tmp_path, 'wt', encoding='utf-8') as f:
+                f.write('\n'.join(partition_lines) + '\n')
+            os.replace(tmp_path, path)
+
+    def move(self, docs):
+        """Copy a page to the archive collection and delete it from orders, in one batch"""
+        batch = self.db.batch()
+        archived_at = datetime.utcnow()
+        for doc in docs:
+            batch.set(self.db.collection(ARCHIVE_COLLECTION).document(doc.id),
+                      dict(doc.to_dict(), archivedAt=archived_at))
+            batch.delete(doc.reference)
+        batch.commit()
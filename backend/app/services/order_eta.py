@@ -0,0 +1,196 @@
+"""
+Order ETA
+=========
+Delivery estimates from each chef's live kitchen queue. Every chef keeps
+two running totals of preparation minutes - enqueued and finished - and
+each queued order remembers the enqueued total when it joined, so the work
+still ahead of it is one subtraction. Status transitions move orders in and
+out of the queue; a listener on accepted/preparing orders (legacy names
+included) carries changes made by other workers. Estimates never query
+Firestore.
+"""
+
+import threading
+import time
+from collections import defaultdict
+from datetime import datetime, timedelta, timezone
+
+from app.services.firebase_service import get_db
+from app.services.order_statuses import aliases_of, normalize_status
+
+# Orders occupying a chef's kitchen, under the names they may be stored with
+# (older routes wrote 'confirmed' for accepted orders)
+QUEUE_STATUSES = ('accepted', 'preparing')
+STORED_QUEUE_STATUSES = list(QUEUE_STATUSES) + aliases_of(QUEUE_STATUSES)
+
+DEFAULT_PREP_MINUTES = 30
+DELIVERY_MINUTES = 20
+
+
+def prep_minutes(order):
+    """Preparation time of an order: its slowest dish (dishes are cooked side by side)"""
+    if order.get('prepMinutes'):
+        return float(order['prepMinutes'])
+    times = []
+    for item in order.get('items', []):
+        try:
+            times.append(float(item.get('preparationTime') or DEFAULT_PREP_MINUTES))
+        except (TypeError, ValueError):
+            times.append(DEFAULT_PREP_MINUTES)
+    return max(times) if times else DEFAULT_PREP_MINUTES
+
+
+def _scheduled_minutes(order):
+    """Minutes until a pre-order's delivery slot, or None"""
+    if not order.get('scheduledFor'):
+        return None
+    try:
+        when = datetime.fromisoformat(order['scheduledFor'])
+    except (TypeError, ValueError):
+        return None
+    if when.tzinfo is None:
+        return None
+    return (when - datetime.now(timezone.utc)).total_seconds() / 60
+
+
+class _ChefQueue:
+    """Running totals of one chef's kitchen work, in minutes"""
+
+    __slots__ = ('enqueued', 'finished', 'since', 'orders')
+
+    def __init__(self):
+        self.enqueued = 0.0
+        self.finished = 0.0
+        self.since = 0.0  # when the kitchen started on the current backlog
+        self.orders = {}  # order id -> (enqueued total once it is done, its prep minutes)
+
+    def backlog(self):
+        return self.enqueued - self.finished
+
+
+class KitchenLoad:
+    """Per-chef queues of accepted and preparing orders"""
+
+    def __init__(self, clock=time.time):
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._queues = defaultdict(_ChefQueue)
+        self._watch = None
+
+    # ---------- listener ----------
+
+    def start(self):
+        """Attach the queue listener (no-op if already running)"""
+        with self._lock:
+            if self._watch is not None and getattr(self._watch, 'is_active', True):
+                return
+            db = get_db()
+            if not db:
+                return
+            query = db.collection('orders').where('status', 'in', STORED_QUEUE_STATUSES)
+            self._watch = query.on_snapshot(self._on_snapshot)
+
+    def stop(self):
+        with self._lock:
+            if self._watch is not None:
+                self._watch.unsubscribe()
+                self._watch = None
+
+    def _on_snapshot(self, docs, changes, read_time):
+        """Firestore listener callback: orders entering or leaving the kitchen"""
+        try:
+            for change in changes:
+                doc = change.document
+                if change.type.name == 'REMOVED':
+                    self.dequeue(doc.id, (doc.to_dict() or {}).get('chefId'))
+                else:
+                    self.track(doc.id, doc.to_dict())
+        except Exception as e:
+            print(f"kitchen queue snapshot error: {e}")
+
+    # ---------- updates ----------
+
+    def track(self, order_id, order):
+        """Follow an order's status (idempotent; call after every transition)"""
+        chef_id = order.get('chefId')
+        if not chef_id:
+            return
+        status = normalize_status(order.get('status'))
+        # Accepted pre-orders only take kitchen time once the chef starts them
+        if status in QUEUE_STATUSES and not (status == 'accepted' and order.get('scheduledFor')):
+            self._enqueue(chef_id, order_id, prep_minutes(order))
+        else:
+            self.dequeue(order_id, chef_id)
+
+    def _enqueue(self, chef_id, order_id, prep):
+        with self._lock:
+            queue = self._queues[chef_id]
+            if order_id in queue.orders:
+                return
+            if queue.backlog() <= 0:
+                queue.since = self._clock()
+            queue.enqueued += prep
+            queue.orders[order_id] = (queue.enqueued, prep)
+
+    def dequeue(self, order_id, chef_id):
+        """An order left the kitchen (ready, cancelled, ...): its minutes are done"""
+        with self._lock:
+            queue = self._queues.get(chef_id)
+            if queue is None or order_id not in queue.orders:
+                return
+            _, prep = queue.orders.pop(order_id)
+            queue.finished += prep
+            queue.since = self._clock()
+            if not queue.orders:
+                del self._queues[chef_id]
+
+    # ---------- estimates ----------
+
+    def _worked(self, queue):
+        """Minutes cooked on the backlog since the last order left the kitchen"""
+        return min(max(self._clock() - queue.since, 0) / 60, queue.backlog())
+
+    def backlog_minutes(self, chef_id):
+        """Kitchen minutes still ahead of a newly accepted order"""
+        with self._lock:
+            queue = self._queues.get(chef_id)
+            if queue is None:
+                return 0.0
+            return queue.backlog() - self._worked(queue)
+
+    def eta_minutes(self, order_id, order):
+        """Minutes until delivery, or None for delivered and cancelled orders"""
+        status = normalize_status(order.get('status'))
+        if status in ('ready', 'on_the_way'):
+            return DELIVERY_MINUTES
+        if status in QUEUE_STATUSES:
+            with self._lock:
+                queue = self._queues.get(order.get('chefId'))
+                entry = queue.orders.get(order_id) if queue else None
+                if entry is not None:
+                    remaining = entry[0] - queue.finished - self._worked(queue)
+                    # Never report an order as done while it is still in the kitchen
+                    return max(remaining, 1) + DELIVERY_MINUTES
+            return prep_minutes(order) + DELIVERY_MINUTES
+        if status == 'pending':
+            return self.backlog_minutes(order.get('chefId')) + prep_minutes(order) + DELIVERY_MINUTES
+        return None
+
+    def eta(self, order_id, order):
+        """{'etaMinutes', 'estimatedDeliveryAt'} for an order, or None"""
+        self.start()
+        minutes = self.eta_minutes(order_id, order)
+        if minutes is None:
+            return None
+        scheduled = _scheduled_minutes(order)
+        if scheduled is not None:
+            # Pre-orders arrive in their slot unless the kitchen runs later than that
+            minutes = max(minutes, scheduled)
+        minutes = int(round(minutes))
+        return {
+            'etaMinutes': minutes,
+            'estimatedDeliveryAt': (datetime.utcnow() + timedelta(minutes=minutes)).isoformat(),
+        }
+
+
+kitchen_load = KitchenLoad()
@@ -0,0 +1,120 @@
+"""
+Order Events
+============
+Status-change events for order tracking streams and chef order queues.
+Each watched order (or chef) has a single Firestore listener shared by all
+of its subscribers; orders created or transitioned by this process are also
+published directly so local clients don't wait for the listener round trip.
+"""
+
+from datetime import datetime, timedelta
+
+from app.services.event_hub import EventHub
+from app.services.firebase_service import get_db
+
+# A chef listener also replays orders changed this long before it attached,
+# covering changes made while the client was (re)connecting
+CHEF_LOOKBACK = timedelta(minutes=2)
+
+
+def order_topic(order_id):
+    return f'order:{order_id}'
+
+
+def order_event(order_id, order):
+    """The public part of an order that tracking clients receive"""
+    updated = order.get('updatedAt')
+    return {
+        'orderId': order_id,
+        'status': order.get('status'),
+        'chefStatus': order.get('chefStatus'),
+        'updatedAt': updated.isoformat() if hasattr(updated, 'isoformat') else updated,
+    }
+
+
+def _attach_order_listener(topic, publish):
+    """Listen to one order document; returns the listener's unsubscribe"""
+    db = get_db()
+    if not db:
+        return None
+    order_id = topic.split(':', 1)[1]
+
+    def on_snapshot(docs, changes, read_time):
+        for doc in docs:
+            if doc.exists:
+                order = doc.to_dict()
+                publish(order_event(order_id, order), key=order.get('status'))
+
+    watch = db.collection('orders').document(order_id).on_snapshot(on_snapshot)
+    return watch.unsubscribe
+
+
+order_hub = EventHub(attach=_attach_order_listener)
+
+
+def subscribe_order(order_id):
+    return order_hub.subscribe(order_topic(order_id))
+
+
+def chef_topic(chef_id):
+    return f'chef:{chef_id}'
+
+
+def chef_event(order_id, order):
+    """Queue event for a chef: new, cancelled or changed order, with the order itself"""
+    status = order.get('status')
+    data = dict(order, id=order_id)
+    for field in ('createdAt', 'updatedAt'):
+        if hasattr(data.get(field), 'isoformat'):
+            data[field] = data[field].isoformat()
+    kind = {'pending': 'new', 'cancelled': 'cancelled'}.get(status, 'changed')
+    return {'type': kind, 'orderId': order_id, 'status': status, 'order': data}
+
+
+def _attach_chef_listener(topic, publish):
+    """Listen to a chef's recently changed orders; returns the listener's unsubscribe"""
+    db = get_db()
+    if not db:
+        return None
+    chef_id = topic.split(':', 1)[1]
+
+    def on_snapshot(docs, changes, read_time):
+        for change in changes:
+            if change.type.name == 'REMOVED':
+                continue
+            order = change.document.to_dict()
+            publish(chef_event(change.document.id, order), key=(change.document.id, order.get('status')))
+
+    # Served by the (chefId, updatedAt) index; reads only recent changes, not the chef's history.
+    # A range filter only matches values of its own type, and older orders (and the seed data)
+    # store updatedAt as an ISO string, so those get a listener of their own.
+    since = datetime.utcnow() - CHEF_LOOKBACK
+    orders = db.collection('orders').where('chefId', '==', chef_id)
+    watches = [orders.where('updatedAt', '>=', bound).on_snapshot(on_snapshot)
+               for bound in (since, since.isoformat())]
+
+    def unsubscribe():
+        for watch in watches:
+            watch.unsubscribe()
+
+    return unsubscribe
+
+
+chef_hub = EventHub(attach=_attach_chef_listener)
+
+
+def subscribe_chef(chef_id):
+    return chef_hub.subscribe(chef_topic(chef_id))
+
+
+def publish_order(order_id, order):
+    """
+    Push an order's new status to its trackers and to its chef's queue
+    (no-op for whoever is not watching)
+    """
+    delivered = order_hub.publish(order_topic(order_id), order_event(order_id, order), key=order.get('status'))
+    chef_id = order.get('chefId')
+    if chef_id:
+        delivered += chef_hub.publish(chef_topic(chef_id), chef_event(order_id, order),
+                                      key=(order_id, order.get('status')))
+    return delivered
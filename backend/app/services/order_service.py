@@ -0,0 +1,308 @@
+"""
+Order Service
+=============
+Order creation with server-side pricing. Every dish referenced by the cart
+is read in one batched get_all() inside a transaction, prices and
+availability are checked against those reads, and the order is written in
+the same transaction - one read round trip however many items there are.
+
+A cart is split into one sub-order per chef in `orders` (with a top-level
+`chefId`, so chef queries are a single equality filter) under a parent
+document in `order_groups` holding the cart-level totals.
+
+With `scheduledFor`, every chef's sub-order also books a place in that
+delivery slot (see app.services.order_slots) within the same transaction.
+
+checkout_cart() orders the user's stored cart the same way, reading and
+deleting `carts/{uid}` inside that transaction. Cart lines whose dish was
+repriced since they were added are updated to the current price instead,
+and the checkout fails with those prices so the user can confirm them.
+"""
+
+from datetime import datetime
+from firebase_admin import firestore
+
+from app.services import cart_store, order_slots
+from app.services.cooker_registry import cooker_registry
+from app.services.order_eta import DEFAULT_PREP_MINUTES, prep_minutes
+from app.services.order_statuses import PENDING
+
+DELIVERY_FEE = 3.0  # TND - could be dynamic based on distance
+
+# Client prices within this much of the stored price are accepted (float noise)
+PRICE_TOLERANCE = 0.001
+
+
+class InvalidOrderError(ValueError):
+    """The order request is malformed (bad items, delivery slot or an empty cart)"""
+
+
+class OrderConflictError(Exception):
+    """The order transaction kept colliding with other writes (e.g. a busy delivery slot)"""
+
+
+class StaleCartError(Exception):
+    """The cart no longer matches the stored dishes (deleted, unavailable or repriced)"""
+
+    def __init__(self, problems):
+        super().__init__('Cart is out of date')
+        self.problems = problems
+
+
+class SlotFullError(Exception):
+    """The requested delivery slot has no room left with some of the cart's chefs"""
+
+    def __init__(self, chef_ids):
+        super().__init__('Delivery slot is full')
+        self.chef_ids = chef_ids
+
+
+class ChefClosedError(Exception):
+    """Some of the cart's chefs are closed at the requested delivery slot"""
+
+    def __init__(self, chef_ids):
+        super().__init__('Chef is closed at that time')
+        self.chef_ids = chef_ids
+
+
+def _parse_slot(data):
+    """Slot key of a pre-order, or None; loads opening hours for the closed-chef check"""
+    if not data.get('scheduledFor'):
+        return None
+    try:
+        slot = order_slots.parse_slot(data['scheduledFor'])
+    except ValueError as e:
+        raise InvalidOrderError(str(e))
+    cooker_registry.ensure_ready()
+    return slot
+
+
+def _commit(transaction_fn, transaction):
+    """
+    Run a @firestore.transactional function. The wrapper gives up with a
+    ValueError once its commit retries run out; that is OrderConflictError.
+    """
+    try:
+        return transaction_fn(transaction)
+    except InvalidOrderError:
+        raise
+    except ValueError as e:
+        if 'Failed to commit transaction' not in str(e):
+            raise
+        raise OrderConflictError('Too many orders at once, please retry') from e
+
+
+def parse_items(items):
+    """
+    Validate cart lines: [{dishId, quantity, price?}, ...] -> [(dish_id, quantity, item)].
+    Raises InvalidOrderError for malformed lines.
+    """
+    if not isinstance(items, list) or not items:
+        raise InvalidOrderError('Order must have at least one item')
+    parsed = []
+    for item in items:
+        if not isinstance(item, dict) or not item.get('dishId'):
+            raise InvalidOrderError('Each item needs a dishId')
+        try:
+            quantity = int(item.get('quantity', 1))
+        except (TypeError, ValueError):
+            raise InvalidOrderError(f"Invalid quantity for {item['dishId']}")
+        if quantity < 1:
+            raise InvalidOrderError(f"Invalid quantity for {item['dishId']}")
+        parsed.append((str(item['dishId']), quantity, item))
+    return parsed
+
+
+def price_items(parsed_items, dishes):
+    """
+    Price cart lines from stored dishes.
+    dishes: dish_id -> dish dict (missing ids were not found).
+    Returns (order items, subtotal); raises StaleCartError listing every problem.
+    """
+    problems = []
+    order_items = []
+    subtotal = 0.0
+
+    for dish_id, quantity, item in parsed_items:
+        dish = dishes.get(dish_id)
+        if dish is None:
+            problems.append({'dishId': dish_id, 'reason': 'not_found'})
+            continue
+        if dish.get('isAvailable') is not True:
+            problems.append({'dishId': dish_id, 'reason': 'unavailable'})
+            continue
+
+        price = float(dish.get('price', 0))
+        client_price = item.get('price')
+        if client_price is not None:
+            try:
+                repriced = abs(float(client_price) - price) > PRICE_TOLERANCE
+            except (TypeError, ValueError):
+                repriced = True
+            if repriced:
+                problems.append({'dishId': dish_id, 'reason': 'price_changed', 'currentPrice': price})
+                continue
+
+        order_items.append({
+            'dishId': dish_id,
+            'dishName': dish.get('name', item.get('dishName', '')),
+            'quantity': quantity,
+            'price': price,
+            'cookerId': dish.get('cookerId', ''),
+            'cookerName': dish.get('cookerName', item.get('cookerName', '')),
+            'image': dish.get('image', ''),
+            'preparationTime': dish.get('preparationTime', DEFAULT_PREP_MINUTES),
+        })
+        subtotal += price * quantity
+
+    if problems:
+        raise StaleCartError(problems)
+    return order_items, subtotal
+
+
+def split_by_chef(order_items):
+    """Group priced items by chef, in cart order: [(chef_id, items), ...]"""
+    groups = {}
+    for item in order_items:
+        groups.setdefault(item['cookerId'], []).append(item)
+    return list(groups.items())
+
+
+def _read_dishes(db, transaction, parsed_items):
+    """One batched read for every dish in the cart: dish_id -> dish"""
+    dish_refs = [db.collection('dishes').document(dish_id)
+                 for dish_id in dict.fromkeys(dish_id for dish_id, _, _ in parsed_items)]
+    dishes = {}
+    for snapshot in db.get_all(dish_refs, transaction=transaction):
+        if snapshot.exists:
+            dishes[snapshot.id] = snapshot.to_dict()
+    return dishes
+
+
+def _write_orders(db, transaction, user, data, parsed_items, dishes, slot, group_ref):
+    """Write phase of an order: price the items, book the slot, write sub-orders and group"""
+    order_items, subtotal = price_items(parsed_items, dishes)
+    chef_items = split_by_chef(order_items)
+
+    scheduled = {}
+    if slot:
+        chef_ids = [chef_id for chef_id, _ in chef_items]
+        # A slot is only bookable while every chef is open, as in GET /cookers/<id>/slots
+        closed = order_slots.closed_chefs(chef_ids, slot)
+        if closed:
+            raise ChefClosedError(closed)
+        refs = order_slots.slot_refs(db, chef_ids)
+        full = order_slots.reserve(transaction, refs, db.get_all(refs, transaction=transaction), slot)
+        if full:
+            raise SlotFullError(full)
+        scheduled = {'scheduledFor': order_slots.slot_start(slot).isoformat(), 'slot': slot}
+
+    now = datetime.utcnow()
+    common = {
+        'userId': user.get('uid'),
+        'userEmail': user.get('email'),
+        'deliveryAddress': data['deliveryAddress'],
+        'deliveryNotes': data.get('deliveryNotes', ''),
+        'paymentMethod': data.get('paymentMethod', 'cash'),
+        'createdAt': now,
+        'updatedAt': now,
+        **scheduled
+    }
+
+    orders = []
+    for index, (chef_id, items) in enumerate(chef_items):
+        chef_subtotal = sum(item['price'] * item['quantity'] for item in items)
+        # The delivery fee is charged once per cart, on the first sub-order
+        delivery_fee = DELIVERY_FEE if index == 0 else 0.0
+        order = dict(common,
+                     groupId=group_ref.id,
+                     chefId=chef_id,
+                     cookerId=chef_id,
+                     cookerName=items[0].get('cookerName', ''),
+                     items=items,
+                     subtotal=chef_subtotal,
+                     deliveryFee=delivery_fee,
+                     total=chef_subtotal + delivery_fee,
+                     prepMinutes=prep_minutes({'items': items}),
+                     status=PENDING,  # see app.services.order_state for the lifecycle
+                     chefStatus=PENDING)
+        order_ref = db.collection('orders').document()
+        transaction.set(order_ref, order)
+        orders.append((order_ref.id, order))
+
+    group = dict(common,
+                 orderIds=[order_id for order_id, _ in orders],
+                 chefIds=[order['chefId'] for _, order in orders],
+                 subtotal=subtotal,
+                 deliveryFee=DELIVERY_FEE,
+                 total=subtotal + DELIVERY_FEE)
+    transaction.set(group_ref, group)
+    return group, orders
+
+
+def create_order(db, user, data):
+    """
+    Verify the cart against stored dishes and write one sub-order per chef
+    plus their parent group in one transaction.
+    Returns (group_id, group, [(order_id, order), ...]). Raises InvalidOrderError
+    for malformed input, StaleCartError when the cart no longer matches the dishes,
+    ChefClosedError when a chef is closed at the scheduled slot, SlotFullError
+    when that slot is taken and OrderConflictError when the transaction could not
+    commit.
+    """
+    parsed_items = parse_items(data.get('items'))
+    slot = _parse_slot(data)
+    group_ref = db.collection('order_groups').document()
+
+    @firestore.transactional
+    def create_in_transaction(transaction):
+        dishes = _read_dishes(db, transaction, parsed_items)
+        return _write_orders(db, transaction, user, data, parsed_items, dishes, slot, group_ref)
+
+    group, orders = _commit(create_in_transaction, db.transaction())
+    return group_ref.id, group, orders
+
+
+def checkout_cart(db, user, data):
+    """
+    Order the user's stored cart: read `carts/{uid}` and its dishes, write
+    the orders and delete the cart, all in one transaction. data carries the
+    delivery fields of create_order (no items). Same return value and errors
+    as create_order; InvalidOrderError('Cart is empty') when there is nothing to order.
+    On StaleCartError the repriced lines have been updated to currentPrice, so
+    checking out again orders at the prices in the error.
+    """
+    slot = _parse_slot(data)
+    cart_ref = db.collection(cart_store.CARTS_COLLECTION).document(user.get('uid'))
+    group_ref = db.collection('order_groups').document()
+
+    @firestore.transactional
+    def checkout_in_transaction(transaction):
+        snapshot = cart_ref.get(transaction=transaction)
+        lines = cart_store.cart_items(snapshot.to_dict() if snapshot.exists else None)
+        if not lines:
+            raise InvalidOrderError('Cart is empty')
+        # The prices the user saw are checked like a client-sent cart
+        parsed_items = parse_items([
+            {'dishId': line['dishId'], 'quantity': line['quantity'], 'price': line.get('price')}
+            for line in lines
+        ])
+        dishes = _read_dishes(db, transaction, parsed_items)
+        try:
+            group, orders = _write_orders(db, transaction, user, data, parsed_items, dishes, slot, group_ref)
+        except StaleCartError as e:
+            # Committed with the error raised afterwards: the cart now holds the
+            # prices the user is shown, and a repeated checkout orders at them
+            repriced = {problem['dishId']: {'price': problem['currentPrice']}
+                        for problem in e.problems if problem['reason'] == 'price_changed'}
+            if repriced:
+                transaction.set(cart_ref, {'items': repriced}, merge=True)
+            return e
+        transaction.delete(cart_ref)
+        return group, orders
+
+    result = _commit(checkout_in_transaction, db.transaction())
+    if isinstance(result, StaleCartError):
+        raise result
+    group, orders = result
+    return group_ref.id, group, orders
@@ -0,0 +1,138 @@
+"""
+Order Slots
+===========
+Scheduled (pre-)orders with per-chef delivery slot capacity. Each chef has
+one compact `chef_slots/{chefId}` document holding its slot capacity and a
+map of booked counts by slot start, so a 7-day availability lookup is a
+single document read and a reservation is a transaction on that document.
+"""
+
+from datetime import datetime, timedelta
+
+from app.services.cooker_hours import LOCAL_TZ, cooker_hours, local_now
+
+SLOTS_COLLECTION = 'chef_slots'
+SLOT_MINUTES = 30
+SLOT_DAYS = 7
+# Orders a chef takes per slot unless they set their own capacity
+DEFAULT_SLOT_CAPACITY = 5
+MAX_SLOT_CAPACITY = 50
+# Earliest slot that can be booked, from now
+MIN_LEAD_MINUTES = 60
+
+SLOT_KEY_FORMAT = '%Y-%m-%dT%H:%M'
+
+
+def slot_key(when):
+    """Map key of a slot: its local (Tunis) start time"""
+    return when.astimezone(LOCAL_TZ).strftime(SLOT_KEY_FORMAT)
+
+
+def slot_start(key):
+    return datetime.strptime(key, SLOT_KEY_FORMAT).replace(tzinfo=LOCAL_TZ)
+
+
+def _first_slot(now):
+    earliest = now + timedelta(minutes=MIN_LEAD_MINUTES)
+    start = earliest.replace(second=0, microsecond=0)
+    overshoot = (start.hour * 60 + start.minute) % SLOT_MINUTES
+    if overshoot or earliest > start:
+        start += timedelta(minutes=SLOT_MINUTES - overshoot)
+    return start
+
+
+def parse_slot(value, now=None):
+    """
+    Validate a requested delivery time (ISO 8601, naive values are Tunis time).
+    Returns the slot key. Raises ValueError unless it is a slot start within
+    the bookable window.
+    """
+    try:
+        when = datetime.fromisoformat(str(value))
+    except ValueError:
+        raise ValueError('scheduledFor must be an ISO 8601 date-time')
+    if when.tzinfo is None:
+        when = when.replace(tzinfo=LOCAL_TZ)
+    when = when.astimezone(LOCAL_TZ)
+    if when.second or when.microsecond or (when.hour * 60 + when.minute) % SLOT_MINUTES:
+        raise ValueError(f'scheduledFor must start a {SLOT_MINUTES}-minute slot')
+    now = now or local_now()
+    if when < _first_slot(now) or when > now + timedelta(days=SLOT_DAYS):
+        raise ValueError(f'scheduledFor must be between {MIN_LEAD_MINUTES} minutes and {SLOT_DAYS} days ahead')
+    return slot_key(when)
+
+
+def capacity_of(slots):
+    capacity = slots.get('capacity')
+    return DEFAULT_SLOT_CAPACITY if capacity is None else int(capacity)
+
+
+def prune(booked, now):
+    """Drop past slots from a booked map"""
+    current = slot_key(now.replace(second=0, microsecond=0) - timedelta(minutes=SLOT_MINUTES))
+    return {key: count for key, count in booked.items() if key >= current and count > 0}
+
+
+def availability(chef_id, slots, now=None):
+    """
+    Bookable slots of a chef over the next SLOT_DAYS days:
+    [{'slot': ISO start, 'remaining': n}, ...] for slots the chef is open and not full.
+    slots is the chef's slot document (or {}).
+    """
+    now = now or local_now()
+    capacity = capacity_of(slots)
+    booked = slots.get('booked', {})
+    result = []
+    when = _first_slot(now)
+    end = now + timedelta(days=SLOT_DAYS)
+    while when <= end:
+        key = slot_key(when)
+        remaining = capacity - booked.get(key, 0)
+        if remaining > 0 and chef_id in cooker_hours.open_at(when):
+            result.append({'slot': when.isoformat(), 'remaining': remaining})
+        when += timedelta(minutes=SLOT_MINUTES)
+    return result
+
+
+def closed_chefs(chef_ids, key):
+    """Chefs of chef_ids not open at the start of slot key (the cooker registry must be loaded)"""
+    open_ids = cooker_hours.open_at(slot_start(key))
+    return [chef_id for chef_id in chef_ids if chef_id not in open_ids]
+
+
+def slot_refs(db, chef_ids):
+    return [db.collection(SLOTS_COLLECTION).document(chef_id) for chef_id in chef_ids]
+
+
+def reserve(transaction, refs, snapshots, key, now=None):
+    """
+    Write phase of booking one place in slot key for each chef.
+    snapshots are the chef slot documents read in the same transaction.
+    Returns the chef ids whose slot is full (nothing is written then).
+    """
+    now = now or local_now()
+    docs = {snapshot.id: (snapshot.to_dict() or {}) if snapshot.exists else {} for snapshot in snapshots}
+    full = [ref.id for ref in refs
+            if docs.get(ref.id, {}).get('booked', {}).get(key, 0) >= capacity_of(docs.get(ref.id, {}))]
+    if full:
+        return full
+    for ref in refs:
+        slots = docs.get(ref.id, {})
+        booked = prune(slots.get('booked', {}), now)
+        booked[key] = booked.get(key, 0) + 1
+        transaction.set(ref, dict(slots, booked=booked, updatedAt=datetime.utcnow()))
+    return []
+
+
+def release(transaction, ref, snapshot, key):
+    """Write phase of giving back one place in a slot (cancelled pre-order)"""
+    if not snapshot.exists:
+        return
+    slots = snapshot.to_dict() or {}
+    booked = dict(slots.get('booked', {}))
+    if booked.get(key, 0) <= 0:
+        return
+    booked[key] -= 1
+    if not booked[key]:
+        del booked[key]
+    transaction.set(ref, dict(slots, booked=booked, updatedAt=datetime.utcnow()))
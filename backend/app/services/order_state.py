@@ -0,0 +1,317 @@
+"""
+Order State Machine
+===================
+One status vocabulary and one transition path for orders. Customer, chef
+and admin status changes all go through transition(), which reads the
+order and writes the new status in a single transaction with an
+update-time precondition (run again from the read if it fails), then
+emits the status-change event once.
+"""
+
+import threading
+from collections import defaultdict
+from datetime import datetime
+from firebase_admin import firestore
+from google.api_core.exceptions import FailedPrecondition
+
+from app.services import order_events, order_slots
+from app.services.order_statuses import (
+    PENDING, ACCEPTED, PREPARING, READY, ON_THE_WAY, DELIVERED, CANCELLED,
+    FLOW, STATUSES, TERMINAL, ACTIVE, CHEF_TARGETS, STATUS_ALIASES, aliases_of, normalize_status,
+)
+from app.services.order_eta import kitchen_load
+from app.services.auto_notifications import handle_order_status_change
+
+# chefStatus is still written for chef dashboards that filter on it
+CHEF_STATUS = {
+    PENDING: 'pending',
+    ACCEPTED: 'accepted',
+    PREPARING: 'preparing',
+    READY: 'ready',
+    ON_THE_WAY: 'out_for_delivery',
+    DELIVERED: 'completed',
+    CANCELLED: 'cancelled',
+}
+
+TIMESTAMP_FIELDS = {
+    ACCEPTED: 'acceptedAt',
+    PREPARING: 'preparingAt',
+    READY: 'readyAt',
+    ON_THE_WAY: 'onTheWayAt',
+    DELIVERED: 'deliveredAt',
+    CANCELLED: 'cancelledAt',
+}
+
+# Orders one bulk transition may touch (each writes up to a few documents)
+MAX_BULK_ORDERS = 50
+# Runs of a transition whose update-time precondition keeps failing
+PRECONDITION_ATTEMPTS = 3
+
+ROLE_CUSTOMER = 'customer'
+ROLE_CHEF = 'chef'
+ROLE_ADMIN = 'admin'
+
+# Statuses each role may cancel from
+CANCELLABLE_FROM = {
+    ROLE_CUSTOMER: {PENDING},
+    ROLE_CHEF: {PENDING, ACCEPTED, PREPARING, READY},
+    ROLE_ADMIN: set(FLOW) - TERMINAL,
+}
+
+
+class TransitionError(Exception):
+    """A status change that is not allowed (message and HTTP status for the route)"""
+
+    def __init__(self, message, status_code=409):
+        super().__init__(message)
+        self.message = message
+        self.status_code = status_code
+
+
+def order_chef_ids(order):
+    """Chefs involved in an order (order-level and per-item cooker ids)"""
+    chef_ids = {item.get('cookerId') for item in order.get('items', []) if item.get('cookerId')}
+    for field in ('chefId', 'cookerId'):
+        if order.get(field):
+            chef_ids.add(order[field])
+    return chef_ids
+
+
+def actor_role(order, uid):
+    """Role of a user on an order, or None if they are not part of it"""
+    if uid in order_chef_ids(order):
+        return ROLE_CHEF
+    if uid and uid == order.get('userId'):
+        return ROLE_CUSTOMER
+    return None
+
+
+def check_transition(current, target, role):
+    """Raise TransitionError unless role may move an order from current to target"""
+    if current in TERMINAL:
+        raise TransitionError(f'Order is already {current}')
+    if target == CANCELLED:
+        if current not in CANCELLABLE_FROM[role]:
+            if role == ROLE_CUSTOMER:
+                raise TransitionError('Only pending orders can be cancelled')
+            raise TransitionError(f'Order can no longer be cancelled ({current})')
+        return
+    if role == ROLE_CUSTOMER:
+        raise TransitionError('Unauthorized', 403)
+    if current not in FLOW or FLOW.index(target) <= FLOW.index(current):
+        raise TransitionError(f'Cannot change status from {current} to {target}')
+
+
+def chef_amounts(order):
+    """Order subtotal split per chef, from the order items"""
+    amounts = defaultdict(float)
+    for item in order.get('items', []):
+        if item.get('cookerId'):
+            amounts[item['cookerId']] += float(item.get('price', 0)) * int(item.get('quantity', 1))
+    if not amounts:
+        chef_id = order.get('chefId') or order.get('cookerId')
+        if chef_id:
+            amounts[chef_id] = float(order.get('subtotal', 0))
+    return amounts
+
+
+def _read_delivery_refs(db, transaction, orders):
+    """
+    Read phase of delivering orders: per-chef earnings, per-chef and per-dish
+    order counts, and the refs of the cooker/dish documents that exist.
+    """
+    earnings = defaultdict(float)
+    chef_orders = defaultdict(int)
+    dish_orders = defaultdict(int)
+    for order in orders:
+        for chef_id, amount in chef_amounts(order).items():
+            earnings[chef_id] += amount
+            chef_orders[chef_id] += 1
+        for dish_id in {item.get('dishId') for item in order.get('items', []) if item.get('dishId')}:
+            dish_orders[dish_id] += 1
+    if not earnings and not dish_orders:
+        return [], (earnings, chef_orders, dish_orders)
+    refs = [db.collection('cookers').document(chef_id) for chef_id in earnings]
+    refs += [db.collection('dishes').document(dish_id) for dish_id in dish_orders]
+    existing = [snap.reference for snap in db.get_all(refs, transaction=transaction) if snap.exists]
+    return existing, (earnings, chef_orders, dish_orders)
+
+
+def _write_delivery(transaction, refs, counts):
+    """Write phase of delivering orders: credit chefs and bump dish popularity"""
+    earnings, chef_orders, dish_orders = counts
+    for ref in refs:
+        if ref.parent.id == 'cookers':
+            transaction.update(ref, {
+                'totalEarnings': firestore.Increment(earnings[ref.id]),
+                'totalOrders': firestore.Increment(chef_orders[ref.id]),
+            })
+        else:
+            # The catalog listener carries new counts into the popular-dishes leaderboard
+            transaction.update(ref, {'ordersCount': firestore.Increment(dish_orders[ref.id])})
+
+
+def _status_update(target, extra_fields):
+    now = datetime.utcnow()
+    update = {
+        'status': target,
+        'chefStatus': CHEF_STATUS[target],
+        'updatedAt': now,
+        TIMESTAMP_FIELDS[target]: now,
+    }
+    update.update(extra_fields or {})
+    return update
+
+
+def _after_commit(order_id, old_status, target, order, notify=True):
+    """Local listeners (ETA, event streams) and the status-change notification"""
+    kitchen_load.track(order_id, order)
+    order_events.publish_order(order_id, order)
+    if notify:
+        _notify(order_id, old_status, target, order)
+
+
+def _notify(order_id, old_status, target, order):
+    try:
+        handle_order_status_change(order_id, old_status, target, order)
+    except Exception as e:
+        print(f"Failed to send status change notification: {e}")
+
+
+def _run_transaction(db, transaction_fn):
+    """
+    Run a transaction function, again from its reads if an update-time
+    precondition failed (the transaction wrapper does not retry those).
+    Raises TransitionError (409) once PRECONDITION_ATTEMPTS runs have failed.
+    """
+    for _ in range(PRECONDITION_ATTEMPTS):
+        try:
+            return transaction_fn(db.transaction())
+        except FailedPrecondition:
+            continue
+    raise TransitionError('Order was changed by another request, please retry')
+
+
+def _run_in_background(fn):
+    threading.Thread(target=fn, daemon=True).start()
+
+
+def transition(db, order_id, target, authorize, extra_fields=None):
+    """
+    Move an order to target status.
+
+    authorize(order) returns the caller's role on the order (ROLE_*) or None.
+    It runs inside the transaction, once per attempt, so it must not read
+    Firestore: resolve anything it needs (e.g. the admin flag) beforehand.
+    extra_fields are written with the status (e.g. cancelledBy, rejectionReason).
+    Returns (order, old_status, changed); changed is False when the order was
+    already in target status. Raises TransitionError.
+    """
+    order_ref = db.collection('orders').document(order_id)
+
+    @firestore.transactional
+    def transition_in_transaction(transaction):
+        snapshot = order_ref.get(transaction=transaction)
+        if not snapshot.exists:
+            raise TransitionError('Order not found', 404)
+        order = snapshot.to_dict()
+
+        role = authorize(order)
+        if role is None:
+            raise TransitionError('Unauthorized', 403)
+
+        current = normalize_status(order.get('status')) or order.get('status')
+        if current == target:
+            return order, current, False
+        check_transition(current, target, role)
+
+        # All reads before any write: delivery bumps chef and dish counters,
+        # cancelling a pre-order gives its slot back
+        delivery = _read_delivery_refs(db, transaction, [order]) if target == DELIVERED else None
+        slot_ref = slot_snapshot = None
+        if target == CANCELLED and order.get('slot') and order.get('chefId'):
+            slot_ref = order_slots.slot_refs(db, [order['chefId']])[0]
+            slot_snapshot = slot_ref.get(transaction=transaction)
+
+        update = _status_update(target, extra_fields)
+        # Precondition: the write fails if the order changed since it was read
+        # (_run_transaction then runs the transaction again)
+        transaction.update(order_ref, update, option=db.write_option(last_update_time=snapshot.update_time))
+        if delivery:
+            _write_delivery(transaction, *delivery)
+        if slot_ref is not None:
+            order_slots.release(transaction, slot_ref, slot_snapshot, order['slot'])
+
+        order.update(update)
+        return order, current, True
+
+    order, old_status, changed = _run_transaction(db, transition_in_transaction)
+
+    # Emitted once, after commit (the transaction function may run several times)
+    if changed:
+        _after_commit(order_id, old_status, target, order)
+
+    return order, old_status, changed
+
+
+def transition_many(db, order_ids, target, authorize, extra_fields=None):
+    """
+    Move several orders to target status in one transaction.
+
+    All orders are read with one get_all; orders that are missing, not the
+    caller's or not allowed to move are reported and skipped, the rest are
+    written together. Notifications are sent in the background after commit.
+    Returns {order_id: None (updated or already there) or TransitionError}.
+    """
+    order_ids = list(dict.fromkeys(order_ids))
+    if target == CANCELLED:
+        # Cancellations release slots and are always made one by one
+        raise TransitionError('Orders are cancelled one at a time', 400)
+    if len(order_ids) > MAX_BULK_ORDERS:
+        raise TransitionError(f'At most {MAX_BULK_ORDERS} orders per request', 400)
+    refs = {order_id: db.collection('orders').document(order_id) for order_id in order_ids}
+
+    @firestore.transactional
+    def transition_in_transaction(transaction):
+        results = {order_id: TransitionError('Order not found', 404) for order_id in order_ids}
+        moving = []
+        for snapshot in db.get_all(list(refs.values()), transaction=transaction):
+            if not snapshot.exists or snapshot.id not in results:
+                continue
+            order = snapshot.to_dict()
+            try:
+                role = authorize(order)
+                if role is None:
+                    raise TransitionError('Unauthorized', 403)
+                current = normalize_status(order.get('status')) or order.get('status')
+                if current != target:
+                    check_transition(current, target, role)
+                    moving.append((snapshot, order, current))
+                results[snapshot.id] = None
+            except TransitionError as e:
+                results[snapshot.id] = e
+
+        delivery = None
+        if target == DELIVERED and moving:
+            delivery = _read_delivery_refs(db, transaction, [order for _, order, _ in moving])
+
+        changed = []
+        for snapshot, order, current in moving:
+            update = _status_update(target, extra_fields)
+            transaction.update(refs[snapshot.id], update,
+                               option=db.write_option(last_update_time=snapshot.update_time))
+            order.update(update)
+            changed.append((snapshot.id, current, order))
+        if delivery:
+            _write_delivery(transaction, *delivery)
+        return results, changed
+
+    results, changed = _run_transaction(db, transition_in_transaction)
+
+    for order_id, old_status, order in changed:
+        _after_commit(order_id, old_status, target, order, notify=False)
+    if changed:
+        # One background job for the whole batch: the chef's response doesn't wait on push delivery
+        _run_in_background(lambda: [_notify(order_id, old_status, target, order)
+                                    for order_id, old_status, order in changed])
+    return results
@@ -0,0 +1,44 @@
+"""
+Order Statuses
+==============
+The order status vocabulary. Kept free of other app imports so that
+validators and utilities can use it without loading the order state
+machine (and through it the routes); order_state re-exports all of it.
+"""
+
+PENDING = 'pending'
+ACCEPTED = 'accepted'
+PREPARING = 'preparing'
+READY = 'ready'
+ON_THE_WAY = 'on_the_way'
+DELIVERED = 'delivered'
+CANCELLED = 'cancelled'
+
+# Forward path of an order; cancelled can branch off before delivery
+FLOW = [PENDING, ACCEPTED, PREPARING, READY, ON_THE_WAY, DELIVERED]
+STATUSES = FLOW + [CANCELLED]
+TERMINAL = {DELIVERED, CANCELLED}
+# In-flight statuses (the customer's active orders)
+ACTIVE = [status for status in FLOW if status not in TERMINAL]
+# Statuses a chef's status update may move an order to (rejecting cancels)
+CHEF_TARGETS = FLOW[1:]
+
+# Names used by older clients and routes
+STATUS_ALIASES = {
+    'confirmed': ACCEPTED,
+    'out_for_delivery': ON_THE_WAY,
+    'delivering': ON_THE_WAY,
+    'completed': DELIVERED,
+    'rejected': CANCELLED,
+}
+
+
+def aliases_of(statuses):
+    """Legacy names accepted for any of statuses"""
+    return sorted(alias for alias, status in STATUS_ALIASES.items() if status in statuses)
+
+
+def normalize_status(status):
+    """Canonical status for a status or alias, or None if unknown"""
+    status = STATUS_ALIASES.get(status, status)
+    return status if status in STATUSES else None
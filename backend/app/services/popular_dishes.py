@@ -0,0 +1,84 @@
+"""
+Popular Dishes Leaderboard
+==========================
+Available dishes kept sorted by ordersCount as a catalog observer, so the
+top K are a slice instead of a full sort on every request.
+"""
+
+import threading
+from bisect import bisect_left, insort
+
+from app.services.dish_catalog import dish_catalog
+
+
+def popularity(dish):
+    """Popularity score of a dish (ordersCount, falling back to the isPopular flag)"""
+    score = dish.get('ordersCount', dish.get('isPopular', 0))
+    try:
+        return float(score or 0)
+    except (TypeError, ValueError):
+        return 0.0
+
+
+class PopularDishesIndex:
+    """Sorted container of (-popularity, id) over available dishes"""
+
+    def __init__(self):
+        self._lock = threading.RLock()
+        self.clear()
+
+    # ---------- catalog observer ----------
+
+    def clear(self):
+        with self._lock:
+            self._ranking = []  # sorted (-popularity, dish_id)
+            self._keys = {}     # dish_id -> ranking key
+            self._dishes = {}   # dish_id -> indexed dish (replaced, never mutated, by the catalog)
+
+    def upsert(self, dish_id, dish):
+        with self._lock:
+            self._remove(dish_id)
+            if dish.get('isAvailable') is not True:
+                return
+            key = (-popularity(dish), dish_id)
+            insort(self._ranking, key)
+            self._keys[dish_id] = key
+            self._dishes[dish_id] = dish
+
+    def remove(self, dish_id):
+        with self._lock:
+            self._remove(dish_id)
+
+    def _remove(self, dish_id):
+        key = self._keys.pop(dish_id, None)
+        if key is None:
+            return
+        self._dishes.pop(dish_id, None)
+        index = bisect_left(self._ranking, key)
+        if index < len(self._ranking) and self._ranking[index] == key:
+            del self._ranking[index]
+
+    # ---------- queries ----------
+
+    def top(self, limit, predicate=None):
+        """
+        Copies of the `limit` most popular dishes.
+        predicate: extra filter (e.g. active cooker), called with the indexed dish
+        """
+        result = []
+        if limit <= 0:
+            return result
+        with self._lock:
+            for _, dish_id in self._ranking:
+                dish = self._dishes[dish_id]
+                if predicate is not None and not predicate(dish):
+                    continue
+                result.append(dict(dish))
+                if len(result) >= limit:
+                    break
+        return result
+
+
+# Shared leaderboard, kept in sync with the dish catalog
+popular_dishes = PopularDishesIndex()
+dish_catalog.add_observer(popular_dishes)
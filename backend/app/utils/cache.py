@@ -0,0 +1,173 @@
+"""
+Caching Utilities
+=================
+Stampede-safe caching for expensive loaders:
+- SingleFlight: concurrent callers share one in-flight call
+- CachedLoader: TTL cache with single-flight refresh and stale-while-revalidate
+- cached: decorator wrapping a function in CachedLoaders (one per argument tuple)
+"""
+
+import threading
+from functools import wraps
+from time import monotonic
+
+
+class _Flight:
+    """One in-flight call that other callers can wait on"""
+
+    def __init__(self):
+        self.event = threading.Event()
+        self.value = None
+        self.error = None
+
+    def wait(self):
+        self.event.wait()
+        if self.error is not None:
+            raise self.error
+        return self.value
+
+
+class SingleFlight:
+    """Run a call once for all concurrent callers with the same key"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._flights = {}
+
+    def do(self, key, fn):
+        with self._lock:
+            flight = self._flights.get(key)
+            leader = flight is None
+            if leader:
+                flight = self._flights[key] = _Flight()
+
+        if not leader:
+            return flight.wait()
+
+        try:
+            flight.value = fn()
+            return flight.value
+        except Exception as e:
+            flight.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._flights[key]
+            flight.event.set()
+
+
+class CachedLoader:
+    """
+    Cached result of loader() with stampede protection.
+
+    - younger than refresh_after: served from cache
+    - between refresh_after and ttl: served from cache while one background
+      thread refreshes it (refresh ahead of expiry)
+    - older than ttl: one caller reloads; concurrent callers get the previous
+      value instead of piling onto the database
+    - nothing cached yet: one caller loads, the others wait for that load
+    """
+
+    def __init__(self, loader, ttl, refresh_ahead=0.8):
+        self._loader = loader
+        self._ttl = ttl
+        self._refresh_after = ttl * refresh_ahead
+        self._lock = threading.Lock()
+        self._value = None
+        self._loaded_at = None
+        self._inflight = None
+        # Bumped by invalidate(); loads started before it are not stored
+        self._generation = 0
+
+    def get(self):
+        stale, has_stale = None, False
+        leader = True
+        with self._lock:
+            if self._loaded_at is not None:
+                age = monotonic() - self._loaded_at
+                if age < self._refresh_after or self._inflight is not None:
+                    # Fresh, or another caller is already refreshing - serve what we have
+                    return self._value
+                stale, has_stale = self._value, True
+                flight = self._inflight = _Flight()
+                generation = self._generation
+                if age < self._ttl:
+                    # Refresh ahead of expiry without making anyone wait
+                    threading.Thread(target=self._run, args=(flight, generation, True), daemon=True).start()
+                    return stale
+            elif self._inflight is not None:
+                # First load is already running - wait for it
+                flight = self._inflight
+                leader = False
+            else:
+                flight = self._inflight = _Flight()
+                generation = self._generation
+
+        if not leader:
+            return flight.wait()
+
+        self._run(flight, generation)
+        if flight.error is not None:
+            if has_stale:
+                print(f"Cache refresh failed, serving stale value: {flight.error}")
+                return stale
+            raise flight.error
+        return flight.value
+
+    def invalidate(self):
+        """Drop the cached value; the next get() reloads it (a load already running is not stored)"""
+        with self._lock:
+            self._generation += 1
+            self._loaded_at = None
+            self._value = None
+            self._inflight = None
+
+    def _run(self, flight, generation, background=False):
+        try:
+            value = self._loader()
+            with self._lock:
+                # Read before an invalidate(): hand it to this flight's callers only
+                if generation == self._generation:
+                    self._value = value
+                    self._loaded_at = monotonic()
+            flight.value = value
+        except Exception as e:
+            flight.error = e
+            if background:
+                print(f"Background cache refresh failed: {e}")
+        finally:
+            with self._lock:
+                if self._inflight is flight:
+                    self._inflight = None
+            flight.event.set()
+
+
+def cached(ttl, refresh_ahead=0.8):
+    """
+    Decorator: cache a loader's result per positional-argument tuple with
+    CachedLoader semantics. The wrapped function gets an invalidate(*args)
+    helper; invalidate() with no arguments drops every cached entry.
+    """
+    def decorator(fn):
+        loaders = {}
+        lock = threading.Lock()
+
+        @wraps(fn)
+        def wrapper(*args):
+            with lock:
+                loader = loaders.get(args)
+                if loader is None:
+                    loader = loaders[args] = CachedLoader(lambda: fn(*args), ttl, refresh_ahead)
+            return loader.get()
+
+        def invalidate(*args):
+            with lock:
+                if args:
+                    loaders.pop(args, None)
+                else:
+                    loaders.clear()
+
+        wrapper.invalidate = invalidate
+        return wrapper
+
+    return decorator
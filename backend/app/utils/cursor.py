@@ -0,0 +1,40 @@
+"""
+Cursor Pagination Helpers
+=========================
+Opaque keyset cursors built from (createdAt, document id)
+"""
+
+import base64
+import json
+from datetime import datetime
+
+
+def encode_cursor(created, doc_id):
+    """Encode the position of a document as an opaque URL-safe token"""
+    if isinstance(created, datetime):
+        payload = {'ts': created.isoformat(), 'id': doc_id}
+    else:
+        payload = {'s': created if created is not None else '', 'id': doc_id}
+    raw = json.dumps(payload, separators=(',', ':')).encode('utf-8')
+    return base64.urlsafe_b64encode(raw).decode('ascii').rstrip('=')
+
+
+def decode_cursor(token):
+    """
+    Decode a cursor token back to (createdAt, document id).
+    createdAt keeps its stored type (datetime or string) so it can be fed to
+    Firestore start_after(). Raises ValueError for malformed tokens.
+    """
+    try:
+        padded = token + '=' * (-len(token) % 4)
+        payload = json.loads(base64.urlsafe_b64decode(padded.encode('ascii')))
+        doc_id = payload['id']
+        if 'ts' in payload:
+            created = datetime.fromisoformat(payload['ts'])
+        else:
+            created = payload['s']
+    except (ValueError, KeyError, TypeError) as e:
+        raise ValueError('Invalid cursor') from e
+    if not isinstance(doc_id, str):
+        raise ValueError('Invalid cursor')
+    return created, doc_id
@@ -7,6 +7,7 @@ Standardized error responses and error handling
 from flask import jsonify
 from functools import wraps
 import traceback
+from app.services.order_statuses import STATUSES, normalize_status
 
 
 class APIError(Exception):
@@ -152,13 +153,14 @@ def validate_quantity(quantity):
 
 
 def validate_order_status(status):
-    """Validate order status is valid"""
-    valid_statuses = ['pending', 'accepted', 'preparing', 'ready', 'delivering', 'delivered', 'cancelled']
-    if status not in valid_statuses:
+    """Validate order status (aliases such as 'confirmed' are accepted); returns the canonical status"""
+    canonical = normalize_status(status)
+    if canonical is None:
         raise ValidationError(
-            f"Invalid status. Must be one of: {', '.join(valid_statuses)}",
-            payload={'valid_statuses': valid_statuses}
+            f"Invalid status. Must be one of: {', '.join(STATUSES)}",
+            payload={'valid_statuses': STATUSES}
         )
+    return canonical
 
 
 def validate_pagination(page, per_page, max_per_page=100):
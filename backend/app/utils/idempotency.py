@@ -0,0 +1,135 @@
+"""
+Idempotency Keys
+================
+`Idempotency-Key` header support for non-idempotent POST endpoints. The
+first request with a key claims it in Firestore; retries with the same key
+get the stored response back instead of repeating the work (and its writes
+and notifications). Records expire after IDEMPOTENCY_TTL.
+"""
+
+import hashlib
+from datetime import datetime, timedelta, timezone
+from functools import wraps
+
+from flask import request, jsonify, make_response
+from firebase_admin import firestore
+
+from app.services.firebase_service import get_db
+
+IDEMPOTENCY_HEADER = 'Idempotency-Key'
+REPLAYED_HEADER = 'Idempotent-Replayed'
+IDEMPOTENCY_COLLECTION = 'idempotency_keys'
+
+# How long a completed response is replayed (a TTL policy on expiresAt deletes old records)
+IDEMPOTENCY_TTL = timedelta(hours=24)
+# A claim whose request never finished (crashed worker) can be retried after this
+IN_PROGRESS_TIMEOUT = timedelta(minutes=2)
+MAX_KEY_LENGTH = 255
+
+
+def _record_id(scope, uid, key):
+    """Document id for a key, namespaced by endpoint and user"""
+    return hashlib.sha256(f'{scope}:{uid}:{key}'.encode('utf-8')).hexdigest()
+
+
+def _fingerprint():
+    """Hash of the request body, to catch a key reused for a different request"""
+    return hashlib.sha256(request.get_data() or b'').hexdigest()
+
+
+def _utc(value):
+    """Firestore returns aware UTC timestamps; treat naive values as UTC too"""
+    if isinstance(value, datetime) and value.tzinfo is None:
+        return value.replace(tzinfo=timezone.utc)
+    return value
+
+
+def _is_live(record, now):
+    """False once a record has expired or its in-progress claim was abandoned"""
+    deadline = record.get('lockedUntil' if record.get('status') == 'in_progress' else 'expiresAt')
+    return isinstance(deadline, datetime) and _utc(deadline) > now
+
+
+def _claim(db, record_ref, fingerprint):
+    """
+    Claim a key in a transaction.
+    Returns None when this request owns the key, or the live record of an earlier request.
+    """
+    @firestore.transactional
+    def claim_in_transaction(transaction):
+        now = datetime.now(timezone.utc)
+        snapshot = record_ref.get(transaction=transaction)
+        if snapshot.exists:
+            record = snapshot.to_dict()
+            if _is_live(record, now):
+                return record
+        transaction.set(record_ref, {
+            'status': 'in_progress',
+            'fingerprint': fingerprint,
+            'createdAt': now,
+            'lockedUntil': now + IN_PROGRESS_TIMEOUT,
+            'expiresAt': now + IDEMPOTENCY_TTL,
+        })
+        return None
+
+    return claim_in_transaction(db.transaction())
+
+
+def _replay(record):
+    response = make_response(record.get('body', ''), record.get('statusCode', 200))
+    response.mimetype = record.get('mimetype', 'application/json')
+    response.headers[REPLAYED_HEADER] = 'true'
+    return response
+
+
+def idempotent(scope):
+    """
+    Decorator for POST endpoints (apply below require_auth).
+    Requests without an Idempotency-Key header run as usual.
+    """
+    def decorator(f):
+        @wraps(f)
+        def decorated(*args, **kwargs):
+            key = request.headers.get(IDEMPOTENCY_HEADER)
+            if not key:
+                return f(*args, **kwargs)
+            if len(key) > MAX_KEY_LENGTH:
+                return jsonify({'error': f'{IDEMPOTENCY_HEADER} is too long'}), 400
+
+            db = get_db()
+            if not db:
+                return f(*args, **kwargs)
+
+            uid = getattr(request, 'user', {}).get('uid', '')
+            record_ref = db.collection(IDEMPOTENCY_COLLECTION).document(_record_id(scope, uid, key))
+            fingerprint = _fingerprint()
+
+            existing = _claim(db, record_ref, fingerprint)
+            if existing is not None:
+                if existing.get('fingerprint') != fingerprint:
+                    return jsonify({'error': f'{IDEMPOTENCY_HEADER} was already used for a different request'}), 422
+                if existing.get('status') != 'completed':
+                    return jsonify({'error': 'A request with this Idempotency-Key is still in progress'}), 409
+                return _replay(existing)
+
+            try:
+                response = make_response(f(*args, **kwargs))
+            except Exception:
+                record_ref.delete()
+                raise
+
+            if response.status_code >= 500:
+                # Server errors are not final: let the client retry with the same key
+                record_ref.delete()
+            else:
+                record_ref.update({
+                    'status': 'completed',
+                    'statusCode': response.status_code,
+                    'body': response.get_data(as_text=True),
+                    'mimetype': response.mimetype,
+                    'completedAt': datetime.now(timezone.utc),
+                })
+            return response
+
+        return decorated
+    return decorator
@@ -0,0 +1,71 @@
+"""
+Sparse Fieldset Helpers
+=======================
+`fields=` query parameter support for list endpoints: a Firestore select()
+projection on the way in, trimmed JSON on the way out
+"""
+
+import re
+
+# Top-level or dotted (map) field paths, e.g. name or deliverySettings.deliveryFee
+FIELD_PATH = re.compile(r'^[A-Za-z_][A-Za-z0-9_]*(\.[A-Za-z_][A-Za-z0-9_]*)*$')
+MAX_FIELDS = 30
+
+
+def parse_fields(value):
+    """
+    Parse a comma-separated fields= value into a list of field paths.
+    Returns None when the parameter is absent (full documents).
+    `id` is always returned and need not be listed.
+    Raises ValueError for malformed field names.
+    """
+    if value is None:
+        return None
+    fields = []
+    for name in value.split(','):
+        name = name.strip()
+        if not name or name == 'id' or name in fields:
+            continue
+        if not FIELD_PATH.match(name):
+            raise ValueError(f'Invalid field: {name}')
+        fields.append(name)
+    if len(fields) > MAX_FIELDS:
+        raise ValueError('Too many fields')
+    return fields
+
+
+def select_fields(query, fields, required=()):
+    """
+    Apply a select() projection for the requested fields.
+    required: fields the endpoint itself needs (sorting, filtering, cursors);
+    they are read but trimmed from the response by project().
+    """
+    if fields is None:
+        return query
+    paths = list(dict.fromkeys(list(fields) + list(required)))
+    # Projecting on __name__ alone reads only document ids
+    return query.select(paths or ['__name__'])
+
+
+def project(doc, fields):
+    """Copy of doc with only id and the requested (possibly dotted) fields"""
+    if fields is None:
+        return doc
+    result = {}
+    if 'id' in doc:
+        result['id'] = doc['id']
+    for path in fields:
+        parts = path.split('.')
+        if any('.'.join(parts[:i]) in fields for i in range(1, len(parts))):
+            continue  # a parent map is already included whole
+        value = doc
+        for part in parts:
+            if not isinstance(value, dict) or part not in value:
+                break
+            value = value[part]
+        else:
+            target = result
+            for part in parts[:-1]:
+                target = target.setdefault(part, {})
+            target[parts[-1]] = value
+    return result
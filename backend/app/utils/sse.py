@@ -0,0 +1,134 @@
+"""
+Server-Sent Events
+==================
+Streams event hub subscriptions to clients as text/event-stream.
+
+An open stream occupies a worker thread for its whole life, so stream
+routes need gevent or gthread workers (e.g. `gunicorn -k gthread
+--threads 100`); a default sync worker serves nothing else while a
+stream is open. Each process serves at most MAX_STREAMS streams (more
+get a 503 with Retry-After) and ends each one after MAX_STREAM_SECONDS;
+EventSource clients reconnect on their own after RETRY_MS.
+"""
+
+import json
+import threading
+import time
+from functools import wraps
+
+from flask import Response, jsonify, stream_with_context
+
+from app.services.event_hub import CLOSED
+
+# Comment lines sent while idle keep proxies from closing the connection
+KEEPALIVE_SECONDS = 15
+# Clients reconnect after this long (EventSource `retry`)
+RETRY_MS = 3000
+# Open streams per process (keep below the worker's thread/greenlet count)
+MAX_STREAMS = 50
+# Streams are ended after this long; the client reconnects and resyncs
+MAX_STREAM_SECONDS = 300
+
+_streams_lock = threading.Lock()
+_open_streams = 0
+
+
+def open_streams():
+    """Streams currently open in this process"""
+    return _open_streams
+
+
+def _take_stream_slot():
+    global _open_streams
+    with _streams_lock:
+        if _open_streams >= MAX_STREAMS:
+            return False
+        _open_streams += 1
+        return True
+
+
+def _release_stream_slot():
+    global _open_streams
+    with _streams_lock:
+        _open_streams -= 1
+
+
+def limit_streams(f):
+    """
+    Decorator for stream routes: answers 503 once MAX_STREAMS streams are
+    open. The slot is held until the stream closes, or released at once if
+    the route answers with anything other than a stream.
+    """
+    @wraps(f)
+    def decorated(*args, **kwargs):
+        if not _take_stream_slot():
+            response = jsonify({'error': 'Too many open streams, retry later'})
+            response.headers['Retry-After'] = str(RETRY_MS // 1000)
+            return response, 503
+        try:
+            result = f(*args, **kwargs)
+        except Exception:
+            _release_stream_slot()
+            raise
+        if isinstance(result, Response) and result.mimetype == 'text/event-stream':
+            result.call_on_close(_release_stream_slot)
+        else:
+            _release_stream_slot()
+        return result
+    
+    return decorated
+
+
+def format_event(data, event=None):
+    """One SSE message with a JSON payload"""
+    lines = []
+    if event:
+        lines.append(f'event: {event}')
+    lines.append(f'data: {json.dumps(data, default=str)}')
+    return '\n'.join(lines) + '\n\n'
+
+
+def sse_response(subscription, initial=(), event=None, until=None):
+    """
+    Stream a subscription. initial events are sent first; the stream ends
+    when the subscription closes, until(event) returns True or after
+    MAX_STREAM_SECONDS (the client then reconnects). An event equal
+    to the one just sent is skipped (the initial state may also arrive from
+    the subscription). The subscription is always closed when the client goes away.
+    """
+    def stream():
+        last = None
+        deadline = time.monotonic() + MAX_STREAM_SECONDS
+        try:
+            yield f'retry: {RETRY_MS}\n\n'
+            for data in initial:
+                yield format_event(data, event)
+                last = data
+                if until is not None and until(data):
+                    return
+            while True:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    return
+                data = subscription.get(timeout=min(KEEPALIVE_SECONDS, remaining))
+                if data is CLOSED:
+                    return
+                if data is None:
+                    yield ': keepalive\n\n'
+                    continue
+                if data == last:
+                    continue
+                yield format_event(data, event)
+                last = data
+                if until is not None and until(data):
+                    return
+        finally:
+            subscription.close()
+
+    response = Response(stream_with_context(stream()), mimetype='text/event-stream', headers={
+        'Cache-Control': 'no-cache',
+        'X-Accel-Buffering': 'no',  # don't let nginx buffer the stream
+    })
+    # Also covers clients that disconnect before the stream starts
+    response.call_on_close(subscription.close)
+    return response
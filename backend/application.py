@@ -31,10 +31,10 @@ def create_app():
     # Enable CORS for Flutter app - more permissive for web development
     CORS(app, 
          origins=["*"],
-         allow_headers=["Content-Type", "Authorization", "Accept", "Origin", "X-Requested-With"],
+         allow_headers=["Content-Type", "Authorization", "Accept", "Origin", "X-Requested-With", "Idempotency-Key"],
          methods=["GET", "POST", "PUT", "DELETE", "OPTIONS", "PATCH"],
          supports_credentials=True,
-         expose_headers=["Content-Type", "Authorization"]
+         expose_headers=["Content-Type", "Authorization", "Idempotent-Replayed"]
     )
     
     # Simple rate limiting middleware
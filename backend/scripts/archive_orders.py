@@ -0,0 +1,39 @@
+#!/usr/bin/env python3
+"""Archive cold orders (delivered/cancelled, older than N days) out of the orders collection"""
+import argparse
+import os
+import sys
+
+import firebase_admin
+from firebase_admin import credentials, firestore
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.services.order_archive import BATCH_SIZE, DEFAULT_AGE_DAYS, OrderArchiver  # noqa: E402
+
+parser = argparse.ArgumentParser(description=__doc__)
+parser.add_argument('--days', type=int, default=DEFAULT_AGE_DAYS,
+                    help=f'archive orders last updated more than this many days ago (default {DEFAULT_AGE_DAYS})')
+parser.add_argument('--out', default='archive',
+                    help='directory for the monthly NDJSON partitions and the checkpoint (default ./archive)')
+parser.add_argument('--batch-size', type=int, default=BATCH_SIZE,
+                    help=f'orders moved per Firestore batch (max {BATCH_SIZE})')
+parser.add_argument('--max-batches', type=int, default=None,
+                    help='stop after this many batches (re-run to resume)')
+args = parser.parse_args()
+
+# Initialize Firebase
+cred = credentials.Certificate('serviceAccountKey.json')
+firebase_admin.initialize_app(cred)
+db = firestore.client()
+
+print("=" * 60)
+print("ARCHIVING COLD ORDERS")
+print("=" * 60)
+
+archiver = OrderArchiver(db, args.out, age_days=args.days, batch_size=args.batch_size)
+moved = archiver.run(max_batches=args.max_batches)
+
+print(f"\nArchived {moved} orders to '{args.out}' and the orders_archive collection")
+if archiver.load_checkpoint():
+    print("Run stopped before the end - run again to resume from the checkpoint")
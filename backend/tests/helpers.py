@@ -0,0 +1,44 @@
+"""
+Test Helpers
+============
+Fake Firestore snapshots and pre-loaded in-memory mirrors shared by the tests
+"""
+
+from unittest.mock import MagicMock
+
+from app.services.cooker_registry import CookerRegistry
+from app.services.dish_catalog import DishCatalog
+
+
+def make_doc(doc_id, data):
+    """Build a fake Firestore document snapshot"""
+    doc = MagicMock()
+    doc.id = doc_id
+    doc.to_dict.return_value = data
+    return doc
+
+
+def make_change(change_type, doc):
+    """Build a fake Firestore DocumentChange"""
+    change = MagicMock()
+    change.type.name = change_type
+    change.document = doc
+    return change
+
+
+def build_registry(cookers, *observers):
+    """CookerRegistry loaded from {cookerId: data}, with observers attached first"""
+    registry = CookerRegistry()
+    for observer in observers:
+        registry.add_observer(observer)
+    registry._on_snapshot([make_doc(cooker_id, dict(data)) for cooker_id, data in cookers.items()], [], None)
+    return registry
+
+
+def build_catalog(dishes, *observers):
+    """DishCatalog loaded from {dishId: data}, with observers attached first"""
+    catalog = DishCatalog()
+    for observer in observers:
+        catalog.add_observer(observer)
+    catalog._on_snapshot([make_doc(dish_id, dict(data)) for dish_id, data in dishes.items()], [], None)
+    return catalog
@@ -24,6 +24,26 @@ from tests.test_admin import TestAdminRoutes
 from tests.test_upload import TestUploadRoutes
 from tests.test_auto_notifications import TestAutoNotifications
 from tests.test_review_management import TestReviewManagement
+from tests.test_dish_catalog import TestDishCatalog, TestDishListingRoutes, TestPopularDishes
+from tests.test_dish_search import TestDishSearchIndex, TestSearchRoute
+from tests.test_cooker_registry import TestCookerRegistry, TestCookerWritePaths
+from tests.test_cache import TestSingleFlight, TestCachedLoader
+from tests.test_cooker_geo import TestCookerGeoIndex, TestNearRoutes
+from tests.test_dish_facets import TestDishFacetIndex, TestFacetsRoute
+from tests.test_projection import TestProjectionHelpers, TestProjectionRoutes
+from tests.test_cooker_hours import TestCookerHoursIndex, TestOpenNowRoutes
+from tests.test_order_service import TestOrderPricing, TestCreateOrderRoute
+from tests.test_idempotency import TestIdempotencyKeys
+from tests.test_order_state import TestOrderStateRules, TestTransition, TestOrderStatusRoutes
+from tests.test_order_service import TestOrderHistoryRoute
+from tests.test_order_events import TestEventHub, TestOrderEventsRoute
+from tests.test_order_events import TestChefOrderQueue
+from tests.test_order_eta import TestKitchenLoad, TestOrderEtaRoute
+from tests.test_order_state import TestBulkTransition
+from tests.test_order_slots import TestSlotRules, TestScheduledOrders
+from tests.test_order_archive import TestOrderArchive
+from tests.test_cart import TestCartStore, TestCartCache, TestCartRoutes, TestCartCheckout
+from tests.test_payments import TestConfirmPayment
 
 
 def suite():
@@ -36,6 +56,44 @@ def suite():
     test_suite.addTests(unittest.TestLoader().loadTestsFromTestCase(TestUploadRoutes))
     test_suite.addTests(unittest.TestLoader().loadTestsFromTestCase(TestAutoNotifications))
     test_suite.addTests(unittest.TestLoader().loadTestsFromTestCase(TestReviewManagement))
+    test_suite.addTests(unittest.TestLoader().loadTestsFromTestCase(TestDishCatalog))
+    test_suite.addTests(unittest.TestLoader().loadTestsFromTestCase(TestDishListingRoutes))
+    test_suite.addTests(unittest.TestLoader().loadTestsFromTestCase(TestDishSearchIndex))
+    test_suite.addTests(unittest.TestLoader().loadTestsFromTestCase(TestSearchRoute))
+    test_suite.addTests(unittest.TestLoader().loadTestsFromTestCase(TestPopularDishes))
+    test_suite.addTests(unittest.TestLoader().loadTestsFromTestCase(TestCookerRegistry))
+    test_suite.addTests(unittest.TestLoader().loadTestsFromTestCase(TestCookerWritePaths))
+    test_suite.addTests(unittest.TestLoader().loadTestsFromTestCase(TestSingleFlight))
+    test_suite.addTests(unittest.TestLoader().loadTestsFromTestCase(TestCachedLoader))
+    test_suite.addTests(unittest.TestLoader().loadTestsFromTestCase(TestCookerGeoIndex))
+    test_suite.addTests(unittest.TestLoader().loadTestsFromTestCase(TestNearRoutes))
+    test_suite.addTests(unittest.TestLoader().loadTestsFromTestCase(TestDishFacetIndex))
+    test_suite.addTests(unittest.TestLoader().loadTestsFromTestCase(TestFacetsRoute))
+    test_suite.addTests(unittest.TestLoader().loadTestsFromTestCase(TestProjectionHelpers))
+    test_suite.addTests(unittest.TestLoader().loadTestsFromTestCase(TestProjectionRoutes))
+    test_suite.addTests(unittest.TestLoader().loadTestsFromTestCase(TestCookerHoursIndex))
+    test_suite.addTests(unittest.TestLoader().loadTestsFromTestCase(TestOpenNowRoutes))
+    test_suite.addTests(unittest.TestLoader().loadTestsFromTestCase(TestOrderPricing))
+    test_suite.addTests(unittest.TestLoader().loadTestsFromTestCase(TestCreateOrderRoute))
+    test_suite.addTests(unittest.TestLoader().loadTestsFromTestCase(TestIdempotencyKeys))
+    test_suite.addTests(unittest.TestLoader().loadTestsFromTestCase(TestOrderStateRules))
+    test_suite.addTests(unittest.TestLoader().loadTestsFromTestCase(TestTransition))
+    test_suite.addTests(unittest.TestLoader().loadTestsFromTestCase(TestOrderStatusRoutes))
+    test_suite.addTests(unittest.TestLoader().loadTestsFromTestCase(TestOrderHistoryRoute))
+    test_suite.addTests(unittest.TestLoader().loadTestsFromTestCase(TestEventHub))
+    test_suite.addTests(unittest.TestLoader().loadTestsFromTestCase(TestOrderEventsRoute))
+    test_suite.addTests(unittest.TestLoader().loadTestsFromTestCase(TestChefOrderQueue))
+    test_suite.addTests(unittest.TestLoader().loadTestsFromTestCase(TestKitchenLoad))
+    test_suite.addTests(unittest.TestLoader().loadTestsFromTestCase(TestOrderEtaRoute))
+    test_suite.addTests(unittest.TestLoader().loadTestsFromTestCase(TestBulkTransition))
+    test_suite.addTests(unittest.TestLoader().loadTestsFromTestCase(TestSlotRules))
+    test_suite.addTests(unittest.TestLoader().loadTestsFromTestCase(TestScheduledOrders))
+    test_suite.addTests(unittest.TestLoader().loadTestsFromTestCase(TestOrderArchive))
+    test_suite.addTests(unittest.TestLoader().loadTestsFromTestCase(TestCartStore))
+    test_suite.addTests(unittest.TestLoader().loadTestsFromTestCase(TestCartCache))
+    test_suite.addTests(unittest.TestLoader().loadTestsFromTestCase(TestCartRoutes))
+    test_suite.addTests(unittest.TestLoader().loadTestsFromTestCase(TestCartCheckout))
+    test_suite.addTests(unittest.TestLoader().loadTestsFromTestCase(TestConfirmPayment))
     
     return test_suite
 
@@ -50,6 +108,27 @@ if __name__ == '__main__':
     print("  ✓ Upload Routes")
     print("  ✓ Auto-Notifications")
     print("  ✓ Review Management")
+    print("  ✓ Dish Catalog")
+    print("  ✓ Dish Search")
+    print("  ✓ Popular Dishes")
+    print("  ✓ Cooker Registry")
+    print("  ✓ Caching Utilities")
+    print("  ✓ Cooker Delivery Areas")
+    print("  ✓ Dish Facets")
+    print("  ✓ Sparse Fieldsets")
+    print("  ✓ Cooker Working Hours")
+    print("  ✓ Order Pricing")
+    print("  ✓ Idempotency Keys")
+    print("  ✓ Order State Machine")
+    print("  ✓ Order History")
+    print("  ✓ Order Event Streams")
+    print("  ✓ Chef Order Queue")
+    print("  ✓ Order ETA")
+    print("  ✓ Bulk Order Transitions")
+    print("  ✓ Order Slots")
+    print("  ✓ Order Archive")
+    print("  ✓ Cart")
+    print("  ✓ Payments")
     print("\n" + "="*70 + "\n")
     
     runner = unittest.TextTestRunner(verbosity=2)
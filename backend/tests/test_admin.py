@@ -11,6 +11,7 @@ import os
 sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
 from application import create_app
+from app.routes.admin_routes import compute_platform_stats
 from datetime import datetime
 
 
@@ -44,16 +45,29 @@ class TestAdminRoutes(unittest.TestCase):
         mock_user_doc.to_dict.return_value = {'isAdmin': True}
         mock_firestore.collection.return_value.document.return_value.get.return_value = mock_user_doc
         
-        # Mock collection counts
-        mock_firestore.collection.return_value.stream.return_value = [Mock(), Mock(), Mock()]
+        # Mock collection counts (aggregation queries) and delivered orders;
+        # real streams are generators, so len() on them must not be needed
+        mock_firestore.collection.return_value.count.return_value.get.return_value = [[Mock(value=3)]]
+        mock_firestore.collection.return_value.stream.side_effect = lambda: iter([Mock(), Mock(), Mock()])
+        recent_order = Mock()
+        recent_order.to_dict.return_value = {'total': 50, 'createdAt': datetime.utcnow().isoformat()}
+        old_order = Mock()
+        old_order.to_dict.return_value = {'total': 20, 'createdAt': '2020-01-01T00:00:00'}
+        mock_firestore.collection.return_value.where.return_value.stream.side_effect = (
+            lambda: iter([recent_order, old_order])
+        )
+        compute_platform_stats.invalidate()
         
         response = self.client.get('/api/admin/stats', headers=self.admin_headers)
+        compute_platform_stats.invalidate()
         
         self.assertEqual(response.status_code, 200)
         data = response.get_json()
-        self.assertIn('totalUsers', data)
-        self.assertIn('totalChefs', data)
-        self.assertIn('totalOrders', data)
+        self.assertEqual(data['totalUsers'], 3)
+        self.assertEqual(data['totalChefs'], 3)
+        self.assertEqual(data['totalOrders'], 3)
+        self.assertEqual(data['totalRevenue'], 70)
+        self.assertEqual(data['monthlyRevenue'], 50)
     
     @patch('app.routes.auth_routes.verify_token')
     def test_admin_endpoint_unauthorized(self, mock_verify):
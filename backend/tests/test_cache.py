@@ -0,0 +1,158 @@
+"""
+Unit Tests for Caching Utilities
+================================
+Tests single-flight loading, stale-while-revalidate and invalidation
+"""
+
+import unittest
+import threading
+from unittest.mock import patch
+import sys
+import os
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.utils.cache import SingleFlight, CachedLoader, cached
+
+
+class SlowLoader:
+    """Loader that blocks until released and counts its calls"""
+
+    def __init__(self):
+        self.calls = 0
+        self.release = threading.Event()
+        self.started = threading.Event()
+
+    def __call__(self):
+        self.calls += 1
+        self.started.set()
+        self.release.wait(5)
+        return self.calls
+
+
+def run_threads(target, count):
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(target())) for _ in range(count)]
+    for thread in threads:
+        thread.start()
+    return threads, results
+
+
+class TestSingleFlight(unittest.TestCase):
+
+    def test_concurrent_callers_share_one_call(self):
+        """Callers arriving during a flight get its result"""
+        flight = SingleFlight()
+        loader = SlowLoader()
+        threads, results = run_threads(lambda: flight.do('cookers', loader), 5)
+        loader.started.wait(5)
+        loader.release.set()
+        for thread in threads:
+            thread.join(5)
+
+        self.assertEqual(loader.calls, 1)
+        self.assertEqual(results, [1] * 5)
+
+    def test_error_reaches_every_caller(self):
+        """A failed call is not cached"""
+        flight = SingleFlight()
+
+        def fail():
+            raise RuntimeError('boom')
+
+        with self.assertRaises(RuntimeError):
+            flight.do('key', fail)
+        self.assertEqual(flight.do('key', lambda: 'ok'), 'ok')
+
+
+class TestCachedLoader(unittest.TestCase):
+
+    def test_cold_load_runs_once(self):
+        """Concurrent cold callers wait for a single load"""
+        loader = SlowLoader()
+        cache = CachedLoader(loader, ttl=60)
+        threads, results = run_threads(cache.get, 5)
+        loader.started.wait(5)
+        loader.release.set()
+        for thread in threads:
+            thread.join(5)
+
+        self.assertEqual(loader.calls, 1)
+        self.assertEqual(results, [1] * 5)
+
+    @patch('app.utils.cache.monotonic')
+    def test_refresh_ahead_serves_previous_value(self, mock_clock):
+        """Past refresh_after the old value is served while a background refresh runs"""
+        loader = SlowLoader()
+        loader.release.set()
+        cache = CachedLoader(loader, ttl=10, refresh_ahead=0.5)
+        mock_clock.return_value = 0
+        self.assertEqual(cache.get(), 1)
+
+        loader.release.clear()
+        loader.started.clear()
+        mock_clock.return_value = 7
+        self.assertEqual(cache.get(), 1)
+        loader.started.wait(5)
+        # Refresh already in flight: no second load
+        self.assertEqual(cache.get(), 1)
+        loader.release.set()
+
+        for _ in range(50):
+            if cache.get() == 2:
+                break
+            threading.Event().wait(0.02)
+        self.assertEqual(cache.get(), 2)
+        self.assertEqual(loader.calls, 2)
+
+    @patch('app.utils.cache.monotonic')
+    def test_failed_refresh_keeps_stale_value(self, mock_clock):
+        """An expired entry survives a failed reload"""
+        values = iter([1])
+
+        def loader():
+            return next(values)
+
+        cache = CachedLoader(loader, ttl=10)
+        mock_clock.return_value = 0
+        self.assertEqual(cache.get(), 1)
+
+        mock_clock.return_value = 20
+        self.assertEqual(cache.get(), 1)
+
+    def test_invalidate_during_load_discards_result(self):
+        """A load that started before invalidate() is not cached"""
+        loader = SlowLoader()
+        cache = CachedLoader(loader, ttl=60)
+        threads, results = run_threads(cache.get, 1)
+        loader.started.wait(5)
+        cache.invalidate()
+        loader.release.set()
+        for thread in threads:
+            thread.join(5)
+
+        self.assertEqual(results, [1])
+        # The next get() loads again instead of serving the pre-invalidate value
+        self.assertEqual(cache.get(), 2)
+        self.assertEqual(loader.calls, 2)
+
+    def test_decorator_caches_per_arguments(self):
+        """cached() keeps one entry per argument tuple and can be invalidated"""
+        calls = []
+
+        @cached(ttl=60)
+        def load(key):
+            calls.append(key)
+            return key.upper()
+
+        self.assertEqual(load('a'), 'A')
+        self.assertEqual(load('a'), 'A')
+        self.assertEqual(load('b'), 'B')
+        self.assertEqual(calls, ['a', 'b'])
+
+        load.invalidate('a')
+        load('a')
+        self.assertEqual(calls, ['a', 'b', 'a'])
+
+
+if __name__ == '__main__':
+    unittest.main()
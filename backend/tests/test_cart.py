@@ -0,0 +1,508 @@
+"""
+Unit Tests for Cart
+===================
+Tests field-level cart writes, the write-behind cart cache, the cart routes
+and checkout
+"""
+
+import copy
+import unittest
+from unittest.mock import patch, MagicMock
+import sys
+import os
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from application import create_app, request_counts
+from app.services import cart_store
+from app.services.cart_cache import CartCache
+from app.services.cart_store import CartNotFoundError
+from google.api_core.exceptions import NotFound
+
+COUSCOUS = {'dishName': 'Couscous', 'price': 25, 'cookerId': 'chef1'}
+
+DISHES = {
+    'd1': {'name': 'Couscous', 'price': 25.0, 'cookerId': 'chef1', 'isAvailable': True},
+    'd2': {'name': 'Brik', 'price': 4.0, 'cookerId': 'chef2', 'isAvailable': True},
+}
+
+
+def make_cart_doc(data):
+    doc = MagicMock()
+    doc.exists = data is not None
+    doc.to_dict.return_value = data
+    return doc
+
+
+def make_snapshot(doc_id, data):
+    snapshot = MagicMock()
+    snapshot.id = doc_id
+    snapshot.exists = data is not None
+    snapshot.to_dict.return_value = data
+    return snapshot
+
+
+def make_db(cart=None):
+    db = MagicMock()
+    db.collection.return_value.document.return_value.get.return_value = make_cart_doc(cart)
+    return db
+
+
+def make_store_db(cart):
+    """Fake db whose cart document keeps merge writes (with Increment patched to ('inc', n))"""
+    stored = {'cart': cart}
+
+    def merge(into, data):
+        for key, value in data.items():
+            if isinstance(value, dict):
+                merge(into.setdefault(key, {}), value)
+            elif isinstance(value, tuple) and value[0] == 'inc':
+                into[key] = into.get(key, 0) + value[1]
+            else:
+                into[key] = value
+        return into
+
+    db = MagicMock()
+    cart_ref = db.collection.return_value.document.return_value
+    cart_ref.set.side_effect = lambda data, **options: stored.update(cart=merge(stored['cart'] or {}, data))
+    cart_ref.get.side_effect = lambda: make_cart_doc(copy.deepcopy(stored['cart']))
+    return db
+
+
+class TestCartStore(unittest.TestCase):
+
+    def test_cart_view_reads_map_and_legacy_list(self):
+        """Items come back as a list, oldest first, with the total computed"""
+        cart = {'items': {
+            'd2': {'price': 4, 'quantity': 2, 'addedAt': '2026-10-16T10:05:00'},
+            'd1': {'price': 25, 'quantity': 1, 'addedAt': '2026-10-16T10:00:00'},
+        }}
+        view = cart_store.cart_view(cart)
+        self.assertEqual([item['dishId'] for item in view['items']], ['d1', 'd2'])
+        self.assertEqual((view['itemCount'], view['total']), (2, 33))
+
+        legacy = {'items': [{'dishId': 'd1', 'price': 25, 'quantity': 2}], 'total': 50}
+        self.assertEqual(cart_store.cart_view(legacy)['total'], 50)
+        self.assertEqual(cart_store.items_map(cart_store.cart_items(legacy)),
+                         {'d1': {'price': 25, 'quantity': 2}})
+
+    def test_write_changes_is_one_merge_write(self):
+        """Increments, whole lines and removals go out in a single merge set"""
+        db = MagicMock()
+        with patch('app.services.cart_store.firestore.Increment', side_effect=lambda n: ('inc', n)):
+            cart_store.write_changes(db, 'user1', {
+                'd1': ('add', 2, COUSCOUS),
+                'd2': ('set', {'price': 4, 'quantity': 3}),
+                'd3': ('delete',),
+            })
+
+        cart_ref = db.collection.return_value.document.return_value
+        cart_ref.set.assert_called_once()
+        written, options = cart_ref.set.call_args
+        items = written[0]['items']
+        self.assertEqual(items['d1']['quantity'], ('inc', 2))
+        self.assertEqual(items['d2'], {'price': 4, 'quantity': 3})
+        self.assertIs(items['d3'], cart_store.firestore.DELETE_FIELD)
+        self.assertEqual(options, {'merge': True})
+
+    def test_set_quantity_is_one_update(self):
+        """A quantity change updates only the line's quantity; a missing cart is CartNotFoundError"""
+        db = MagicMock()
+        cart_ref = db.collection.return_value.document.return_value
+        cart_store.set_quantity(db, 'user1', 'dish-1', 3)
+        cart_store.remove_item(db, 'user1', 'd2')
+
+        self.assertEqual(cart_ref.update.call_args_list[0][0][0]['items.`dish-1`.quantity'], 3)
+        self.assertIs(cart_ref.update.call_args_list[1][0][0]['items.d2'], cart_store.firestore.DELETE_FIELD)
+        cart_ref.get.assert_not_called()
+
+        cart_ref.update.side_effect = NotFound('no cart')
+        with self.assertRaises(CartNotFoundError):
+            cart_store.set_quantity(db, 'user1', 'd1', 2)
+
+
+class TestCartCache(unittest.TestCase):
+
+    def setUp(self):
+        # Long delay: tests flush by hand
+        self.now = 1000.0
+        self.cache = CartCache(flush_delay=60, max_age=2, clock=lambda: self.now)
+
+    def tearDown(self):
+        for entry in self.cache._carts.values():
+            if entry.timer is not None:
+                entry.timer.cancel()
+
+    def test_taps_coalesce_into_one_write(self):
+        """Five adds and a quantity change become one write"""
+        db = make_db({'items': {'d2': {'price': 4, 'quantity': 1, 'addedAt': '2026-10-16T10:00:00'}}})
+        for _ in range(5):
+            self.cache.add(db, 'user1', 'd1', 1, COUSCOUS)
+        self.cache.set_quantity(db, 'user1', 'd2', 3)
+
+        cart_ref = db.collection.return_value.document.return_value
+        cart_ref.set.assert_not_called()
+
+        with patch('app.services.cart_store.write_changes') as mock_write:
+            self.cache.flush('user1')
+        mock_write.assert_called_once()
+        changes = mock_write.call_args[0][2]
+        self.assertEqual(changes['d1'][:2], ('add', 5))
+        self.assertEqual(changes['d2'], ('quantity', 3))
+
+    def test_quantity_change_writes_only_the_quantity(self):
+        """Setting a quantity leaves the line's other fields to whoever wrote them"""
+        db = make_db({'items': {'d1': {'price': 25, 'quantity': 1, 'addedAt': '2026-10-16T10:00:00'}}})
+        self.cache.add(db, 'user1', 'd1', 2, COUSCOUS)
+        self.cache.set_quantity(db, 'user1', 'd1', 4)
+        self.cache.flush('user1')
+
+        cart_ref = db.collection.return_value.document.return_value
+        self.assertEqual(cart_ref.set.call_args[0][0]['items'], {'d1': {'quantity': 4}})
+        self.assertEqual(self.cache.get(db, 'user1')['items'][0]['quantity'], 4)
+
+    def test_stale_copy_is_read_again(self):
+        """Another worker's writes show up once the stored copy is older than max_age"""
+        db = make_db({'items': {'d1': {'price': 25, 'quantity': 1}}})
+        self.assertEqual(self.cache.get(db, 'user1')['total'], 25)
+
+        cart_ref = db.collection.return_value.document.return_value
+        cart_ref.get.return_value = make_cart_doc({'items': {'d1': {'price': 25, 'quantity': 3}}})
+        self.now += 1
+        self.assertEqual(self.cache.get(db, 'user1')['total'], 25)
+        self.now += 2
+        self.assertEqual(self.cache.get(db, 'user1')['total'], 75)
+        self.assertEqual(cart_ref.get.call_count, 2)
+
+    def test_reads_include_unwritten_changes(self):
+        """The cart is read once and served with pending changes applied"""
+        db = make_db({'items': {'d1': {'price': 25, 'quantity': 1, 'addedAt': '2026-10-16T10:00:00'}}})
+        self.cache.add(db, 'user1', 'd1', 2, COUSCOUS)
+        self.cache.add(db, 'user1', 'd2', 1, {'dishName': 'Brik', 'price': 4})
+
+        first = self.cache.get(db, 'user1')
+        with patch('app.services.cart_store.write_changes'):
+            self.cache.flush('user1')
+        second = self.cache.get(db, 'user1')
+
+        self.assertEqual(first, second)
+        self.assertEqual([(item['dishId'], item['quantity']) for item in first['items']],
+                         [('d1', 3), ('d2', 1)])
+        self.assertEqual(first['total'], 79)
+        db.collection.return_value.document.return_value.get.assert_called_once()
+
+    def test_add_after_remove_rewrites_the_line(self):
+        """A removal followed by an add writes the new line, not an increment"""
+        db = make_db({'items': {'d1': {'price': 25, 'quantity': 4, 'addedAt': '2026-10-16T10:00:00'}}})
+        self.cache.remove(db, 'user1', 'd1')
+        self.cache.add(db, 'user1', 'd1', 1, COUSCOUS)
+
+        with patch('app.services.cart_store.write_changes') as mock_write:
+            self.cache.flush('user1')
+        change = mock_write.call_args[0][2]['d1']
+        self.assertEqual((change[0], change[1]['quantity']), ('set', 1))
+
+    def test_adding_a_stored_dish_again_keeps_its_line(self):
+        """A repeat add bumps the quantity in the cache and in Firestore alike"""
+        db = make_store_db(None)
+        with patch('app.services.cart_store.firestore.Increment', side_effect=lambda n: ('inc', n)):
+            self.cache.add(db, 'user1', 'd1', 1, COUSCOUS)
+            self.cache.flush('user1')
+            self.cache.add(db, 'user1', 'd1', 1, dict(COUSCOUS, price=30))
+            self.cache.add(db, 'user1', 'd2', 1, {'dishName': 'Brik', 'price': 4})
+            self.cache.flush('user1')
+
+        cart_ref = db.collection.return_value.document.return_value
+        self.assertEqual(cart_ref.set.call_args[0][0]['items']['d1'], {'quantity': ('inc', 1)})
+        cached = self.cache.get(db, 'user1')
+        self.now += 3
+        reloaded = self.cache.get(db, 'user1')
+        self.assertEqual(cached, reloaded)
+        self.assertEqual([(item['dishId'], item['quantity'], item['price']) for item in reloaded['items']],
+                         [('d1', 2, 25), ('d2', 1, 4)])
+
+    def test_without_write_behind_changes_are_written_at_once(self):
+        """Each mutation is one write made before it returns and each read goes to Firestore"""
+        cache = CartCache(write_behind=False)
+        db = make_db({'items': {'d1': {'price': 25, 'quantity': 1, 'addedAt': '2026-10-16T10:00:00'}}})
+        with patch('app.services.cart_store.firestore.Increment', side_effect=lambda n: ('inc', n)):
+            cache.add(db, 'user1', 'd1', 2, COUSCOUS)
+        cache.set_quantity(db, 'user1', 'd1', 4)
+        cache.remove(db, 'user1', 'd1')
+
+        cart_ref = db.collection.return_value.document.return_value
+        cart_ref.get.assert_not_called()
+        self.assertEqual(cart_ref.set.call_args[0][0]['items']['d1']['quantity'], ('inc', 2))
+        self.assertEqual(cart_ref.update.call_count, 2)
+        self.assertIsNone(cache._carts['user1'].timer)
+        self.assertEqual(cache._carts['user1'].pending, {})
+
+        cache.get(db, 'user1')
+        cache.get(db, 'user1')
+        self.assertEqual(cart_ref.get.call_count, 2)
+
+    def test_missing_cart_or_item(self):
+        """Changing a missing cart or item raises CartNotFoundError"""
+        with self.assertRaises(CartNotFoundError):
+            self.cache.set_quantity(make_db(None), 'user1', 'd1', 2)
+        db = make_db({'items': {'d1': {'price': 25, 'quantity': 1}}})
+        with self.assertRaises(CartNotFoundError):
+            self.cache.set_quantity(db, 'user2', 'd9', 2)
+
+    def test_failed_flush_keeps_changes(self):
+        """Changes survive a failed write and go out with later ones"""
+        db = make_db(None)
+        self.cache.add(db, 'user1', 'd1', 1, COUSCOUS)
+        with patch('app.services.cart_store.write_changes', side_effect=RuntimeError('unavailable')):
+            with self.assertRaises(RuntimeError):
+                self.cache.flush('user1')
+        self.cache.add(db, 'user1', 'd1', 2, COUSCOUS)
+
+        with patch('app.services.cart_store.write_changes') as mock_write:
+            self.cache.flush('user1')
+        self.assertEqual(mock_write.call_args[0][2]['d1'][:2], ('add', 3))
+
+    def test_clear_drops_pending_changes(self):
+        """Clearing deletes the cart and nothing is written after it"""
+        db = make_db(None)
+        self.cache.add(db, 'user1', 'd1', 1, COUSCOUS)
+        self.cache.clear(db, 'user1')
+
+        with patch('app.services.cart_store.write_changes') as mock_write:
+            self.cache.flush('user1')
+        mock_write.assert_not_called()
+        db.collection.return_value.document.return_value.delete.assert_called_once()
+        self.assertEqual(self.cache.get(db, 'user1')['items'], [])
+
+
+class TestCartRoutes(unittest.TestCase):
+
+    def setUp(self):
+        """Set up test client (with a fresh per-IP rate limit window: the suite shares one)"""
+        request_counts.clear()
+        self.app = create_app()
+        self.client = self.app.test_client()
+        self.app.config['TESTING'] = True
+        self.auth_headers = {
+            'Authorization': 'Bearer mock-token',
+            'Content-Type': 'application/json'
+        }
+        self.cache = CartCache(flush_delay=60)
+        patcher = patch('app.routes.cart_routes.cart_cache', self.cache)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def tearDown(self):
+        for entry in self.cache._carts.values():
+            if entry.timer is not None:
+                entry.timer.cancel()
+
+    @patch('app.routes.cart_routes.get_db')
+    @patch('app.routes.auth_routes.verify_token')
+    def test_get_cart_converts_legacy_list(self, mock_verify, mock_get_db):
+        """A cart stored as a list is returned as before and rewritten as a map"""
+        mock_verify.return_value = {'uid': 'user1'}
+        mock_db = make_db({'items': [{'dishId': 'd1', 'price': 25, 'quantity': 2}], 'total': 50})
+        mock_get_db.return_value = mock_db
+
+        response = self.client.get('/api/cart/', headers=self.auth_headers)
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.get_json()['total'], 50)
+        cart_ref = mock_db.collection.return_value.document.return_value
+        self.assertEqual(cart_ref.set.call_args[0][0]['items'], {'d1': {'price': 25, 'quantity': 2}})
+
+    @patch('app.routes.cart_routes.get_db')
+    @patch('app.routes.auth_routes.verify_token')
+    def test_add_is_served_without_firestore(self, mock_verify, mock_get_db):
+        """Adds with dish details touch neither the cart document nor the dish"""
+        mock_verify.return_value = {'uid': 'user1'}
+        mock_db = make_db(None)
+        mock_get_db.return_value = mock_db
+
+        for _ in range(3):
+            response = self.client.post('/api/cart/add', headers=self.auth_headers, json={
+                'dishId': 'd1', 'dishName': 'Couscous', 'price': 25, 'quantity': 1,
+            })
+            self.assertEqual(response.status_code, 200)
+
+        cart_ref = mock_db.collection.return_value.document.return_value
+        cart_ref.get.assert_not_called()
+        cart_ref.set.assert_not_called()
+        self.assertEqual(self.client.get('/api/cart/', headers=self.auth_headers).get_json()['total'], 75)
+
+    @patch('app.routes.cart_routes.get_db')
+    @patch('app.routes.auth_routes.verify_token')
+    def test_write_through_mutations_do_not_read(self, mock_verify, mock_get_db):
+        """Without write-behind, add, update and remove are one write each and no cart read"""
+        mock_verify.return_value = {'uid': 'user1'}
+        mock_db = make_db({'items': {'d1': {'price': 25, 'quantity': 1}}})
+        mock_get_db.return_value = mock_db
+        cart_ref = mock_db.collection.return_value.document.return_value
+
+        with patch('app.routes.cart_routes.cart_cache', CartCache(write_behind=False)):
+            responses = [
+                self.client.post('/api/cart/add', headers=self.auth_headers, json={
+                    'dishId': 'd2', 'dishName': 'Brik', 'price': 4, 'quantity': 1,
+                }),
+                self.client.put('/api/cart/update', headers=self.auth_headers,
+                                json={'dishId': 'd1', 'quantity': 3}),
+                self.client.delete('/api/cart/remove/d1', headers=self.auth_headers),
+            ]
+            cart_ref.update.side_effect = NotFound('no cart')
+            missing = self.client.put('/api/cart/update', headers=self.auth_headers,
+                                      json={'dishId': 'd1', 'quantity': 3})
+
+        self.assertEqual([response.status_code for response in responses], [200, 200, 200])
+        self.assertEqual(missing.status_code, 404)
+        cart_ref.get.assert_not_called()
+        self.assertEqual((cart_ref.set.call_count, cart_ref.update.call_count), (1, 3))
+
+    @patch('app.routes.cart_routes.get_db')
+    @patch('app.routes.auth_routes.verify_token')
+    def test_update_missing_item(self, mock_verify, mock_get_db):
+        """Updating an item that is not in the cart is a 404"""
+        mock_verify.return_value = {'uid': 'user1'}
+        mock_get_db.return_value = make_db({'items': {'d1': {'price': 25, 'quantity': 1}}})
+
+        response = self.client.put('/api/cart/update', headers=self.auth_headers,
+                                   json={'dishId': 'd2', 'quantity': 2})
+
+        self.assertEqual(response.status_code, 404)
+        self.assertEqual(response.get_json()['error'], 'Item not in cart')
+
+
+class TestCartCheckout(unittest.TestCase):
+
+    def setUp(self):
+        """Set up test client (with a fresh per-IP rate limit window: the suite shares one)"""
+        request_counts.clear()
+        self.app = create_app()
+        self.client = self.app.test_client()
+        self.app.config['TESTING'] = True
+        self.auth_headers = {
+            'Authorization': 'Bearer mock-token',
+            'Content-Type': 'application/json'
+        }
+        self.cache = CartCache(flush_delay=60)
+        patcher = patch('app.routes.cart_routes.cart_cache', self.cache)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def tearDown(self):
+        for entry in self.cache._carts.values():
+            if entry.timer is not None:
+                entry.timer.cancel()
+
+    def checkout(self, mock_db, cart):
+        cart_ref = mock_db.collection.return_value.document.return_value
+        cart_ref.id = 'order123'
+        cart_ref.get.return_value = make_cart_doc(cart)
+        mock_db.get_all.side_effect = lambda refs, transaction=None: [
+            make_snapshot(dish_id, DISHES.get(dish_id)) for dish_id in ('d1', 'd2')]
+        return self.client.post('/api/cart/checkout', headers=self.auth_headers,
+                                json={'deliveryAddress': 'Tunis'})
+
+    @patch('app.routes.order_routes.handle_order_status_change')
+    @patch('app.services.order_service.firestore.transactional', side_effect=lambda fn: fn)
+    @patch('app.routes.cart_routes.get_db')
+    @patch('app.routes.auth_routes.verify_token')
+    def test_checkout_orders_and_clears_cart_in_one_transaction(self, mock_verify, mock_get_db,
+                                                                  mock_transactional, mock_notify):
+        """The cart is read, ordered and deleted in the same transaction"""
+        mock_verify.return_value = {'uid': 'user1'}
+        mock_db = MagicMock()
+        mock_get_db.return_value = mock_db
+
+        response = self.checkout(mock_db, {'items': {
+            'd1': {'price': 25, 'quantity': 2, 'addedAt': '2026-10-16T10:00:00'},
+            'd2': {'price': 4, 'quantity': 1, 'addedAt': '2026-10-16T10:01:00'},
+        }})
+
+        self.assertEqual(response.status_code, 201)
+        body = response.get_json()
+        self.assertEqual(body['total'], 57.0)
+        self.assertEqual(len(body['orderIds']), 2)
+        transaction = mock_db.transaction.return_value
+        cart_ref = mock_db.collection.return_value.document.return_value
+        cart_ref.get.assert_called_once_with(transaction=transaction)
+        mock_db.get_all.assert_called_once()
+        transaction.delete.assert_called_once_with(cart_ref)
+
+    @patch('app.services.order_service.firestore.transactional', side_effect=lambda fn: fn)
+    @patch('app.routes.cart_routes.get_db')
+    @patch('app.routes.auth_routes.verify_token')
+    def test_checkout_rejects_empty_and_stale_carts(self, mock_verify, mock_get_db, mock_transactional):
+        """No order is written for an empty cart or one with a missing dish"""
+        mock_verify.return_value = {'uid': 'user1'}
+        mock_db = MagicMock()
+        mock_get_db.return_value = mock_db
+
+        response = self.checkout(mock_db, None)
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.get_json()['error'], 'Cart is empty')
+
+        response = self.checkout(mock_db, {'items': {'d9': {'price': 20, 'quantity': 1}}})
+        self.assertEqual(response.status_code, 409)
+        self.assertEqual(response.get_json()['staleItems'][0]['reason'], 'not_found')
+
+        transaction = mock_db.transaction.return_value
+        transaction.set.assert_not_called()
+        transaction.delete.assert_not_called()
+
+    @patch('app.routes.order_routes.handle_order_status_change')
+    @patch('app.services.order_service.firestore.transactional', side_effect=lambda fn: fn)
+    @patch('app.routes.cart_routes.get_db')
+    @patch('app.routes.auth_routes.verify_token')
+    def test_checkout_refreshes_repriced_lines(self, mock_verify, mock_get_db, mock_transactional, mock_notify):
+        """A repriced dish fails the checkout once with its current price, written to the cart"""
+        mock_verify.return_value = {'uid': 'user1'}
+        mock_db = MagicMock()
+        mock_get_db.return_value = mock_db
+
+        response = self.checkout(mock_db, {'items': {
+            'd1': {'price': 20, 'quantity': 1, 'addedAt': '2026-10-16T10:00:00'},
+            'd2': {'price': 4, 'quantity': 1, 'addedAt': '2026-10-16T10:01:00'},
+        }})
+
+        self.assertEqual(response.status_code, 409)
+        self.assertEqual(response.get_json()['staleItems'],
+                         [{'dishId': 'd1', 'reason': 'price_changed', 'currentPrice': 25.0}])
+        transaction = mock_db.transaction.return_value
+        cart_ref = mock_db.collection.return_value.document.return_value
+        transaction.set.assert_called_once_with(cart_ref, {'items': {'d1': {'price': 25.0}}}, merge=True)
+        transaction.delete.assert_not_called()
+
+        # Checking out again with the refreshed cart orders at the current price
+        response = self.checkout(mock_db, {'items': {
+            'd1': {'price': 25.0, 'quantity': 1, 'addedAt': '2026-10-16T10:00:00'},
+            'd2': {'price': 4, 'quantity': 1, 'addedAt': '2026-10-16T10:01:00'},
+        }})
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(response.get_json()['total'], 32.0)
+
+    @patch('app.routes.order_routes.handle_order_status_change')
+    @patch('app.services.order_service.firestore.transactional', side_effect=lambda fn: fn)
+    @patch('app.routes.cart_routes.get_db')
+    @patch('app.routes.auth_routes.verify_token')
+    def test_checkout_flushes_cached_changes_first(self, mock_verify, mock_get_db,
+                                                   mock_transactional, mock_notify):
+        """Unwritten cart changes reach Firestore before the checkout reads the cart"""
+        mock_verify.return_value = {'uid': 'user1'}
+        mock_db = MagicMock()
+        mock_get_db.return_value = mock_db
+        self.client.post('/api/cart/add', headers=self.auth_headers, json={
+            'dishId': 'd1', 'dishName': 'Couscous', 'price': 25, 'quantity': 1,
+        })
+
+        response = self.checkout(mock_db, {'items': {'d1': {'price': 25, 'quantity': 1}}})
+
+        self.assertEqual(response.status_code, 201)
+        cart_ref = mock_db.collection.return_value.document.return_value
+        self.assertEqual(cart_ref.set.call_args[1], {'merge': True})
+        self.assertEqual(self.cache._carts['user1'].pending, {})
+        # The cached cart is read again after checkout
+        self.assertIsNone(self.cache._carts['user1'].lines)
+
+
+if __name__ == '__main__':
+    unittest.main()
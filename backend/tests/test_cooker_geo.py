@@ -0,0 +1,147 @@
+"""
+Unit Tests for Cooker Delivery Area Index
+==========================================
+Tests the grid index over delivery areas and the `near` filters
+"""
+
+import unittest
+from unittest.mock import patch
+import sys
+import os
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from application import create_app
+from app.services.cooker_geo import CookerGeoIndex, haversine_km, parse_point
+from tests.helpers import build_registry, build_catalog
+
+
+TUNIS = (36.8065, 10.1815)
+LA_MARSA = (36.8782, 10.3247)   # ~15 km from Tunis centre
+SFAX = (34.7406, 10.7603)       # ~235 km away
+
+SAMPLE_COOKERS = {
+    'chef_tunis': {'name': 'Chef Ali', 'lat': TUNIS[0], 'lng': TUNIS[1],
+                   'deliverySettings': {'offersDelivery': True, 'deliveryRadius': 5}},
+    'chef_marsa': {'name': 'Chef Sarra', 'location': {'lat': LA_MARSA[0], 'lng': LA_MARSA[1]},
+                   'deliverySettings': {'offersDelivery': True, 'deliveryRadius': 20}},
+    'chef_sfax': {'name': 'Chef Mariem', 'lat': SFAX[0], 'lng': SFAX[1]},
+    'chef_pickup': {'name': 'Chef Hedi', 'lat': TUNIS[0], 'lng': TUNIS[1],
+                    'deliverySettings': {'offersDelivery': False}},
+    'chef_nowhere': {'name': 'Chef Amel'},
+}
+
+
+class TestCookerGeoIndex(unittest.TestCase):
+
+    def setUp(self):
+        self.geo = CookerGeoIndex()
+        self.registry = build_registry(SAMPLE_COOKERS, self.geo)
+
+    def test_haversine(self):
+        """Distances are in km"""
+        self.assertAlmostEqual(haversine_km(*TUNIS, *SFAX), 235, delta=10)
+        self.assertEqual(haversine_km(*TUNIS, *TUNIS), 0)
+
+    def test_parse_point(self):
+        """near values must be lat,lng"""
+        self.assertEqual(parse_point('36.8,10.18'), (36.8, 10.18))
+        for value in ['', '36.8', 'a,b', '95,10', '36.8,10.1,3']:
+            with self.assertRaises(ValueError):
+                parse_point(value)
+
+    def test_delivery_radius_respected(self):
+        """Only cookers whose delivery disc contains the point match"""
+        self.assertEqual(sorted(self.geo.delivering_to(*TUNIS)), ['chef_marsa', 'chef_tunis'])
+        self.assertEqual(sorted(self.geo.delivering_to(*LA_MARSA)), ['chef_marsa'])
+        self.assertEqual(sorted(self.geo.delivering_to(*SFAX)), ['chef_sfax'])
+
+    def test_distances_returned(self):
+        """Matches carry their distance in km"""
+        distances = self.geo.delivering_to(*TUNIS)
+        self.assertEqual(distances['chef_tunis'], 0)
+        self.assertAlmostEqual(distances['chef_marsa'], 15, delta=2)
+
+    def test_follows_registry_changes(self):
+        """Going offline or moving updates the index"""
+        self.registry.update('chef_tunis', {'isActive': False})
+        self.assertNotIn('chef_tunis', self.geo.delivering_to(*TUNIS))
+
+        self.registry.update('chef_sfax', {'lat': TUNIS[0], 'lng': TUNIS[1]})
+        self.assertIn('chef_sfax', self.geo.delivering_to(*TUNIS))
+        self.assertNotIn('chef_sfax', self.geo.delivering_to(*SFAX))
+
+
+class TestNearRoutes(unittest.TestCase):
+
+    def setUp(self):
+        """Set up test client with populated registry, geo index and catalog"""
+        self.app = create_app()
+        self.client = self.app.test_client()
+        self.app.config['TESTING'] = True
+
+        self.geo = CookerGeoIndex()
+        self.registry = build_registry(SAMPLE_COOKERS, self.geo)
+        dishes = {
+            'd1': {'name': 'Couscous', 'cookerId': 'chef_tunis', 'isAvailable': True,
+                   'createdAt': '2024-01-03T10:00:00'},
+            'd2': {'name': 'Brik', 'cookerId': 'chef_marsa', 'isAvailable': True,
+                   'createdAt': '2024-01-02T10:00:00'},
+            'd3': {'name': 'Lablabi', 'cookerId': 'chef_sfax', 'isAvailable': True,
+                   'createdAt': '2024-01-01T10:00:00'},
+        }
+        self.catalog = build_catalog(dishes)
+
+        self.patches = [
+            patch('app.routes.dish_routes.cooker_registry', self.registry),
+            patch('app.routes.dish_routes.cooker_geo', self.geo),
+            patch('app.routes.dish_routes.dish_catalog', self.catalog),
+            patch('app.routes.cooker_routes.cooker_registry', self.registry),
+            patch('app.routes.cooker_routes.cooker_geo', self.geo),
+        ]
+        for p in self.patches:
+            p.start()
+
+    def tearDown(self):
+        for p in self.patches:
+            p.stop()
+
+    def test_dishes_near(self):
+        """near keeps dishes from chefs delivering to the point"""
+        response = self.client.get('/api/dishes/?near=36.8065,10.1815')
+
+        self.assertEqual(response.status_code, 200)
+        dishes = response.get_json()['dishes']
+        self.assertEqual([dish['id'] for dish in dishes], ['d1', 'd2'])
+        self.assertEqual(dishes[0]['distanceKm'], 0)
+
+    def test_dishes_near_with_cursor(self):
+        """Keyset pages honour the near filter"""
+        response = self.client.get('/api/dishes/?near=34.7406,10.7603&cursor=')
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([dish['id'] for dish in response.get_json()['dishes']], ['d3'])
+
+    def test_invalid_near(self):
+        """A malformed near point is rejected"""
+        response = self.client.get('/api/dishes/?near=tunis')
+        self.assertEqual(response.status_code, 400)
+
+    def test_cookers_near_sorted_by_distance(self):
+        """Cooker listing with near is nearest first"""
+        response = self.client.get('/api/cookers/?near=36.8065,10.1815')
+
+        self.assertEqual(response.status_code, 200)
+        cookers = response.get_json()['cookers']
+        self.assertEqual([cooker['id'] for cooker in cookers], ['chef_tunis', 'chef_marsa'])
+        self.assertNotIn('phone', cookers[0])
+
+    def test_cookers_listing(self):
+        """Without near, every active cooker is listed"""
+        response = self.client.get('/api/cookers/')
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.get_json()['count'], len(SAMPLE_COOKERS))
+
+
+if __name__ == '__main__':
+    unittest.main()
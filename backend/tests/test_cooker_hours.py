@@ -0,0 +1,133 @@
+"""
+Unit Tests for Cooker Working Hours Index
+=========================================
+Tests schedule compilation, the per-weekday timeline and openNow filters
+"""
+
+import unittest
+from datetime import datetime, timezone
+from unittest.mock import patch
+import sys
+import os
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from application import create_app
+from app.services.cooker_hours import CookerHoursIndex, compile_schedule, parse_time
+from tests.helpers import build_registry, build_catalog
+
+
+def week(open_time, close_time, closed=()):
+    return {day: {'open': open_time, 'close': close_time, 'isOpen': day not in closed}
+            for day in ['monday', 'tuesday', 'wednesday', 'thursday', 'friday', 'saturday', 'sunday']}
+
+
+SAMPLE_COOKERS = {
+    'day_chef': {'name': 'Chef Ali', 'workingHours': week('09:00', '17:00', closed=['sunday'])},
+    'night_chef': {'name': 'Chef Sarra', 'workingHours': week('18:00', '02:00')},
+    'legacy_chef': {'name': 'Chef Mariem'},
+}
+
+# 2024-01-01 is a Monday
+MONDAY_NOON = datetime(2024, 1, 1, 12, 0)
+MONDAY_NIGHT = datetime(2024, 1, 1, 23, 30)
+TUESDAY_EARLY = datetime(2024, 1, 2, 1, 0)
+SUNDAY_NOON = datetime(2024, 1, 7, 12, 0)
+
+
+class TestCookerHoursIndex(unittest.TestCase):
+
+    def setUp(self):
+        self.hours = CookerHoursIndex()
+        self.registry = build_registry(SAMPLE_COOKERS, self.hours)
+
+    def test_parse_time(self):
+        """HH:MM strings become minutes since midnight"""
+        self.assertEqual(parse_time('09:30'), 570)
+        self.assertEqual(parse_time('24:00'), 1440)
+        self.assertIsNone(parse_time('25:00'))
+        self.assertIsNone(parse_time('noon'))
+
+    def test_overnight_split(self):
+        """Closing after midnight spills into the next day"""
+        schedule = compile_schedule({'saturday': {'open': '20:00', 'close': '01:00', 'isOpen': True}})
+        self.assertEqual(schedule, {5: [(1200, 1440)], 6: [(0, 60)]})
+
+    def test_open_at(self):
+        """Lookups follow each cooker's weekly schedule"""
+        self.assertEqual(self.hours.open_at(MONDAY_NOON), {'day_chef', 'legacy_chef'})
+        self.assertEqual(self.hours.open_at(MONDAY_NIGHT), {'night_chef', 'legacy_chef'})
+        self.assertEqual(self.hours.open_at(TUESDAY_EARLY), {'night_chef', 'legacy_chef'})
+        self.assertEqual(self.hours.open_at(SUNDAY_NOON), {'legacy_chef'})
+
+    def test_aware_times_use_tunis_time(self):
+        """UTC times are converted to Africa/Tunis (UTC+1)"""
+        self.assertIn('day_chef', self.hours.open_at(datetime(2024, 1, 1, 15, 30, tzinfo=timezone.utc)))
+        self.assertNotIn('day_chef', self.hours.open_at(datetime(2024, 1, 1, 16, 0, tzinfo=timezone.utc)))
+
+    def test_follows_profile_edits(self):
+        """Edited hours and going offline are reflected"""
+        self.registry.update('day_chef', {'workingHours': week('13:00', '15:00')})
+        self.assertNotIn('day_chef', self.hours.open_at(MONDAY_NOON))
+        self.assertIn('day_chef', self.hours.open_at(SUNDAY_NOON.replace(hour=14)))
+
+        self.registry.update('legacy_chef', {'isActive': False})
+        self.assertEqual(self.hours.open_at(SUNDAY_NOON), frozenset())
+
+
+class TestOpenNowRoutes(unittest.TestCase):
+
+    def setUp(self):
+        """Set up test client with populated registry, hours index and catalog"""
+        self.app = create_app()
+        self.client = self.app.test_client()
+        self.app.config['TESTING'] = True
+
+        self.hours = CookerHoursIndex()
+        self.registry = build_registry(SAMPLE_COOKERS, self.hours)
+        dishes = {
+            'd1': {'name': 'Couscous', 'cookerId': 'day_chef', 'isAvailable': True,
+                   'createdAt': '2024-01-03T10:00:00'},
+            'd2': {'name': 'Brik', 'cookerId': 'night_chef', 'isAvailable': True,
+                   'createdAt': '2024-01-02T10:00:00'},
+        }
+        self.catalog = build_catalog(dishes)
+
+        self.patches = [
+            patch('app.routes.dish_routes.cooker_registry', self.registry),
+            patch('app.routes.dish_routes.cooker_hours', self.hours),
+            patch('app.routes.dish_routes.dish_catalog', self.catalog),
+            patch('app.routes.cooker_routes.cooker_registry', self.registry),
+            patch('app.routes.cooker_routes.cooker_hours', self.hours),
+            patch('app.services.cooker_hours.local_now', return_value=MONDAY_NOON),
+        ]
+        for p in self.patches:
+            p.start()
+
+    def tearDown(self):
+        for p in self.patches:
+            p.stop()
+
+    def test_dishes_open_now(self):
+        """openNow hides dishes from closed kitchens"""
+        response = self.client.get('/api/dishes/?openNow=true')
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([dish['id'] for dish in response.get_json()['dishes']], ['d1'])
+
+    def test_dishes_open_now_with_cursor(self):
+        """Keyset pages honour openNow"""
+        response = self.client.get('/api/dishes/?openNow=true&cursor=')
+
+        self.assertEqual([dish['id'] for dish in response.get_json()['dishes']], ['d1'])
+
+    def test_cookers_open_now(self):
+        """Cooker listing honours openNow"""
+        response = self.client.get('/api/cookers/?openNow=true')
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(sorted(cooker['id'] for cooker in response.get_json()['cookers']),
+                         ['day_chef', 'legacy_chef'])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,99 @@
+"""
+Unit Tests for Cooker Registry
+===============================
+Tests the live cooker mirror and its per-cooker updates from write paths
+"""
+
+import unittest
+from unittest.mock import patch, MagicMock
+import sys
+import os
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from application import create_app
+from tests.helpers import make_doc, make_change, build_registry
+
+
+SAMPLE_COOKERS = {
+    'chef1': {'name': 'Chef Ali', 'isActive': True},
+    'chef2': {'name': 'Chef Sarra'},
+    'chef3': {'name': 'Chef Mariem', 'isActive': False},
+}
+
+
+class TestCookerRegistry(unittest.TestCase):
+
+    def setUp(self):
+        self.registry = build_registry(SAMPLE_COOKERS)
+
+    def test_active_map(self):
+        """Cookers without isActive count as active"""
+        self.assertEqual(sorted(self.registry.active()), ['chef1', 'chef2'])
+
+    def test_listener_change_applies_to_one_entry(self):
+        """A snapshot change flips a single cooker"""
+        offline = make_doc('chef1', dict(SAMPLE_COOKERS['chef1'], isActive=False))
+        self.registry._on_snapshot([], [make_change('MODIFIED', offline)], None)
+        self.assertEqual(sorted(self.registry.active()), ['chef2'])
+        self.assertEqual(self.registry.get('chef1')['name'], 'Chef Ali')
+
+    def test_active_map_is_copy_on_write(self):
+        """Maps handed to readers are never changed under them"""
+        before = self.registry.active()
+        self.registry.update('chef3', {'isActive': True})
+        self.assertEqual(sorted(before), ['chef1', 'chef2'])
+        self.assertEqual(sorted(self.registry.active()), ['chef1', 'chef2', 'chef3'])
+
+    def test_removed_cooker(self):
+        """Removed cookers disappear from the active map"""
+        self.registry.remove('chef2')
+        self.assertFalse(self.registry.is_active('chef2'))
+        self.assertIsNone(self.registry.get('chef2'))
+
+
+class TestCookerWritePaths(unittest.TestCase):
+
+    def setUp(self):
+        """Set up test client with a populated registry"""
+        self.app = create_app()
+        self.client = self.app.test_client()
+        self.app.config['TESTING'] = True
+
+        self.registry = build_registry(SAMPLE_COOKERS)
+
+    @patch('app.routes.cooker_routes.db')
+    def test_toggle_availability_hides_cooker_immediately(self, mock_db):
+        """Going offline is visible without waiting for a reload"""
+        with patch('app.routes.cooker_routes.cooker_registry', self.registry):
+            response = self.client.put('/api/cookers/availability', json={'userId': 'chef1', 'isActive': False})
+
+        self.assertEqual(response.status_code, 200)
+        self.assertFalse(self.registry.is_active('chef1'))
+        mock_db.collection.return_value.document.return_value.update.assert_called_once()
+
+    @patch('app.routes.cooker_routes.db')
+    def test_profile_update_reaches_registry(self, mock_db):
+        """Profile edits update the cooker's entry"""
+        cooker_doc = MagicMock()
+        cooker_doc.exists = True
+        mock_db.collection.return_value.document.return_value.get.return_value = cooker_doc
+
+        with patch('app.routes.cooker_routes.cooker_registry', self.registry):
+            response = self.client.put('/api/cookers/profile', json={'userId': 'chef2', 'name': 'Sarra B.'})
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(self.registry.active()['chef2']['name'], 'Sarra B.')
+
+    def test_dish_routes_read_registry(self):
+        """get_active_cookers answers from the registry without streaming cookers"""
+        from app.routes import dish_routes
+        with patch.object(dish_routes, 'cooker_registry', self.registry), \
+             patch.object(dish_routes, 'db') as mock_db:
+            active = dish_routes.get_active_cookers()
+
+        self.assertEqual(sorted(active), ['chef1', 'chef2'])
+        mock_db.collection.assert_not_called()
+
+
+if __name__ == '__main__':
+    unittest.main()
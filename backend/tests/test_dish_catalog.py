@@ -0,0 +1,340 @@
+"""
+Unit Tests for Dish Catalog Index
+==================================
+Tests the in-memory dish index and the listing routes built on it
+"""
+
+import unittest
+from datetime import datetime, timezone
+from unittest.mock import patch, MagicMock
+import sys
+import os
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from application import create_app
+from app.services.dish_catalog import DishCatalog, created_sort_value, order_key
+from app.services.popular_dishes import PopularDishesIndex
+from app.utils.cursor import encode_cursor, decode_cursor
+from tests.helpers import make_doc, make_change, build_catalog
+
+
+SAMPLE_DISHES = {
+    'd1': {'name': 'Couscous', 'category': 'couscous', 'cookerId': 'chef1',
+           'isAvailable': True, 'createdAt': '2024-01-01T10:00:00', 'ordersCount': 5},
+    'd2': {'name': 'Makroudh', 'category': 'desserts', 'cookerId': 'chef2',
+           'isAvailable': True, 'createdAt': '2024-03-01T10:00:00', 'ordersCount': 9},
+    'd3': {'name': 'Ojja', 'category': 'traditional', 'cookerId': 'chef1',
+           'isAvailable': False, 'createdAt': '2024-02-01T10:00:00', 'ordersCount': 1},
+}
+
+
+MIXED_DISHES = {
+    # createdAt as written by the seed script (timestamps) and by the API (ISO strings)
+    'm1': {'cookerId': 'chef1', 'isAvailable': True, 'createdAt': datetime(2024, 1, 5, tzinfo=timezone.utc)},
+    'm2': {'cookerId': 'chef1', 'isAvailable': True, 'createdAt': '2024-01-04T00:00:00'},
+    'm3': {'cookerId': 'chef2', 'isAvailable': True, 'createdAt': datetime(2024, 1, 3, tzinfo=timezone.utc)},
+    'm4': {'cookerId': 'chef2', 'isAvailable': True, 'createdAt': '2024-01-03T00:00:00'},
+    'm5': {'cookerId': 'chef1', 'isAvailable': True, 'createdAt': '2024-01-01T12:30:00.500000'},
+}
+
+
+def firestore_value(value):
+    """Firestore orders values by type first: timestamps before strings"""
+    return (0, value) if isinstance(value, datetime) else (1, value)
+
+
+class FakeDishQuery:
+    """
+    Dish query over in-memory docs with Firestore's typed semantics: range
+    filters only match their own type, ordering is createdAt desc then id
+    """
+
+    def __init__(self, docs, filters=(), after=None, count=None):
+        self.docs = docs
+        self.filters = filters
+        self.after = after
+        self.count = count
+
+    def where(self, field, op, value):
+        return FakeDishQuery(self.docs, self.filters + ((field, op, value),), self.after, self.count)
+
+    def order_by(self, field, direction=None):
+        return self
+
+    def start_after(self, values):
+        after = (firestore_value(values['createdAt']), values['__name__'])
+        return FakeDishQuery(self.docs, self.filters, after, self.count)
+
+    def limit(self, count):
+        return FakeDishQuery(self.docs, self.filters, self.after, count)
+
+    def stream(self):
+        rows = []
+        for doc_id, dish in self.docs.items():
+            matches = True
+            for field, op, value in self.filters:
+                actual = dish.get(field)
+                if op == '==':
+                    matches = matches and actual == value
+                else:
+                    matches = matches and type(actual) is type(value) and actual >= value
+            if matches:
+                rows.append((firestore_value(dish['createdAt']), doc_id))
+        rows.sort(key=lambda row: row[1])
+        rows.sort(key=lambda row: row[0], reverse=True)
+        if self.after:
+            rows = [row for row in rows if row[0] < self.after[0] or (row[0] == self.after[0] and row[1] > self.after[1])]
+        return iter([make_doc(doc_id, dict(self.docs[doc_id])) for _, doc_id in rows[:self.count]])
+
+
+class TestDishCatalog(unittest.TestCase):
+
+    def setUp(self):
+        self.catalog = build_catalog(SAMPLE_DISHES)
+
+    def test_initial_snapshot_orders_newest_first(self):
+        """Available dishes come back newest first"""
+        ids = [dish['id'] for dish in self.catalog.list_dishes()]
+        self.assertEqual(ids, ['d2', 'd1'])
+
+    def test_include_unavailable(self):
+        """available_only=False includes unavailable dishes"""
+        ids = [dish['id'] for dish in self.catalog.list_dishes(available_only=False)]
+        self.assertEqual(ids, ['d2', 'd3', 'd1'])
+
+    def test_filter_by_category_and_cooker(self):
+        """Category (case-insensitive) and cookerId lookups use the indexes"""
+        self.assertEqual([d['id'] for d in self.catalog.list_dishes(category='COUSCOUS')], ['d1'])
+        self.assertEqual([d['id'] for d in self.catalog.list_dishes(cooker_id='chef1')], ['d1'])
+        self.assertEqual(self.catalog.list_dishes(category='desserts', cooker_id='chef1'), [])
+
+    def test_modified_and_removed_changes(self):
+        """Listener changes are applied incrementally"""
+        modified = make_doc('d3', dict(SAMPLE_DISHES['d3'], isAvailable=True))
+        removed = make_doc('d2', SAMPLE_DISHES['d2'])
+        self.catalog._on_snapshot([], [make_change('MODIFIED', modified), make_change('REMOVED', removed)], None)
+
+        ids = [dish['id'] for dish in self.catalog.list_dishes()]
+        self.assertEqual(ids, ['d3', 'd1'])
+        self.assertIsNone(self.catalog.get('d2'))
+
+    def test_update_merges_fields(self):
+        """update() merges fields and re-indexes the dish"""
+        self.catalog.update('d1', {'category': 'traditional'})
+        self.assertEqual([d['id'] for d in self.catalog.list_dishes(category='traditional', available_only=False)], ['d3', 'd1'])
+        self.assertEqual(self.catalog.get('d1')['name'], 'Couscous')
+
+    def test_returned_dishes_are_copies(self):
+        """Callers can decorate results without touching the index"""
+        dish = self.catalog.list_dishes()[0]
+        dish['cookerName'] = 'changed'
+        self.assertNotIn('cookerName', self.catalog.get(dish['id']))
+
+    def test_list_after_key_with_limit(self):
+        """Keyset reads resume after an order key and stop at the limit"""
+        first = self.catalog.list_dishes(limit=1)
+        self.assertEqual([d['id'] for d in first], ['d2'])
+        rest = self.catalog.list_dishes(after=order_key(first[0]['createdAt'], 'd2'))
+        self.assertEqual([d['id'] for d in rest], ['d1'])
+
+    def test_cursor_round_trip(self):
+        """Cursors keep the stored createdAt type"""
+        from datetime import datetime, timezone
+        stamp = datetime(2024, 1, 1, tzinfo=timezone.utc)
+        self.assertEqual(decode_cursor(encode_cursor(stamp, 'a')), (stamp, 'a'))
+        self.assertEqual(decode_cursor(encode_cursor('2024-01-01T10:00:00', 'b')), ('2024-01-01T10:00:00', 'b'))
+        with self.assertRaises(ValueError):
+            decode_cursor('not-a-cursor')
+
+    def test_created_sort_value(self):
+        """createdAt values of every stored type are comparable"""
+        self.assertEqual(created_sort_value(None), 0)
+        self.assertEqual(created_sort_value('not a date'), 0)
+        self.assertGreater(created_sort_value('2024-01-02T00:00:00'), created_sort_value('2024-01-01T00:00:00'))
+
+
+class TestDishListingRoutes(unittest.TestCase):
+
+    def setUp(self):
+        """Set up test client with a populated catalog"""
+        self.app = create_app()
+        self.client = self.app.test_client()
+        self.app.config['TESTING'] = True
+
+        self.catalog = build_catalog(SAMPLE_DISHES)
+
+        self.active_cookers = {
+            'chef1': {'name': 'Chef Ali', 'rating': 4.5},
+            'chef2': {'name': 'Chef Sarra', 'rating': 4.8},
+        }
+
+    def test_get_all_dishes_from_catalog(self):
+        """Listing is served from the catalog and decorated with cooker info"""
+        with patch('app.routes.dish_routes.dish_catalog', self.catalog), \
+             patch('app.routes.dish_routes.get_active_cookers', return_value=self.active_cookers), \
+             patch('app.routes.dish_routes.db') as mock_db:
+            response = self.client.get('/api/dishes/?perPage=1')
+
+        self.assertEqual(response.status_code, 200)
+        data = response.get_json()
+        self.assertEqual(data['total'], 2)
+        self.assertEqual([d['id'] for d in data['dishes']], ['d2'])
+        self.assertEqual(data['dishes'][0]['cookerName'], 'Chef Sarra')
+        mock_db.collection.assert_not_called()
+
+    def test_inactive_cooker_dishes_hidden(self):
+        """Dishes from inactive cookers are skipped"""
+        with patch('app.routes.dish_routes.dish_catalog', self.catalog), \
+             patch('app.routes.dish_routes.get_active_cookers', return_value={'chef1': {'name': 'Chef Ali'}}):
+            response = self.client.get('/api/dishes/')
+
+        data = response.get_json()
+        self.assertEqual([d['id'] for d in data['dishes']], ['d1'])
+
+    def test_cursor_pagination_from_catalog(self):
+        """Cursor pages walk the catalog without overlap"""
+        with patch('app.routes.dish_routes.dish_catalog', self.catalog), \
+             patch('app.routes.dish_routes.get_active_cookers', return_value=self.active_cookers):
+            first = self.client.get('/api/dishes/?cursor=&perPage=1').get_json()
+            second = self.client.get(f"/api/dishes/?cursor={first['nextCursor']}&perPage=1").get_json()
+
+        self.assertEqual([d['id'] for d in first['dishes']], ['d2'])
+        self.assertTrue(first['hasMore'])
+        self.assertEqual([d['id'] for d in second['dishes']], ['d1'])
+        self.assertIsNone(second['nextCursor'])
+
+    def walk(self, catalog, mock_db, per_page=2, cursor=''):
+        """Ids of every page from cursor on"""
+        ids = []
+        while cursor is not None:
+            with patch('app.routes.dish_routes.dish_catalog', catalog), \
+                 patch('app.routes.dish_routes.get_active_cookers', return_value=self.active_cookers), \
+                 patch('app.routes.dish_routes.db', mock_db), \
+                 patch('app.services.live_collection.get_db', return_value=None):
+                data = self.client.get(f'/api/dishes/?cursor={cursor}&perPage={per_page}').get_json()
+            ids += [d['id'] for d in data['dishes']]
+            cursor = data['nextCursor']
+        return ids
+
+    def test_cursor_pagination_from_firestore(self):
+        """Before the catalog is warm, pages come from Firestore in the catalog's order"""
+        mock_db = MagicMock()
+        mock_db.collection.return_value = FakeDishQuery(MIXED_DISHES)
+
+        from_firestore = self.walk(DishCatalog(), mock_db)
+        from_catalog = self.walk(build_catalog(MIXED_DISHES), mock_db)
+
+        self.assertEqual(from_catalog, ['m1', 'm2', 'm3', 'm4', 'm5'])
+        self.assertEqual(from_firestore, from_catalog)
+
+    def test_cursor_carries_across_paths(self):
+        """A cursor from a Firestore page resumes at the same place in the catalog"""
+        mock_db = MagicMock()
+        mock_db.collection.return_value = FakeDishQuery(MIXED_DISHES)
+        with patch('app.routes.dish_routes.dish_catalog', DishCatalog()), \
+             patch('app.routes.dish_routes.get_active_cookers', return_value=self.active_cookers), \
+             patch('app.routes.dish_routes.db', mock_db), \
+             patch('app.services.live_collection.get_db', return_value=None):
+            first = self.client.get('/api/dishes/?cursor=&perPage=3').get_json()
+
+        rest = self.walk(build_catalog(MIXED_DISHES), mock_db, cursor=first['nextCursor'])
+        self.assertEqual([d['id'] for d in first['dishes']] + rest, ['m1', 'm2', 'm3', 'm4', 'm5'])
+
+    def test_category_page_ignores_case(self):
+        """Category pages come from the catalog, warm or not, and match any case"""
+        with patch('app.routes.dish_routes.dish_catalog', self.catalog), \
+             patch.object(self.catalog, 'is_ready', return_value=False), \
+             patch.object(self.catalog, 'ensure_ready') as mock_ready, \
+             patch('app.routes.dish_routes.get_active_cookers', return_value=self.active_cookers), \
+             patch('app.routes.dish_routes.db') as mock_db:
+            response = self.client.get('/api/dishes/?cursor=&category=Desserts')
+
+        self.assertEqual([d['id'] for d in response.get_json()['dishes']], ['d2'])
+        mock_ready.assert_called_once()
+        mock_db.collection.assert_not_called()
+
+    def test_invalid_cursor(self):
+        """Malformed cursors are rejected"""
+        with patch('app.routes.dish_routes.get_active_cookers', return_value=self.active_cookers):
+            response = self.client.get('/api/dishes/?cursor=%%%')
+        self.assertEqual(response.status_code, 400)
+
+    def test_popular_dishes_sorted_by_orders(self):
+        """Popular dishes come from the leaderboard, ordered by ordersCount"""
+        leaderboard = PopularDishesIndex()
+        self.catalog.add_observer(leaderboard)
+        with patch('app.routes.dish_routes.dish_catalog', self.catalog), \
+             patch('app.routes.dish_routes.popular_dishes', leaderboard), \
+             patch('app.routes.dish_routes.get_active_cookers', return_value=self.active_cookers), \
+             patch('app.routes.dish_routes.db') as mock_db:
+            response = self.client.get('/api/dishes/popular?limit=5')
+
+        data = response.get_json()
+        self.assertEqual([d['id'] for d in data['dishes']], ['d2', 'd1'])
+        self.assertEqual(data['dishes'][0]['cookerName'], 'Chef Sarra')
+        mock_db.collection.assert_not_called()
+
+
+class TestPopularDishes(unittest.TestCase):
+
+    def setUp(self):
+        self.catalog = DishCatalog()
+        self.leaderboard = PopularDishesIndex()
+        self.catalog.add_observer(self.leaderboard)
+        for dish_id, data in SAMPLE_DISHES.items():
+            self.catalog.upsert(dish_id, dict(data))
+
+    def test_top_k(self):
+        """Only available dishes are ranked, best first"""
+        self.assertEqual([d['id'] for d in self.leaderboard.top(10)], ['d2', 'd1'])
+        self.assertEqual([d['id'] for d in self.leaderboard.top(1)], ['d2'])
+        self.assertEqual(self.leaderboard.top(0), [])
+
+    def test_order_count_and_availability_changes(self):
+        """Count and availability updates re-rank incrementally"""
+        self.catalog.update('d1', {'ordersCount': 20})
+        self.catalog.update('d3', {'isAvailable': True})
+        self.assertEqual([d['id'] for d in self.leaderboard.top(3)], ['d1', 'd2', 'd3'])
+        self.catalog.update('d1', {'isAvailable': False})
+        self.assertEqual([d['id'] for d in self.leaderboard.top(3)], ['d2', 'd3'])
+
+    def test_predicate_skips_inactive_cookers(self):
+        """The predicate filters without shortening the page"""
+        top = self.leaderboard.top(1, predicate=lambda dish: dish['cookerId'] == 'chef1')
+        self.assertEqual([d['id'] for d in top], ['d1'])
+
+    @patch('app.services.order_state.handle_order_status_change')
+    @patch('app.services.order_state.firestore.transactional', side_effect=lambda fn: fn)
+    @patch('app.routes.cooker_routes.db')
+    def test_completed_order_bumps_orders_count(self, mock_db, mock_transactional, mock_notify):
+        """Completing an order increments ordersCount of its dishes"""
+        app = create_app()
+        client = app.test_client()
+
+        order_doc = MagicMock()
+        order_doc.exists = True
+        order_doc.to_dict.return_value = {
+            'chefId': 'chef1',
+            'status': 'on_the_way',
+            'subtotal': 30,
+            'items': [{'dishId': 'd1', 'quantity': 2}, {'dishId': 'd3', 'quantity': 1}],
+        }
+        mock_db.collection.return_value.document.return_value.get.return_value = order_doc
+        dish_snapshots = []
+        for dish_id in ('d1', 'd3'):
+            snapshot = MagicMock()
+            snapshot.exists = True
+            snapshot.reference.id = dish_id
+            snapshot.reference.parent.id = 'dishes'
+            dish_snapshots.append(snapshot)
+        mock_db.get_all.return_value = dish_snapshots
+
+        response = client.put('/api/cookers/orders/order1/status', json={'userId': 'chef1', 'status': 'completed'})
+
+        self.assertEqual(response.status_code, 200)
+        transaction = mock_db.transaction.return_value
+        dish_updates = [c for c in transaction.update.call_args_list if 'ordersCount' in c[0][1]]
+        self.assertEqual(len(dish_updates), 2)
+
+if __name__ == '__main__':
+    unittest.main()
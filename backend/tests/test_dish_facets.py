@@ -0,0 +1,149 @@
+"""
+Unit Tests for Dish Facet Counts
+================================
+Tests incremental facet counters over the catalog and cooker registry
+"""
+
+import unittest
+from unittest.mock import patch
+import sys
+import os
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from application import create_app, request_counts
+from app.services.dish_facets import DishFacetIndex, category_id, price_bucket
+from tests.helpers import build_registry, build_catalog
+from scripts.seed_database import DISHES as SEED_DISHES
+
+
+SAMPLE_COOKERS = {
+    'chef1': {'name': 'Chef Ali'},
+    'chef2': {'name': 'Chef Sarra'},
+    'chef3': {'name': 'Chef Mariem', 'isActive': False},
+}
+
+SAMPLE_DISHES = {
+    'd1': {'category': 'couscous', 'price': 12, 'isVegetarian': True, 'cookerId': 'chef1', 'isAvailable': True},
+    'd2': {'category': 'كسكسي', 'price': 25, 'isSpicy': True, 'cookerId': 'chef2', 'isAvailable': True},
+    'd3': {'category': 'desserts', 'price': 6, 'isVegetarian': True, 'cookerId': 'chef1', 'isAvailable': True},
+    'd4': {'category': 'عام', 'price': 45, 'cookerId': 'chef2', 'isAvailable': True},
+    'd5': {'category': 'pasta', 'price': 15, 'cookerId': 'chef1', 'isAvailable': False},
+    'd6': {'category': 'pasta', 'price': 15, 'cookerId': 'chef3', 'isAvailable': True},
+}
+
+
+def build_indexes():
+    facets = DishFacetIndex()
+    registry = build_registry(SAMPLE_COOKERS, facets.cookers)
+    catalog = build_catalog(SAMPLE_DISHES, facets)
+    return registry, catalog, facets
+
+
+def category_counts(counts):
+    return {category['id']: category['count'] for category in counts['categories'] if category['count']}
+
+
+class TestDishFacetIndex(unittest.TestCase):
+
+    def setUp(self):
+        self.registry, self.catalog, self.facets = build_indexes()
+
+    def test_helpers(self):
+        """Category names map to get_categories ids; prices fall in buckets"""
+        self.assertEqual(category_id({'category': 'كسكسي'}), 'couscous')
+        self.assertEqual(category_id({'category': 'Seafood'}), 'seafood')
+        self.assertEqual(category_id({'category': 'عام'}), 'other')
+        self.assertEqual(category_id({'category': 'أطباق رئيسية'}), 'traditional')
+        self.assertEqual(category_id({'category': 'appetizers'}), 'appetizers')
+        self.assertEqual(price_bucket({'price': 10}), '10_20')
+        self.assertEqual(price_bucket({'price': 'n/a'}), None)
+
+    def test_initial_counts(self):
+        """Only available dishes from active cookers are counted"""
+        counts = self.facets.counts()
+        self.assertEqual(counts['total'], 4)
+        self.assertEqual(category_counts(counts), {'couscous': 2, 'desserts': 1, 'other': 1})
+        self.assertEqual(counts['vegetarian'], 2)
+        self.assertEqual(counts['spicy'], 1)
+        buckets = {bucket['id']: bucket['count'] for bucket in counts['priceBuckets']}
+        self.assertEqual(buckets, {'under_10': 1, '10_20': 1, '20_40': 1, '40_plus': 1})
+
+    def test_seed_categories(self):
+        """Every category used by scripts/seed_database.py lands in a real facet"""
+        dishes = {'seed%d' % i: dict(dish, cookerId='chef1') for i, dish in enumerate(SEED_DISHES)}
+        facets = DishFacetIndex()
+        build_registry(SAMPLE_COOKERS, facets.cookers)
+        build_catalog(dishes, facets)
+
+        counts = category_counts(facets.counts())
+        self.assertNotIn('other', counts)
+        self.assertEqual(sum(counts.values()), len(SEED_DISHES))
+        self.assertEqual(set(counts), {'traditional', 'appetizers', 'salads', 'desserts'})
+
+    def test_dish_writes_adjust_counts(self):
+        """Dish updates move a dish between facets"""
+        self.catalog.update('d1', {'category': 'pasta', 'isVegetarian': False})
+        self.catalog.update('d5', {'isAvailable': True})
+        self.catalog.remove('d3')
+
+        counts = self.facets.counts()
+        self.assertEqual(counts['total'], 4)
+        self.assertEqual(category_counts(counts), {'pasta': 2, 'couscous': 1, 'other': 1})
+        self.assertEqual(counts['vegetarian'], 0)
+
+    def test_cooker_changes_adjust_counts(self):
+        """A cooker going offline or online moves all of their dishes"""
+        self.registry.update('chef2', {'isActive': False})
+        self.assertEqual(self.facets.counts()['total'], 2)
+        self.assertEqual(self.facets.counts()['spicy'], 0)
+
+        self.registry.update('chef3', {'isActive': True})
+        self.assertEqual(category_counts(self.facets.counts()), {'couscous': 1, 'desserts': 1, 'pasta': 1})
+
+
+class TestFacetsRoute(unittest.TestCase):
+
+    def setUp(self):
+        """Set up test client (with a fresh per-IP rate limit window: the suite shares one)"""
+        request_counts.clear()
+        self.app = create_app()
+        self.client = self.app.test_client()
+        self.app.config['TESTING'] = True
+        self.registry, self.catalog, self.facets = build_indexes()
+
+    @patch('app.services.live_collection.get_db')
+    def test_facets_endpoint(self, mock_get_db):
+        """GET /api/dishes/facets answers from the counters"""
+        with patch('app.routes.dish_routes.cooker_registry', self.registry), \
+             patch('app.routes.dish_routes.dish_catalog', self.catalog), \
+             patch('app.routes.dish_routes.dish_facets', self.facets), \
+             patch('app.routes.dish_routes.db') as mock_db:
+            response = self.client.get('/api/dishes/facets')
+
+        self.assertEqual(response.status_code, 200)
+        data = response.get_json()
+        self.assertTrue(data['success'])
+        self.assertEqual(data['total'], 4)
+        self.assertEqual([category['id'] for category in data['categories']][:2], ['seafood', 'couscous'])
+        mock_db.collection.assert_not_called()
+
+    @patch('app.services.live_collection.get_db')
+    def test_facet_counts_match_category_listings(self, mock_get_db):
+        """Tapping a facet lists as many dishes as it counts, whichever name the dishes store"""
+        with patch('app.routes.dish_routes.cooker_registry', self.registry), \
+             patch('app.routes.dish_routes.dish_catalog', self.catalog), \
+             patch('app.routes.dish_routes.dish_facets', self.facets), \
+             patch('app.routes.dish_routes.db'):
+            categories = self.client.get('/api/dishes/facets').get_json()['categories']
+            for category in categories:
+                listed = self.client.get('/api/dishes/?perPage=100&category=' + category['id']).get_json()
+                found = self.client.get('/api/dishes/search?limit=100&category=' + category['id']).get_json()
+                self.assertEqual(listed['total'], category['count'], category['id'])
+                self.assertEqual(found['count'], category['count'], category['id'])
+
+        # 'كسكسي' and 'couscous' are one facet and one listing
+        self.assertEqual({category['id']: category['count'] for category in categories}['couscous'], 2)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,157 @@
+"""
+Unit Tests for Dish Search Engine
+==================================
+Tests Arabic normalization, BM25 ranking and incremental indexing
+"""
+
+import unittest
+from unittest.mock import patch
+import sys
+import os
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from application import create_app
+from app.services.dish_catalog import DishCatalog
+from app.services.dish_search import DishSearchIndex, normalize_text, tokenize, phonetic_key
+
+
+SEARCH_DISHES = {
+    'couscous': {
+        'name': 'Couscous Royal', 'nameAr': 'كسكسي ملكي', 'category': 'couscous',
+        'description': 'Couscous with lamb and vegetables', 'tags': ['تقليدي', 'حلال'],
+        'ingredients': ['semoule', 'agneau'], 'cookerId': 'chef1', 'isAvailable': True, 'price': 25,
+    },
+    'tajine': {
+        'name': 'Tajine Malsouka', 'nameAr': 'طاجين المالسوقة', 'category': 'traditional',
+        'description': 'Baked tajine with chicken', 'tags': ['عائلي'],
+        'ingredients': ['poulet', 'oeufs'], 'cookerId': 'chef1', 'isAvailable': True, 'price': 18,
+    },
+    'brik': {
+        'name': "Brik à l'oeuf", 'nameAr': 'بريك بالبيض', 'category': 'traditional',
+        'description': 'Crispy pastry with egg and tuna', 'tags': ['مقرمش'],
+        'ingredients': ['malsouka', 'oeuf', 'thon'], 'cookerId': 'chef2', 'isAvailable': True, 'price': 4,
+    },
+    'hidden': {
+        'name': 'Couscous au poisson', 'nameAr': 'كسكسي بالحوت', 'category': 'couscous',
+        'cookerId': 'chef2', 'isAvailable': False, 'price': 30,
+    },
+}
+
+
+class TestDishSearchIndex(unittest.TestCase):
+
+    def setUp(self):
+        self.catalog = DishCatalog()
+        self.index = DishSearchIndex()
+        self.catalog.add_observer(self.index)
+        for dish_id, data in SEARCH_DISHES.items():
+            self.catalog.upsert(dish_id, dict(data))
+
+    def test_normalize_arabic_variants(self):
+        """Hamza forms, taa marbuta and tashkeel are folded"""
+        self.assertEqual(normalize_text('إِبْرَاهِيم'), normalize_text('ابراهيم'))
+        self.assertEqual(normalize_text('مالسوقة'), normalize_text('مالسوقه'))
+        self.assertEqual(normalize_text('Brik à l’oeuf'), 'brik a l’oeuf')
+
+    def test_tokenize_strips_definite_article(self):
+        """The Arabic definite article is removed from tokens"""
+        self.assertEqual(tokenize('طاجين المالسوقة'), ['طاجين', 'مالسوقه'])
+
+    def test_latin_and_arabic_queries(self):
+        """Both name and nameAr are searchable"""
+        self.assertEqual(self.index.search_ids('couscous'), ['couscous'])
+        self.assertEqual(self.index.search_ids('كُسْكُسي'), ['couscous'])
+        self.assertEqual(self.index.search_ids('مالسوقه'), ['tajine'])
+
+    def test_unavailable_dishes_not_indexed(self):
+        """Unavailable dishes never match"""
+        self.assertNotIn('hidden', self.index.search_ids('poisson'))
+
+    def test_name_match_ranks_above_ingredient_match(self):
+        """Field weights favour name matches"""
+        self.assertEqual(self.index.search_ids('malsouka')[0], 'tajine')
+        self.assertIn('brik', self.index.search_ids('malsouka'))
+
+    def test_prefix_on_last_token(self):
+        """The last token matches as a prefix (search as you type)"""
+        self.assertEqual(self.index.search_ids('tajine mal'), ['tajine'])
+
+    def test_words_never_together_match_nothing(self):
+        """Words from different dishes are not a match; longer queries may miss one word"""
+        self.assertEqual(self.index.search_ids('poulet thon'), [])
+        self.assertEqual(self.index.search_ids('couscous agneau thon'), ['couscous'])
+
+    def test_incremental_updates(self):
+        """Updates and deletes through the catalog reach the index"""
+        self.catalog.update('brik', {'name': 'Brik Danouni'})
+        self.assertEqual(self.index.search_ids('danouni'), ['brik'])
+        self.catalog.update('brik', {'isAvailable': False})
+        self.assertEqual(self.index.search_ids('danouni'), [])
+        self.catalog.remove('tajine')
+        self.assertEqual(self.index.search_ids('tajine'), [])
+
+    def test_empty_query(self):
+        """Queries without tokens return nothing"""
+        self.assertEqual(self.index.search('  !! '), [])
+
+    def test_phonetic_key(self):
+        """Transliteration variants share a key"""
+        self.assertEqual(phonetic_key('couscous'), phonetic_key('kuskus'))
+        self.assertEqual(phonetic_key('mlou7ia'), phonetic_key('mlouhia'))
+        self.assertEqual(phonetic_key('2024'), '2024')
+
+    def test_fuzzy_latin_spellings(self):
+        """Misspelled and split Latin queries still find the dish"""
+        self.assertEqual(self.index.search_ids('koskosi'), ['couscous'])
+        self.assertEqual(self.index.search_ids('cous cous'), ['couscous'])
+        self.assertEqual(self.index.search_ids('tajin malsouqa'), ['tajine'])
+
+    def test_fuzzy_arabic_spelling(self):
+        """Arabic typos match through the same trigram index"""
+        self.assertEqual(self.index.search_ids('كسكس'), ['couscous'])
+
+    def test_exact_match_ranks_above_fuzzy(self):
+        """Fuzzy expansions are only used for tokens with no exact or prefix match"""
+        self.catalog.upsert('kuskus', {'name': 'Kuskus', 'cookerId': 'chef1', 'isAvailable': True})
+        self.assertEqual(self.index.search_ids('kuskus'), ['kuskus'])
+        self.assertEqual(set(self.index.search_ids('koskosi')), {'couscous', 'kuskus'})
+
+    def test_fuzzy_index_follows_removals(self):
+        """Terms of removed dishes stop matching fuzzily"""
+        self.catalog.remove('couscous')
+        self.assertEqual(self.index.search_ids('koskosi'), [])
+        self.assertEqual(self.index._key_terms.get(phonetic_key('couscous')), None)
+
+
+class TestSearchRoute(unittest.TestCase):
+
+    def setUp(self):
+        """Set up test client with a populated catalog and index"""
+        self.app = create_app()
+        self.client = self.app.test_client()
+        self.app.config['TESTING'] = True
+
+        self.catalog = DishCatalog()
+        self.index = DishSearchIndex()
+        self.catalog.add_observer(self.index)
+        for dish_id, data in SEARCH_DISHES.items():
+            self.catalog.upsert(dish_id, dict(data))
+        self.catalog._ready.set()
+
+        self.active_cookers = {'chef1': {'name': 'Chef Ali'}, 'chef2': {'name': 'Chef Sarra'}}
+
+    def test_search_route_uses_index(self):
+        """Search results come ranked from the index and respect price filters"""
+        with patch('app.routes.dish_routes.dish_catalog', self.catalog), \
+             patch('app.routes.dish_routes.dish_search', self.index), \
+             patch('app.routes.dish_routes.get_active_cookers', return_value=self.active_cookers):
+            response = self.client.get('/api/dishes/search?q=oeuf&maxPrice=10')
+
+        self.assertEqual(response.status_code, 200)
+        data = response.get_json()
+        self.assertEqual([d['id'] for d in data['dishes']], ['brik'])
+        self.assertEqual(data['dishes'][0]['cookerName'], 'Chef Sarra')
+
+
+if __name__ == '__main__':
+    unittest.main()
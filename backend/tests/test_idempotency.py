@@ -0,0 +1,127 @@
+"""
+Unit Tests for Idempotency Keys
+===============================
+Tests replay of completed requests and key reuse rules
+"""
+
+import unittest
+from unittest.mock import patch, MagicMock
+import sys
+import os
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from application import create_app
+
+
+class FakeRecordRef:
+    """In-memory stand-in for an idempotency record document"""
+
+    def __init__(self, store, doc_id):
+        self.store = store
+        self.id = doc_id
+
+    def get(self, transaction=None):
+        snapshot = MagicMock()
+        snapshot.exists = self.id in self.store
+        snapshot.to_dict.return_value = dict(self.store.get(self.id, {}))
+        return snapshot
+
+    def update(self, fields):
+        self.store[self.id].update(fields)
+
+    def delete(self):
+        self.store.pop(self.id, None)
+
+
+def make_idempotency_db(store):
+    db = MagicMock()
+    db.collection.return_value.document.side_effect = lambda doc_id: FakeRecordRef(store, doc_id)
+    db.transaction.return_value.set.side_effect = lambda ref, data: store.__setitem__(ref.id, dict(data))
+    return db
+
+
+def make_payment_db():
+    """Payment routes' db with an existing single order"""
+    db = MagicMock()
+    order_doc = db.collection.return_value.document.return_value.get.return_value
+    order_doc.exists = True
+    order_doc.to_dict.return_value = {'userId': 'user123', 'total': 20.0}
+    return db
+
+
+class TestIdempotencyKeys(unittest.TestCase):
+
+    def setUp(self):
+        """Set up test client with an in-memory key store"""
+        self.app = create_app()
+        self.client = self.app.test_client()
+        self.app.config['TESTING'] = True
+
+        self.store = {}
+        self.patches = [
+            patch('app.utils.idempotency.get_db', return_value=make_idempotency_db(self.store)),
+            patch('app.utils.idempotency.firestore.transactional', side_effect=lambda fn: fn),
+            patch('app.routes.auth_routes.verify_token', return_value={'uid': 'user123'}),
+        ]
+        for p in self.patches:
+            p.start()
+
+    def tearDown(self):
+        for p in self.patches:
+            p.stop()
+
+    def confirm(self, key, order_id='order1'):
+        headers = {'Authorization': 'Bearer mock-token', 'Content-Type': 'application/json'}
+        if key:
+            headers['Idempotency-Key'] = key
+        return self.client.post('/api/payments/confirm', headers=headers,
+                                json={'orderId': order_id, 'paymentMethod': 'card'})
+
+    @patch('app.routes.payment_routes.db', new_callable=make_payment_db)
+    def test_retry_replays_original_response(self, mock_db):
+        """A retried confirmation returns the stored response without new writes"""
+        first = self.confirm('key-1')
+        second = self.confirm('key-1')
+
+        self.assertEqual(first.status_code, 200)
+        self.assertEqual(second.status_code, 200)
+        self.assertEqual(second.get_json(), first.get_json())
+        self.assertEqual(second.headers.get('Idempotent-Replayed'), 'true')
+        mock_db.collection.return_value.document.return_value.set.assert_called_once()
+
+    @patch('app.routes.payment_routes.db', new_callable=make_payment_db)
+    def test_requests_without_key_run_every_time(self, mock_db):
+        """The header is optional"""
+        self.confirm(None)
+        self.confirm(None)
+        self.assertEqual(mock_db.collection.return_value.document.return_value.set.call_count, 2)
+        self.assertEqual(self.store, {})
+
+    @patch('app.routes.payment_routes.db', new_callable=make_payment_db)
+    def test_key_reused_for_different_request(self, mock_db):
+        """A key bound to one body cannot be replayed for another"""
+        self.confirm('key-1', order_id='order1')
+        response = self.confirm('key-1', order_id='order2')
+        self.assertEqual(response.status_code, 422)
+
+    @patch('app.routes.payment_routes.db', new_callable=make_payment_db)
+    def test_server_error_releases_key(self, mock_db):
+        """5xx responses are not stored, so the client can retry"""
+        mock_db.collection.return_value.document.return_value.get.side_effect = RuntimeError('unavailable')
+        self.assertEqual(self.confirm('key-1').status_code, 500)
+        self.assertEqual(self.store, {})
+
+        mock_db.collection.return_value.document.return_value.get.side_effect = None
+        self.assertEqual(self.confirm('key-1').status_code, 200)
+
+    @patch('app.routes.payment_routes.db', new_callable=make_payment_db)
+    def test_in_progress_key_conflicts(self, mock_db):
+        """A concurrent duplicate gets 409 while the first request runs"""
+        self.confirm('key-1')
+        record = next(iter(self.store.values()))
+        record['status'] = 'in_progress'
+        self.assertEqual(self.confirm('key-1').status_code, 409)
+
+
+if __name__ == '__main__':
+    unittest.main()
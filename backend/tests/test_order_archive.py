@@ -0,0 +1,180 @@
+"""
+Unit Tests for Order Archive
+============================
+Tests cold-order archival: partitions, batched moves and checkpoint resume
+"""
+
+import unittest
+from unittest.mock import MagicMock
+import sys
+import os
+import gzip
+import json
+import shutil
+import tempfile
+from datetime import datetime
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.services import order_archive
+from app.services.order_archive import OrderArchiver
+
+NOW = datetime(2026, 10, 16, 12, 0)
+
+
+def make_order_doc(order_id, created, updated=None, status='delivered'):
+    doc = MagicMock()
+    doc.id = order_id
+    doc.to_dict.return_value = {
+        'status': status,
+        'total': 20.0,
+        'createdAt': created,
+        'updatedAt': updated or created,
+    }
+    return doc
+
+
+class FakeOrderQuery:
+    """
+    Order query over in-memory docs with Firestore's typed range filters:
+    a '<' filter only matches values of the same type as its bound
+    """
+
+    def __init__(self, store, filters=(), after=None, count=None):
+        self.store = store
+        self.filters = filters
+        self.after = after
+        self.count = count
+
+    def where(self, field, op, value):
+        return FakeOrderQuery(self.store, self.filters + ((field, op, value),), self.after, self.count)
+
+    def order_by(self, field):
+        return self
+
+    def start_after(self, values):
+        self.store.starts.append(values)
+        return FakeOrderQuery(self.store, self.filters, (values['updatedAt'], values['__name__']), self.count)
+
+    def limit(self, count):
+        return FakeOrderQuery(self.store, self.filters, self.after, count)
+
+    def stream(self):
+        rows = []
+        for doc in self.store.docs:
+            order = doc.to_dict()
+            matches = True
+            for field, op, value in self.filters:
+                actual = order.get(field)
+                if op == 'in':
+                    matches = matches and actual in value
+                else:
+                    matches = matches and type(actual) is type(value) and actual < value
+            if matches:
+                rows.append(doc)
+        rows.sort(key=lambda doc: (doc.to_dict()['updatedAt'], doc.id))
+        if self.after:
+            rows = [doc for doc in rows if (doc.to_dict()['updatedAt'], doc.id) > self.after]
+        return iter(rows[:self.count])
+
+
+def make_db(docs):
+    """Firestore mock holding the given orders; archive batches really delete them"""
+    db = MagicMock()
+    db.docs = list(docs)
+    db.starts = []
+    orders = FakeOrderQuery(db)
+    archive = MagicMock()
+    db.collection.side_effect = lambda name: orders if name == 'orders' else archive
+    batch = db.batch.return_value
+    batch.delete.side_effect = lambda ref: db.docs.remove(next(doc for doc in db.docs if doc.reference is ref))
+    return db
+
+
+def read_partition(path):
+    with gzip.open(path, 'rt', encoding='utf-8') as f:
+        return [json.loads(line) for line in f]
+
+
+class TestOrderArchive(unittest.TestCase):
+
+    def setUp(self):
+        self.out_dir = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.out_dir)
+
+    def test_partition_key(self):
+        """Orders are partitioned by the month they were placed"""
+        self.assertEqual(order_archive.partition_key({'createdAt': datetime(2026, 3, 31, 23)}), '2026-03')
+        self.assertEqual(order_archive.partition_key({'createdAt': '2026-04-02T10:00:00'}), '2026-04')
+        self.assertEqual(order_archive.partition_key({}), 'unknown')
+
+    def test_run_writes_partitions_and_moves_orders(self):
+        """Each page lands in its month partitions, then is copied and deleted in one batch"""
+        page = [make_order_doc('o1', datetime(2026, 3, 30)), make_order_doc('o2', datetime(2026, 4, 1))]
+        db = make_db(page + [make_order_doc('hot', datetime(2026, 10, 1))])
+
+        moved = OrderArchiver(db, self.out_dir, now=NOW).run(log=lambda message: None)
+
+        self.assertEqual(moved, 2)
+        march = read_partition(os.path.join(self.out_dir, 'orders', '2026-03', 'part-o1.ndjson.gz'))
+        april = read_partition(os.path.join(self.out_dir, 'orders', '2026-04', 'part-o1.ndjson.gz'))
+        self.assertEqual([row['id'] for row in march], ['o1'])
+        self.assertEqual(april[0]['createdAt'], '2026-04-01T00:00:00')
+
+        batch = db.batch.return_value
+        self.assertEqual(batch.set.call_count, 2)
+        self.assertIn('archivedAt', batch.set.call_args_list[0][0][1])
+        batch.delete.assert_any_call(page[0].reference)
+        batch.commit.assert_called_once()
+        db.collection.assert_any_call(order_archive.ARCHIVE_COLLECTION)
+        self.assertEqual([doc.id for doc in db.docs], ['hot'])
+        # A finished run leaves no checkpoint behind
+        self.assertFalse(os.path.exists(os.path.join(self.out_dir, order_archive.CHECKPOINT_FILE)))
+
+    def test_stopped_run_resumes_from_checkpoint(self):
+        """A run cut short keeps its cutoff and continues after the last archived order"""
+        db = make_db([
+            make_order_doc('o1', datetime(2026, 1, 5), updated=datetime(2026, 1, 6)),
+            make_order_doc('o2', datetime(2026, 1, 7)),
+            # Old enough for the first run's cutoff only
+            make_order_doc('o3', datetime(2026, 8, 1)),
+        ])
+
+        archiver = OrderArchiver(db, self.out_dir, batch_size=1, now=NOW)
+        self.assertEqual(archiver.run(max_batches=1, log=lambda message: None), 1)
+        checkpoint = archiver.load_checkpoint()
+        self.assertEqual(checkpoint['after'], ['2026-01-06T00:00:00', 'o1'])
+        self.assertEqual(checkpoint['cutoff'], '2026-07-18T12:00:00')
+
+        later = OrderArchiver(db, self.out_dir, batch_size=1, now=datetime(2026, 12, 1))
+        self.assertEqual(later.run(log=lambda message: None), 1)
+
+        self.assertEqual(db.starts[0], {'updatedAt': datetime(2026, 1, 6), '__name__': 'o1'})
+        # The resumed run still uses the first run's cutoff
+        self.assertEqual([doc.id for doc in db.docs], ['o3'])
+        self.assertIsNone(later.load_checkpoint())
+
+    def test_string_timestamps_are_archived(self):
+        """Orders finished through the old cooker routes have ISO-string updatedAt"""
+        db = make_db([
+            make_order_doc('o1', datetime(2026, 2, 1), updated='2026-02-03T09:00:00.123456', status='cancelled'),
+            make_order_doc('o2', datetime(2026, 3, 1)),
+            make_order_doc('hot', datetime(2026, 10, 1), updated='2026-10-02T09:00:00'),
+        ])
+
+        moved = OrderArchiver(db, self.out_dir, now=NOW).run(log=lambda message: None)
+
+        self.assertEqual(moved, 2)
+        self.assertEqual([doc.id for doc in db.docs], ['hot'])
+        february = read_partition(os.path.join(self.out_dir, 'orders', '2026-02', 'part-o1.ndjson.gz'))
+        self.assertEqual(february[0]['updatedAt'], '2026-02-03T09:00:00.123456')
+
+    def test_batch_size_is_capped(self):
+        """Batches never exceed Firestore's write limit"""
+        archiver = OrderArchiver(MagicMock(), self.out_dir, batch_size=1000)
+        self.assertEqual(archiver.batch_size, order_archive.BATCH_SIZE)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,137 @@
+"""
+Unit Tests for Order ETA
+========================
+Tests the per-chef kitchen queue and delivery estimates
+"""
+
+import unittest
+from unittest.mock import patch, MagicMock
+import sys
+import os
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from application import create_app
+from app.services.order_eta import KitchenLoad, DELIVERY_MINUTES, prep_minutes
+
+
+def make_order(status, prep=30, chef_id='chef1'):
+    return {'chefId': chef_id, 'status': status, 'prepMinutes': prep}
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+    def advance(self, minutes):
+        self.now += minutes * 60
+
+
+class TestKitchenLoad(unittest.TestCase):
+
+    def setUp(self):
+        """Kitchen with a controllable clock"""
+        self.clock = FakeClock()
+        self.kitchen = KitchenLoad(clock=self.clock)
+
+    def test_prep_is_slowest_dish(self):
+        """Order prep time is the longest dish prep time"""
+        order = {'items': [{'preparationTime': 20}, {'preparationTime': 45}, {}]}
+        self.assertEqual(prep_minutes(order), 45)
+        self.assertEqual(prep_minutes({'items': []}), 30)
+
+    def test_queue_position_sets_eta(self):
+        """Each accepted order waits for the work queued before it"""
+        self.kitchen.track('o1', make_order('accepted', 30))
+        self.kitchen.track('o2', make_order('accepted', 20))
+
+        self.assertEqual(self.kitchen.eta_minutes('o1', make_order('accepted', 30)), 30 + DELIVERY_MINUTES)
+        self.assertEqual(self.kitchen.eta_minutes('o2', make_order('accepted', 20)), 50 + DELIVERY_MINUTES)
+        # A new order joins behind the backlog
+        self.assertEqual(self.kitchen.eta_minutes('o3', make_order('pending', 10)), 60 + DELIVERY_MINUTES)
+        # Other chefs are unaffected
+        self.assertEqual(self.kitchen.eta_minutes('o4', make_order('pending', 10, 'chef2')), 10 + DELIVERY_MINUTES)
+
+    def test_progress_and_completion(self):
+        """Elapsed time and finished orders shorten the queue"""
+        self.kitchen.track('o1', make_order('accepted', 30))
+        self.kitchen.track('o2', make_order('preparing', 20))
+
+        self.clock.advance(10)
+        self.assertEqual(self.kitchen.eta_minutes('o2', make_order('preparing')), 40 + DELIVERY_MINUTES)
+
+        self.kitchen.track('o1', make_order('ready', 30))
+        self.assertEqual(self.kitchen.eta_minutes('o2', make_order('preparing')), 20 + DELIVERY_MINUTES)
+        self.assertEqual(self.kitchen.eta_minutes('o1', make_order('ready')), DELIVERY_MINUTES)
+
+    def test_cancelled_order_frees_the_queue(self):
+        """Cancelling removes the order's minutes; tracking twice is harmless"""
+        self.kitchen.track('o1', make_order('accepted', 30))
+        self.kitchen.track('o1', make_order('accepted', 30))
+        self.kitchen.track('o2', make_order('accepted', 20))
+        self.kitchen.track('o1', make_order('cancelled', 30))
+
+        self.assertEqual(self.kitchen.backlog_minutes('chef1'), 20)
+        self.assertIsNone(self.kitchen.eta_minutes('o1', make_order('cancelled')))
+
+    def test_legacy_statuses(self):
+        """Orders stored as 'confirmed' or 'out_for_delivery' count like their canonical status"""
+        self.kitchen.track('o1', make_order('confirmed', 30))
+        self.assertEqual(self.kitchen.backlog_minutes('chef1'), 30)
+        self.assertEqual(self.kitchen.eta_minutes('o1', make_order('confirmed', 30)), 30 + DELIVERY_MINUTES)
+
+        self.kitchen.track('o1', make_order('out_for_delivery', 30))
+        self.assertEqual(self.kitchen.backlog_minutes('chef1'), 0)
+        self.assertEqual(self.kitchen.eta_minutes('o1', make_order('out_for_delivery')), DELIVERY_MINUTES)
+
+    @patch('app.services.order_eta.get_db')
+    def test_listener_query_includes_legacy_names(self, mock_get_db):
+        """The queue listener also follows orders stored as 'confirmed'"""
+        self.kitchen.start()
+        query = mock_get_db.return_value.collection.return_value.where
+        self.assertEqual(query.call_args[0][:2], ('status', 'in'))
+        self.assertIn('confirmed', query.call_args[0][2])
+
+    def test_listener_changes(self):
+        """Orders leaving the listened query are dequeued"""
+        self.kitchen.track('o1', make_order('accepted', 30))
+        change = MagicMock()
+        change.type.name = 'REMOVED'
+        change.document.id = 'o1'
+        change.document.to_dict.return_value = make_order('accepted', 30)
+
+        self.kitchen._on_snapshot([], [change], None)
+
+        self.assertEqual(self.kitchen.backlog_minutes('chef1'), 0)
+
+
+class TestOrderEtaRoute(unittest.TestCase):
+
+    def setUp(self):
+        """Set up test client"""
+        self.app = create_app()
+        self.client = self.app.test_client()
+        self.app.config['TESTING'] = True
+
+    @patch('app.routes.order_routes.kitchen_load', KitchenLoad())
+    @patch('app.routes.order_routes.get_db')
+    @patch('app.routes.auth_routes.verify_token')
+    def test_order_read_includes_eta(self, mock_verify, mock_get_db):
+        """GET /orders/<id> adds etaMinutes without extra queries"""
+        mock_verify.return_value = {'uid': 'user123'}
+        doc = MagicMock()
+        doc.id = 'order1'
+        doc.exists = True
+        doc.to_dict.return_value = dict(make_order('ready'), userId='user123')
+        mock_get_db.return_value.collection.return_value.document.return_value.get.return_value = doc
+
+        response = self.client.get('/api/orders/order1', headers={'Authorization': 'Bearer mock-token'})
+
+        self.assertEqual(response.get_json()['etaMinutes'], DELIVERY_MINUTES)
+        self.assertIn('estimatedDeliveryAt', response.get_json())
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,230 @@
+"""
+Unit Tests for Order Event Streams
+==================================
+Tests the event hub fan-out, the order tracking SSE endpoint and the chef
+order queue stream
+"""
+
+import unittest
+from unittest.mock import patch, MagicMock
+import sys
+import os
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from application import create_app
+from app.services import event_hub, order_events
+from app.services.event_hub import EventHub, CLOSED
+from app.utils import sse
+
+
+class TestEventHub(unittest.TestCase):
+
+    def setUp(self):
+        """Hub with a counting source"""
+        self.attached = []
+        self.detached = []
+
+        def attach(topic, publish):
+            self.attached.append(topic)
+            return lambda: self.detached.append(topic)
+
+        self.hub = EventHub(attach=attach)
+
+    def test_one_source_per_topic(self):
+        """Subscribers share a source, detached with the last one"""
+        first = self.hub.subscribe('order:1')
+        second = self.hub.subscribe('order:1')
+        self.assertEqual(self.attached, ['order:1'])
+
+        first.close()
+        self.assertEqual(self.detached, [])
+        second.close()
+        self.assertEqual(self.detached, ['order:1'])
+
+    def test_fan_out_and_dedupe(self):
+        """Every subscriber gets each event once, repeated keys are dropped"""
+        subscriptions = [self.hub.subscribe('order:1') for _ in range(3)]
+
+        self.assertEqual(self.hub.publish('order:1', {'status': 'ready'}, key='ready'), 3)
+        self.assertEqual(self.hub.publish('order:1', {'status': 'ready'}, key='ready'), 0)
+        self.assertEqual(self.hub.publish('order:2', {'status': 'ready'}), 0)
+
+        for subscription in subscriptions:
+            self.assertEqual(subscription.get(timeout=0), {'status': 'ready'})
+            self.assertIsNone(subscription.get(timeout=0))
+
+    def test_slow_subscriber_is_dropped(self):
+        """A full queue closes the subscription instead of blocking publishers"""
+        subscription = self.hub.subscribe('order:1')
+        with patch.object(event_hub, 'MAX_PENDING_EVENTS', 2):
+            slow = self.hub.subscribe('order:1')
+        for i in range(3):
+            self.hub.publish('order:1', {'n': i})
+
+        self.assertTrue(slow.closed)
+        self.assertEqual([slow.get(timeout=0) for _ in range(3)], [{'n': 0}, {'n': 1}, CLOSED])
+        self.assertFalse(subscription.closed)
+
+
+class TestOrderEventsRoute(unittest.TestCase):
+
+    def setUp(self):
+        """Set up test client"""
+        self.app = create_app()
+        self.client = self.app.test_client()
+        self.app.config['TESTING'] = True
+        self.auth_headers = {'Authorization': 'Bearer mock-token'}
+
+    def order_db(self, order):
+        db = MagicMock()
+        doc = MagicMock()
+        doc.exists = True
+        doc.to_dict.return_value = order
+        db.collection.return_value.document.return_value.get.return_value = doc
+        return db
+
+    @patch('app.services.order_events.get_db')
+    @patch('app.routes.order_routes.get_db')
+    @patch('app.routes.auth_routes.verify_token')
+    def test_stream_pushes_changes_until_final(self, mock_verify, mock_get_db, mock_listener_db):
+        """The current status is sent, then changes, ending at a final status"""
+        mock_verify.return_value = {'uid': 'user123'}
+        db = self.order_db({'userId': 'user123', 'status': 'ready'})
+        mock_get_db.return_value = db
+        mock_listener_db.return_value = db
+
+        response = self.client.get('/api/orders/order1/events', headers=self.auth_headers, buffered=False)
+        self.assertEqual(response.mimetype, 'text/event-stream')
+        # One shared document listener for the order
+        db.collection.return_value.document.return_value.on_snapshot.assert_called_once()
+        order_events.publish_order('order1', {'status': 'on_the_way'})
+        order_events.publish_order('order1', {'status': 'delivered'})
+
+        body = response.get_data(as_text=True)
+        statuses = [line for line in body.splitlines() if line.startswith('data:')]
+        self.assertEqual(len(statuses), 3)
+        self.assertIn('"delivered"', statuses[-1])
+        self.assertEqual(order_events.order_hub.subscriber_count('order:order1'), 0)
+
+    @patch('app.services.order_events.get_db')
+    @patch('app.routes.order_routes.get_db')
+    @patch('app.routes.auth_routes.verify_token')
+    def test_stream_forbidden_for_others(self, mock_verify, mock_get_db, mock_listener_db):
+        """Only the customer and the order's chef may watch"""
+        mock_verify.return_value = {'uid': 'someone'}
+        db = self.order_db({'userId': 'user123', 'chefId': 'chef1', 'status': 'ready'})
+        mock_get_db.return_value = db
+        mock_listener_db.return_value = db
+
+        response = self.client.get('/api/orders/order1/events', headers=self.auth_headers)
+
+        self.assertEqual(response.status_code, 403)
+        self.assertEqual(order_events.order_hub.subscriber_count('order:order1'), 0)
+
+
+    @patch('app.services.order_events.get_db')
+    @patch('app.routes.order_routes.get_db')
+    @patch('app.routes.auth_routes.verify_token')
+    def test_streams_are_capped_per_process(self, mock_verify, mock_get_db, mock_listener_db):
+        """Past MAX_STREAMS new streams get a 503; closed streams free their slot"""
+        mock_verify.return_value = {'uid': 'user123'}
+        db = self.order_db({'userId': 'user123', 'status': 'ready'})
+        mock_get_db.return_value = db
+        mock_listener_db.return_value = db
+
+        with patch('app.utils.sse.MAX_STREAMS', sse.open_streams() + 1):
+            response = self.client.get('/api/orders/order1/events', headers=self.auth_headers, buffered=False)
+            refused = self.client.get('/api/orders/order1/events', headers=self.auth_headers)
+            self.assertEqual(refused.status_code, 503)
+            self.assertIn('Retry-After', refused.headers)
+            response.close()
+            self.assertEqual(order_events.order_hub.subscriber_count('order:order1'), 0)
+            # A 403 does not keep a slot either
+            mock_verify.return_value = {'uid': 'someone'}
+            self.assertEqual(self.client.get('/api/orders/order1/events',
+                                             headers=self.auth_headers).status_code, 403)
+            self.assertEqual(sse.open_streams(), sse.MAX_STREAMS - 1)
+
+    @patch('app.services.order_events.get_db')
+    @patch('app.routes.order_routes.get_db')
+    @patch('app.routes.auth_routes.verify_token')
+    def test_stream_ends_after_max_lifetime(self, mock_verify, mock_get_db, mock_listener_db):
+        """Long-lived streams are closed so the client reconnects"""
+        mock_verify.return_value = {'uid': 'user123'}
+        db = self.order_db({'userId': 'user123', 'status': 'ready'})
+        mock_get_db.return_value = db
+        mock_listener_db.return_value = db
+
+        with patch('app.utils.sse.MAX_STREAM_SECONDS', 0):
+            body = self.client.get('/api/orders/order1/events', headers=self.auth_headers).get_data(as_text=True)
+
+        self.assertIn('retry:', body)
+        self.assertEqual(len([line for line in body.splitlines() if line.startswith('data:')]), 1)
+        self.assertEqual(order_events.order_hub.subscriber_count('order:order1'), 0)
+
+
+class TestChefOrderQueue(unittest.TestCase):
+
+    def setUp(self):
+        """Set up test client"""
+        self.app = create_app()
+        self.client = self.app.test_client()
+        self.app.config['TESTING'] = True
+        self.auth_headers = {'Authorization': 'Bearer mock-token'}
+
+    def test_event_types(self):
+        """Pending orders are new, cancelled ones cancelled, the rest changed"""
+        self.assertEqual(order_events.chef_event('o1', {'status': 'pending'})['type'], 'new')
+        self.assertEqual(order_events.chef_event('o1', {'status': 'cancelled'})['type'], 'cancelled')
+        self.assertEqual(order_events.chef_event('o1', {'status': 'ready'})['type'], 'changed')
+
+    def test_listens_to_timestamp_and_string_updated_at(self):
+        """Orders with an ISO-string updatedAt are watched too, and both listeners detach"""
+        db = MagicMock()
+        with patch('app.services.order_events.get_db', return_value=db):
+            subscription = order_events.subscribe_chef('chef1')
+        subscription.close()
+
+        orders = db.collection.return_value.where.return_value
+        bounds = [call[0][2] for call in orders.where.call_args_list]
+        self.assertEqual([type(bound).__name__ for bound in bounds], ['datetime', 'str'])
+        self.assertEqual(bounds[1], bounds[0].isoformat())
+        self.assertEqual(orders.where.return_value.on_snapshot.return_value.unsubscribe.call_count, 2)
+
+    def test_listener_and_local_publish_deliver_once(self):
+        """A change seen by both the listener and this process is queued once"""
+        db = MagicMock()
+        with patch('app.services.order_events.get_db', return_value=db):
+            subscription = order_events.subscribe_chef('chef1')
+        try:
+            on_snapshot = db.collection.return_value.where.return_value.where.return_value.on_snapshot.call_args[0][0]
+            order = {'chefId': 'chef1', 'status': 'pending'}
+            order_events.publish_order('o1', order)
+
+            change = MagicMock()
+            change.type.name = 'ADDED'
+            change.document.id = 'o1'
+            change.document.to_dict.return_value = order
+            on_snapshot([], [change], None)
+
+            self.assertEqual(subscription.get(timeout=0)['type'], 'new')
+            self.assertIsNone(subscription.get(timeout=0))
+        finally:
+            subscription.close()
+
+    @patch('app.services.order_events.get_db')
+    @patch('app.routes.auth_routes.get_db')
+    @patch('app.routes.auth_routes.verify_token')
+    def test_stream_requires_chef(self, mock_verify, mock_auth_db, mock_listener_db):
+        """The queue is only streamed to the authenticated chef"""
+        mock_verify.return_value = {'uid': 'user123'}
+        mock_auth_db.return_value.collection.return_value.document.return_value.get.return_value.exists = False
+
+        response = self.client.get('/api/cookers/orders/events', headers=self.auth_headers)
+
+        self.assertEqual(response.status_code, 403)
+        mock_listener_db.assert_not_called()
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,257 @@
+"""
+Unit Tests for Order Service
+============================
+Tests server-side pricing, per-chef sub-orders, transactional order creation
+and paged order history
+"""
+
+import unittest
+from unittest.mock import patch, MagicMock
+import sys
+import os
+from datetime import datetime
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from application import create_app
+from app.services.order_service import InvalidOrderError, StaleCartError, parse_items, price_items, split_by_chef
+
+
+def make_snapshot(doc_id, data):
+    """Build a fake Firestore document snapshot (data None = missing)"""
+    snapshot = MagicMock()
+    snapshot.id = doc_id
+    snapshot.exists = data is not None
+    snapshot.to_dict.return_value = data
+    return snapshot
+
+
+DISHES = {
+    'd1': {'name': 'Couscous', 'price': 25.0, 'cookerId': 'chef1', 'cookerName': 'Chef Ali', 'isAvailable': True},
+    'd2': {'name': 'Brik', 'price': 4.0, 'cookerId': 'chef2', 'cookerName': 'Chef Sarra', 'isAvailable': True},
+    'd3': {'name': 'Lablabi', 'price': 6.0, 'cookerId': 'chef1', 'isAvailable': False},
+}
+
+
+class TestOrderPricing(unittest.TestCase):
+
+    def test_parse_items_validates(self):
+        """Lines need a dishId and a positive quantity"""
+        self.assertEqual(parse_items([{'dishId': 'd1', 'quantity': '2'}])[0][:2], ('d1', 2))
+        for items in [[], [{'quantity': 1}], [{'dishId': 'd1', 'quantity': 0}], [{'dishId': 'd1', 'quantity': 'x'}]]:
+            with self.assertRaises(InvalidOrderError):
+                parse_items(items)
+
+    def test_prices_come_from_dishes(self):
+        """Subtotal uses stored prices and dish data"""
+        items, subtotal = price_items(parse_items([
+            {'dishId': 'd1', 'quantity': 2, 'price': 25},
+            {'dishId': 'd2', 'quantity': 3},
+        ]), DISHES)
+
+        self.assertEqual(subtotal, 62.0)
+        self.assertEqual(items[1]['cookerName'], 'Chef Sarra')
+
+    def test_stale_cart_lists_every_problem(self):
+        """Deleted, unavailable and repriced dishes are all reported"""
+        with self.assertRaises(StaleCartError) as ctx:
+            price_items(parse_items([
+                {'dishId': 'd1', 'quantity': 1, 'price': 20},
+                {'dishId': 'd3', 'quantity': 1},
+                {'dishId': 'gone', 'quantity': 1},
+            ]), DISHES)
+
+        reasons = {problem['dishId']: problem['reason'] for problem in ctx.exception.problems}
+        self.assertEqual(reasons, {'d1': 'price_changed', 'd3': 'unavailable', 'gone': 'not_found'})
+
+    def test_split_by_chef_keeps_cart_order(self):
+        """Items are grouped per chef in the order chefs first appear"""
+        items, _ = price_items(parse_items([
+            {'dishId': 'd2', 'quantity': 1},
+            {'dishId': 'd1', 'quantity': 1},
+            {'dishId': 'd2', 'quantity': 2},
+        ]), DISHES)
+        groups = split_by_chef(items)
+        self.assertEqual([chef_id for chef_id, _ in groups], ['chef2', 'chef1'])
+        self.assertEqual(len(groups[0][1]), 2)
+
+
+class TestCreateOrderRoute(unittest.TestCase):
+
+    def setUp(self):
+        """Set up test client"""
+        self.app = create_app()
+        self.client = self.app.test_client()
+        self.app.config['TESTING'] = True
+        self.auth_headers = {
+            'Authorization': 'Bearer mock-token',
+            'Content-Type': 'application/json'
+        }
+
+    def post_order(self, mock_db, items):
+        mock_db.get_all.return_value = [make_snapshot(dish_id, DISHES.get(dish_id))
+                                         for dish_id in {item['dishId'] for item in items}]
+        mock_db.collection.return_value.document.return_value.id = 'order123'
+        return self.client.post('/api/orders/', headers=self.auth_headers, json={
+            'items': items,
+            'deliveryAddress': 'Tunis'
+        })
+
+    @patch('app.routes.order_routes.handle_order_status_change')
+    @patch('app.services.order_service.firestore.transactional', side_effect=lambda fn: fn)
+    @patch('app.routes.order_routes.get_db')
+    @patch('app.routes.auth_routes.verify_token')
+    def test_order_priced_with_one_batched_read(self, mock_verify, mock_get_db, mock_transactional, mock_notify):
+        """All dishes are read in a single get_all and the order is written in the transaction"""
+        mock_verify.return_value = {'uid': 'user123'}
+        mock_db = MagicMock()
+        mock_get_db.return_value = mock_db
+
+        response = self.post_order(mock_db, [
+            {'dishId': 'd1', 'quantity': 1, 'price': 25},
+            {'dishId': 'd2', 'quantity': 2, 'price': 4},
+            {'dishId': 'd1', 'quantity': 1, 'price': 25},
+        ])
+
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(response.get_json()['total'], 61.0)
+        mock_db.get_all.assert_called_once()
+        self.assertEqual(len(mock_db.get_all.call_args[0][0]), 2)
+        transaction = mock_db.transaction.return_value
+        group = transaction.set.call_args[0][1]
+        self.assertEqual(group['subtotal'], 58.0)
+        self.assertEqual(group['userId'], 'user123')
+
+    @patch('app.routes.order_routes.handle_order_status_change')
+    @patch('app.services.order_service.firestore.transactional', side_effect=lambda fn: fn)
+    @patch('app.routes.order_routes.get_db')
+    @patch('app.routes.auth_routes.verify_token')
+    def test_cart_split_into_chef_sub_orders(self, mock_verify, mock_get_db, mock_transactional, mock_notify):
+        """Each chef gets a sub-order with a top-level chefId under one group"""
+        mock_verify.return_value = {'uid': 'user123'}
+        mock_db = MagicMock()
+        mock_get_db.return_value = mock_db
+
+        response = self.post_order(mock_db, [
+            {'dishId': 'd1', 'quantity': 2},
+            {'dishId': 'd2', 'quantity': 1},
+        ])
+
+        self.assertEqual(response.status_code, 201)
+        writes = [c[0][1] for c in mock_db.transaction.return_value.set.call_args_list]
+        sub_orders, group = writes[:-1], writes[-1]
+        self.assertEqual([order['chefId'] for order in sub_orders], ['chef1', 'chef2'])
+        self.assertEqual([order['total'] for order in sub_orders], [53.0, 4.0])
+        self.assertEqual(group['total'], 57.0)
+        self.assertEqual(len(group['orderIds']), 2)
+        self.assertEqual(mock_notify.call_count, 2)
+
+    @patch('app.services.order_service.firestore.transactional', side_effect=lambda fn: fn)
+    @patch('app.routes.order_routes.get_db')
+    @patch('app.routes.auth_routes.verify_token')
+    def test_stale_cart_rejected(self, mock_verify, mock_get_db, mock_transactional):
+        """A repriced dish returns 409 and writes nothing"""
+        mock_verify.return_value = {'uid': 'user123'}
+        mock_db = MagicMock()
+        mock_get_db.return_value = mock_db
+
+        response = self.post_order(mock_db, [{'dishId': 'd2', 'quantity': 1, 'price': 3.5}])
+
+        self.assertEqual(response.status_code, 409)
+        self.assertEqual(response.get_json()['staleItems'][0]['currentPrice'], 4.0)
+        mock_db.transaction.return_value.set.assert_not_called()
+
+    @patch('app.routes.order_routes.get_db')
+    @patch('app.routes.auth_routes.verify_token')
+    def test_bad_input_and_contention(self, mock_verify, mock_get_db):
+        """Malformed input is a 400; a transaction out of commit retries is a 409, not a 400"""
+        mock_verify.return_value = {'uid': 'user123'}
+        mock_db = MagicMock()
+        mock_get_db.return_value = mock_db
+
+        response = self.client.post('/api/orders/', headers=self.auth_headers, json={
+            'items': [{'dishId': 'd1', 'quantity': 1}], 'deliveryAddress': 'Tunis', 'scheduledFor': 'tomorrow',
+        })
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('scheduledFor', response.get_json()['error'])
+
+        def exhausted(fn):
+            def run(transaction):
+                raise ValueError('Failed to commit transaction in 5 attempts.')
+            return run
+
+        with patch('app.services.order_service.firestore.transactional', side_effect=exhausted):
+            response = self.post_order(mock_db, [{'dishId': 'd1', 'quantity': 1}])
+        self.assertEqual(response.status_code, 409)
+        self.assertEqual(response.get_json()['error'], 'Too many orders at once, please retry')
+
+
+class TestOrderHistoryRoute(unittest.TestCase):
+
+    def setUp(self):
+        """Set up test client"""
+        self.app = create_app()
+        self.client = self.app.test_client()
+        self.app.config['TESTING'] = True
+        self.auth_headers = {'Authorization': 'Bearer mock-token'}
+
+    def query_for(self, mock_db, count):
+        """Wire a chained query returning count order documents, newest first"""
+        query = MagicMock()
+        for method in ('where', 'order_by', 'start_after', 'limit'):
+            getattr(query, method).return_value = query
+        query.stream.return_value = [
+            make_snapshot(f'o{i}', {'userId': 'user123', 'createdAt': datetime(2026, 1, 10 - i)})
+            for i in range(count)
+        ]
+        mock_db.collection.return_value.where.return_value = query
+        return query
+
+    @patch('app.routes.order_routes.get_db')
+    @patch('app.routes.auth_routes.verify_token')
+    def test_history_is_limited_and_paged(self, mock_verify, mock_get_db):
+        """Only limit+1 documents are read and a cursor continues the page"""
+        mock_verify.return_value = {'uid': 'user123'}
+        mock_db = MagicMock()
+        mock_get_db.return_value = mock_db
+        query = self.query_for(mock_db, 3)
+
+        data = self.client.get('/api/orders/?limit=2', headers=self.auth_headers).get_json()
+
+        query.limit.assert_called_once_with(3)
+        self.assertEqual([order['id'] for order in data['orders']], ['o0', 'o1'])
+        self.assertTrue(data['hasMore'])
+
+        self.client.get(f"/api/orders/?limit=2&cursor={data['nextCursor']}", headers=self.auth_headers)
+        query.start_after.assert_called_once_with({'createdAt': datetime(2026, 1, 9), '__name__': 'o1'})
+
+    @patch('app.routes.order_routes.get_db')
+    @patch('app.routes.auth_routes.verify_token')
+    def test_active_filters_in_flight_statuses(self, mock_verify, mock_get_db):
+        """active=true queries only non-final statuses"""
+        mock_verify.return_value = {'uid': 'user123'}
+        mock_db = MagicMock()
+        mock_get_db.return_value = mock_db
+        query = self.query_for(mock_db, 1)
+
+        response = self.client.get('/api/orders/?active=true', headers=self.auth_headers)
+
+        self.assertEqual(response.status_code, 200)
+        self.assertFalse(response.get_json()['hasMore'])
+        status_filter = query.where.call_args[0]
+        self.assertEqual(status_filter[:2], ('status', 'in'))
+        self.assertNotIn('delivered', status_filter[2])
+        self.assertIn('on_the_way', status_filter[2])
+        # Legacy in-flight names too, within Firestore's 30-value `in` limit
+        self.assertTrue({'confirmed', 'out_for_delivery'} <= set(status_filter[2]))
+        self.assertLessEqual(len(status_filter[2]), 30)
+
+    @patch('app.routes.auth_routes.verify_token')
+    def test_invalid_cursor_rejected(self, mock_verify):
+        """Malformed cursors return 400"""
+        mock_verify.return_value = {'uid': 'user123'}
+        response = self.client.get('/api/orders/?cursor=%%%', headers=self.auth_headers)
+        self.assertEqual(response.status_code, 400)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,207 @@
+"""
+Unit Tests for Order Slots
+==========================
+Tests pre-order slot validation, availability and capacity reservation
+"""
+
+import unittest
+from unittest.mock import patch, MagicMock
+import sys
+import os
+from datetime import datetime
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from application import create_app, request_counts
+from app.services import order_slots, order_state
+from app.services.cooker_hours import LOCAL_TZ
+
+# Friday 16 October 2026, 10:10 in Tunis
+NOW = datetime(2026, 10, 16, 10, 10, tzinfo=LOCAL_TZ)
+
+
+def make_slot_snapshot(chef_id, data):
+    snapshot = MagicMock()
+    snapshot.id = chef_id
+    snapshot.exists = data is not None
+    snapshot.to_dict.return_value = data
+    return snapshot
+
+
+def make_ref(chef_id):
+    ref = MagicMock()
+    ref.id = chef_id
+    return ref
+
+
+class TestSlotRules(unittest.TestCase):
+
+    def test_parse_slot(self):
+        """Slots start on the half hour, at least an hour and at most a week ahead"""
+        self.assertEqual(order_slots.parse_slot('2026-10-16T11:30', now=NOW), '2026-10-16T11:30')
+        # Offsets are converted to Tunis time
+        self.assertEqual(order_slots.parse_slot('2026-10-16T11:30:00+00:00', now=NOW), '2026-10-16T12:30')
+        for value in ['2026-10-16T11:00', '2026-10-16T12:15', '2026-10-24T12:00', 'tomorrow']:
+            with self.assertRaises(ValueError):
+                order_slots.parse_slot(value, now=NOW)
+
+    @patch('app.services.order_slots.cooker_hours')
+    def test_availability_skips_full_and_closed_slots(self, mock_hours):
+        """Only open slots with room are offered"""
+        mock_hours.open_at.side_effect = lambda when: {'chef1'} if 12 <= when.hour < 14 else set()
+        slots = {'capacity': 2, 'booked': {'2026-10-16T12:30': 2, '2026-10-16T13:00': 1}}
+
+        today = [slot for slot in order_slots.availability('chef1', slots, now=NOW)
+                 if slot['slot'].startswith('2026-10-16')]
+
+        self.assertEqual([(slot['slot'][11:16], slot['remaining']) for slot in today],
+                         [('12:00', 2), ('13:00', 1), ('13:30', 2)])
+
+    def test_reserve_is_all_or_nothing(self):
+        """A full slot with one chef books nothing with the others"""
+        transaction = MagicMock()
+        refs = [make_ref('chef1'), make_ref('chef2')]
+        snapshots = [make_slot_snapshot('chef1', {'booked': {'2026-10-16T12:00': 1}}),
+                     make_slot_snapshot('chef2', {'capacity': 1, 'booked': {'2026-10-16T12:00': 1}})]
+
+        full = order_slots.reserve(transaction, refs, snapshots, '2026-10-16T12:00', now=NOW)
+
+        self.assertEqual(full, ['chef2'])
+        transaction.set.assert_not_called()
+
+    def test_reserve_counts_and_prunes(self):
+        """Booking increments the slot and drops past slots from the map"""
+        transaction = MagicMock()
+        snapshots = [make_slot_snapshot('chef1', {'booked': {'2026-10-15T12:00': 3, '2026-10-16T12:00': 1}})]
+
+        self.assertEqual(order_slots.reserve(transaction, [make_ref('chef1')], snapshots,
+                                             '2026-10-16T12:00', now=NOW), [])
+        self.assertEqual(transaction.set.call_args[0][1]['booked'], {'2026-10-16T12:00': 2})
+
+    def test_release(self):
+        """Cancelling gives the place back"""
+        transaction = MagicMock()
+        ref = make_ref('chef1')
+        order_slots.release(transaction, ref, make_slot_snapshot('chef1', {'booked': {'2026-10-16T12:00': 1}}),
+                            '2026-10-16T12:00')
+        self.assertEqual(transaction.set.call_args[0][1]['booked'], {})
+
+
+class TestScheduledOrders(unittest.TestCase):
+
+    def setUp(self):
+        """Set up test client (with a fresh per-IP rate limit window: the suite shares one)"""
+        request_counts.clear()
+        self.app = create_app()
+        self.client = self.app.test_client()
+        self.app.config['TESTING'] = True
+        self.auth_headers = {
+            'Authorization': 'Bearer mock-token',
+            'Content-Type': 'application/json'
+        }
+
+    @patch('app.services.order_service.cooker_registry')
+    @patch('app.services.order_slots.cooker_hours')
+    @patch('app.services.order_slots.local_now', return_value=NOW)
+    @patch('app.services.order_service.firestore.transactional', side_effect=lambda fn: fn)
+    @patch('app.routes.order_routes.get_db')
+    @patch('app.routes.auth_routes.verify_token')
+    def test_full_slot_rejected(self, mock_verify, mock_get_db, mock_transactional, mock_now,
+                                mock_hours, mock_registry):
+        """A pre-order for a full slot returns 409 and writes nothing"""
+        mock_verify.return_value = {'uid': 'user123'}
+        mock_hours.open_at.return_value = {'chef1'}
+        db = MagicMock()
+        db.collection.return_value.document.side_effect = lambda doc_id=None: make_ref(doc_id)
+        mock_get_db.return_value = db
+        dish = make_slot_snapshot('d1', {'name': 'Couscous', 'price': 25.0, 'cookerId': 'chef1', 'isAvailable': True})
+        db.get_all.side_effect = [[dish], [make_slot_snapshot('chef1', {'capacity': 1, 'booked': {'2026-10-16T12:00': 1}})]]
+
+        response = self.client.post('/api/orders/', headers=self.auth_headers, json={
+            'items': [{'dishId': 'd1', 'quantity': 1}],
+            'deliveryAddress': 'Tunis',
+            'scheduledFor': '2026-10-16T12:00'
+        })
+
+        self.assertEqual(response.status_code, 409)
+        self.assertEqual(response.get_json()['fullChefs'], ['chef1'])
+        db.transaction.return_value.set.assert_not_called()
+
+    @patch('app.services.order_service.cooker_registry')
+    @patch('app.services.order_slots.cooker_hours')
+    @patch('app.services.order_slots.local_now', return_value=NOW)
+    @patch('app.services.order_service.firestore.transactional', side_effect=lambda fn: fn)
+    @patch('app.routes.order_routes.get_db')
+    @patch('app.routes.auth_routes.verify_token')
+    def test_closed_chef_rejected(self, mock_verify, mock_get_db, mock_transactional, mock_now,
+                                  mock_hours, mock_registry):
+        """A slot outside a chef's opening hours cannot be booked directly"""
+        mock_verify.return_value = {'uid': 'user123'}
+        db = MagicMock()
+        db.collection.return_value.document.side_effect = lambda doc_id=None: make_ref(doc_id)
+        mock_get_db.return_value = db
+        dish = make_slot_snapshot('d1', {'name': 'Couscous', 'price': 25.0, 'cookerId': 'chef1', 'isAvailable': True})
+        db.get_all.side_effect = [[dish]]
+        # chef1 is open 12:00-14:00 only
+        mock_hours.open_at.side_effect = lambda when: {'chef1'} if 12 <= when.hour < 14 else set()
+
+        response = self.client.post('/api/orders/', headers=self.auth_headers, json={
+            'items': [{'dishId': 'd1', 'quantity': 1}],
+            'deliveryAddress': 'Tunis',
+            'scheduledFor': '2026-10-17T03:00'
+        })
+
+        self.assertEqual(response.status_code, 409)
+        self.assertEqual(response.get_json()['closedChefs'], ['chef1'])
+        mock_registry.ensure_ready.assert_called_once()
+        db.transaction.return_value.set.assert_not_called()
+
+    @patch('app.services.order_state.handle_order_status_change')
+    @patch('app.services.order_state.firestore.transactional', side_effect=lambda fn: fn)
+    def test_cancel_releases_slot(self, mock_transactional, mock_notify):
+        """Cancelling a pre-order frees its slot in the same transaction"""
+        db = MagicMock()
+        order = {'userId': 'user123', 'chefId': 'chef1', 'status': 'pending', 'slot': '2026-10-16T12:00'}
+        db.collection.return_value.document.return_value.get.return_value = make_slot_snapshot('order1', order)
+        slot_ref = MagicMock()
+        slot_ref.get.return_value = make_slot_snapshot('chef1', {'booked': {'2026-10-16T12:00': 2}})
+
+        with patch('app.services.order_state.order_slots.slot_refs', return_value=[slot_ref]):
+            order_state.transition(db, 'order1', 'cancelled', authorize=lambda order: order_state.ROLE_CUSTOMER)
+
+        transaction = db.transaction.return_value
+        transaction.set.assert_called_once()
+        self.assertEqual(transaction.set.call_args[0][1]['booked'], {'2026-10-16T12:00': 1})
+
+    @patch('app.routes.cooker_routes.db')
+    @patch('app.routes.auth_routes.get_db')
+    @patch('app.routes.auth_routes.verify_token')
+    def test_capacity_validated(self, mock_verify, mock_auth_db, mock_db):
+        """Chefs set an integer slot capacity on their own slots"""
+        mock_verify.return_value = {'uid': 'chef1'}
+        headers = {'Authorization': 'Bearer mock-token'}
+        response = self.client.put('/api/cookers/slots', headers=headers, json={'capacity': -1})
+        self.assertEqual(response.status_code, 400)
+
+        response = self.client.put('/api/cookers/slots', headers=headers, json={'userId': 'chef2', 'capacity': 3})
+        self.assertEqual(response.status_code, 200)
+        mock_db.collection.return_value.document.assert_called_once_with('chef1')
+        mock_db.collection.return_value.document.return_value.set.assert_called_once()
+
+    @patch('app.routes.cooker_routes.db')
+    @patch('app.routes.auth_routes.get_db')
+    @patch('app.routes.auth_routes.verify_token')
+    def test_capacity_requires_chef(self, mock_verify, mock_auth_db, mock_db):
+        """Only an authenticated chef may change slot capacity"""
+        response = self.client.put('/api/cookers/slots', json={'userId': 'chef1', 'capacity': 3})
+        self.assertEqual(response.status_code, 401)
+
+        mock_verify.return_value = {'uid': 'user123'}
+        mock_auth_db.return_value.collection.return_value.document.return_value.get.return_value.exists = False
+        response = self.client.put('/api/cookers/slots', headers={'Authorization': 'Bearer mock-token'},
+                                   json={'capacity': 3})
+        self.assertEqual(response.status_code, 403)
+        mock_db.collection.return_value.document.return_value.set.assert_not_called()
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,378 @@
+"""
+Unit Tests for Order State Machine
+==================================
+Tests the status vocabulary, transition rules and transactional (bulk) updates
+"""
+
+import unittest
+from unittest.mock import patch, MagicMock
+import sys
+import os
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from google.api_core.exceptions import FailedPrecondition
+
+from application import create_app
+from app.services import order_state
+from app.services.order_state import TransitionError, check_transition, normalize_status
+
+
+def make_order_db(order, update_time='t1'):
+    """Fake db whose orders document returns order (None = missing)"""
+    db = MagicMock()
+    snapshot = MagicMock()
+    snapshot.exists = order is not None
+    snapshot.to_dict.return_value = dict(order or {})
+    snapshot.update_time = update_time
+    db.collection.return_value.document.return_value.get.return_value = snapshot
+    return db
+
+
+def make_ref_snapshot(collection, doc_id):
+    snapshot = MagicMock()
+    snapshot.exists = True
+    snapshot.reference.id = doc_id
+    snapshot.reference.parent.id = collection
+    return snapshot
+
+
+ORDER = {
+    'userId': 'user123',
+    'status': 'pending',
+    'subtotal': 33.0,
+    'items': [
+        {'dishId': 'd1', 'cookerId': 'chef1', 'price': 25.0, 'quantity': 1},
+        {'dishId': 'd2', 'cookerId': 'chef2', 'price': 4.0, 'quantity': 2},
+    ],
+}
+
+
+class TestOrderStateRules(unittest.TestCase):
+
+    def test_aliases_normalize(self):
+        """Legacy names map to the canonical vocabulary"""
+        self.assertEqual(normalize_status('confirmed'), 'accepted')
+        self.assertEqual(normalize_status('out_for_delivery'), 'on_the_way')
+        self.assertEqual(normalize_status('completed'), 'delivered')
+        self.assertEqual(normalize_status('preparing'), 'preparing')
+        self.assertIsNone(normalize_status('lost'))
+
+    def test_chef_moves_forward_only(self):
+        """Chefs may skip ahead but never go back"""
+        check_transition('pending', 'accepted', order_state.ROLE_CHEF)
+        check_transition('accepted', 'ready', order_state.ROLE_CHEF)
+        with self.assertRaises(TransitionError):
+            check_transition('ready', 'preparing', order_state.ROLE_CHEF)
+        with self.assertRaises(TransitionError):
+            check_transition('delivered', 'cancelled', order_state.ROLE_CHEF)
+
+    def test_customer_can_only_cancel_pending(self):
+        """Customers cancel pending orders and nothing else"""
+        check_transition('pending', 'cancelled', order_state.ROLE_CUSTOMER)
+        with self.assertRaises(TransitionError) as ctx:
+            check_transition('accepted', 'cancelled', order_state.ROLE_CUSTOMER)
+        self.assertEqual(ctx.exception.message, 'Only pending orders can be cancelled')
+        with self.assertRaises(TransitionError) as ctx:
+            check_transition('pending', 'accepted', order_state.ROLE_CUSTOMER)
+        self.assertEqual(ctx.exception.status_code, 403)
+
+
+@patch('app.services.order_state.firestore.transactional', side_effect=lambda fn: fn)
+@patch('app.services.order_state.handle_order_status_change')
+class TestTransition(unittest.TestCase):
+
+    def test_update_has_precondition_and_notifies_once(self, mock_notify, mock_transactional):
+        """The write is guarded by the read's update time; the event fires once"""
+        db = make_order_db(ORDER, update_time='t1')
+
+        order, old_status, changed = order_state.transition(
+            db, 'order1', 'accepted', authorize=lambda order: order_state.ROLE_CHEF)
+
+        self.assertTrue(changed)
+        self.assertEqual(old_status, 'pending')
+        db.write_option.assert_called_once_with(last_update_time='t1')
+        transaction = db.transaction.return_value
+        fields = transaction.update.call_args[0][1]
+        self.assertEqual(fields['status'], 'accepted')
+        self.assertIn('acceptedAt', fields)
+        self.assertEqual(transaction.update.call_args[1]['option'], db.write_option.return_value)
+        mock_notify.assert_called_once_with('order1', 'pending', 'accepted', order)
+
+    def test_failed_precondition_reruns_the_transaction(self, mock_notify, mock_transactional):
+        """A concurrent change reruns the read-check-write; repeated ones give up with a 409"""
+        db = make_order_db(ORDER)
+        transaction = db.transaction.return_value
+        transaction.update.side_effect = [FailedPrecondition('changed'), None]
+
+        _, _, changed = order_state.transition(
+            db, 'order1', 'accepted', authorize=lambda order: order_state.ROLE_CHEF)
+
+        self.assertTrue(changed)
+        self.assertEqual(transaction.update.call_count, 2)
+        mock_notify.assert_called_once()
+
+        db = make_order_db(ORDER)
+        db.transaction.return_value.update.side_effect = FailedPrecondition('changed')
+        with self.assertRaises(TransitionError) as ctx:
+            order_state.transition(db, 'order1', 'accepted', authorize=lambda order: order_state.ROLE_CHEF)
+        self.assertEqual(ctx.exception.status_code, 409)
+
+    def test_same_status_is_a_no_op(self, mock_notify, mock_transactional):
+        """Repeating a transition writes nothing and sends nothing"""
+        db = make_order_db(dict(ORDER, status='accepted'))
+
+        _, _, changed = order_state.transition(
+            db, 'order1', 'accepted', authorize=lambda order: order_state.ROLE_CHEF)
+
+        self.assertFalse(changed)
+        db.transaction.return_value.update.assert_not_called()
+        mock_notify.assert_not_called()
+
+    def test_unauthorized_and_missing(self, mock_notify, mock_transactional):
+        """Outsiders get 403, unknown orders 404"""
+        with self.assertRaises(TransitionError) as ctx:
+            order_state.transition(make_order_db(ORDER), 'order1', 'accepted', authorize=lambda order: None)
+        self.assertEqual(ctx.exception.status_code, 403)
+
+        with self.assertRaises(TransitionError) as ctx:
+            order_state.transition(make_order_db(None), 'order1', 'accepted', authorize=lambda order: None)
+        self.assertEqual(ctx.exception.status_code, 404)
+        mock_notify.assert_not_called()
+
+    def test_delivery_credits_each_chef(self, mock_notify, mock_transactional):
+        """Earnings are split per chef and dish counts bumped in the same transaction"""
+        db = make_order_db(dict(ORDER, status='on_the_way'))
+        db.get_all.return_value = [
+            make_ref_snapshot('cookers', 'chef1'),
+            make_ref_snapshot('cookers', 'chef2'),
+            make_ref_snapshot('dishes', 'd1'),
+        ]
+
+        with patch('app.services.order_state.firestore.Increment', side_effect=lambda n: ('inc', n)):
+            order_state.transition(db, 'order1', 'delivered', authorize=lambda order: order_state.ROLE_CHEF)
+
+        db.get_all.assert_called_once()
+        updates = {c[0][0].id: c[0][1] for c in db.transaction.return_value.update.call_args_list[1:]}
+        self.assertEqual(updates['chef1']['totalEarnings'], ('inc', 25.0))
+        self.assertEqual(updates['chef2']['totalEarnings'], ('inc', 8.0))
+        self.assertEqual(updates['d1'], {'ordersCount': ('inc', 1)})
+
+
+@patch('app.services.order_state.firestore.transactional', side_effect=lambda fn: fn)
+@patch('app.services.order_state.handle_order_status_change')
+class TestOrderStatusRoutes(unittest.TestCase):
+
+    def setUp(self):
+        """Set up test client"""
+        self.app = create_app()
+        self.client = self.app.test_client()
+        self.app.config['TESTING'] = True
+        self.auth_headers = {
+            'Authorization': 'Bearer mock-token',
+            'Content-Type': 'application/json'
+        }
+
+    @patch('app.routes.order_routes.get_db')
+    @patch('app.routes.auth_routes.verify_token')
+    def test_invalid_transition_conflicts(self, mock_verify, mock_get_db, mock_notify, mock_transactional):
+        """Moving an order backwards returns 409"""
+        mock_verify.return_value = {'uid': 'chef1'}
+        mock_get_db.return_value = make_order_db(dict(ORDER, status='ready'))
+
+        response = self.client.put('/api/orders/order1/status', headers=self.auth_headers,
+                                   json={'status': 'preparing'})
+
+        self.assertEqual(response.status_code, 409)
+        mock_notify.assert_not_called()
+
+    @patch('app.routes.order_routes.get_db')
+    @patch('app.routes.auth_routes.verify_token')
+    def test_other_cooker_forbidden(self, mock_verify, mock_get_db, mock_notify, mock_transactional):
+        """Only the order's own chef may update it"""
+        mock_verify.return_value = {'uid': 'chef9'}
+        mock_get_db.return_value = make_order_db(ORDER)
+
+        response = self.client.put('/api/orders/order1/status', headers=self.auth_headers,
+                                   json={'status': 'accepted'})
+
+        self.assertEqual(response.status_code, 403)
+
+    @patch('app.routes.order_routes.is_admin', return_value=True)
+    @patch('app.routes.order_routes.get_db')
+    @patch('app.routes.auth_routes.verify_token')
+    def test_admin_overrides(self, mock_verify, mock_get_db, mock_admin, mock_notify, mock_transactional):
+        """Admins may cancel or advance any order that is not final"""
+        mock_verify.return_value = {'uid': 'admin1'}
+        mock_get_db.return_value = make_order_db(dict(ORDER, status='ready'))
+
+        response = self.client.put('/api/orders/order1/status', headers=self.auth_headers,
+                                   json={'status': 'cancelled'})
+
+        self.assertEqual(response.status_code, 200)
+        mock_admin.assert_called_once()
+
+        mock_get_db.return_value = make_order_db(dict(ORDER, status='delivered'))
+        response = self.client.put('/api/orders/order1/status', headers=self.auth_headers,
+                                   json={'status': 'cancelled'})
+        self.assertEqual(response.status_code, 409)
+
+    @patch('app.routes.order_routes.is_admin', return_value=True)
+    @patch('app.routes.order_routes.get_db')
+    @patch('app.routes.auth_routes.verify_token')
+    def test_admin_flag_read_before_the_transaction(self, mock_verify, mock_get_db, mock_admin,
+                                                     mock_notify, mock_transactional):
+        """A rerun transaction does not read the admin flag again"""
+        mock_verify.return_value = {'uid': 'admin1'}
+        db = make_order_db(dict(ORDER, status='ready'))
+        db.transaction.return_value.update.side_effect = [FailedPrecondition('changed'), None]
+        mock_get_db.return_value = db
+
+        response = self.client.put('/api/orders/order1/status', headers=self.auth_headers,
+                                   json={'status': 'on_the_way'})
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(db.transaction.return_value.update.call_count, 2)
+        mock_admin.assert_called_once()
+
+    @patch('app.routes.order_routes.get_db')
+    @patch('app.routes.auth_routes.verify_token')
+    def test_alias_accepted(self, mock_verify, mock_get_db, mock_notify, mock_transactional):
+        """Legacy status names are stored canonically"""
+        mock_verify.return_value = {'uid': 'chef1'}
+        mock_get_db.return_value = make_order_db(ORDER)
+
+        response = self.client.put('/api/orders/order1/status', headers=self.auth_headers,
+                                   json={'status': 'confirmed'})
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.get_json()['status'], 'accepted')
+
+    @patch('app.routes.cooker_routes.db')
+    def test_chef_reject_cancels(self, mock_db, mock_notify, mock_transactional):
+        """Rejecting an order cancels it with the chef's reason"""
+        mock_db.collection.return_value.document.return_value.get.return_value = \
+            make_order_db(ORDER).collection.return_value.document.return_value.get.return_value
+
+        response = self.client.put('/api/cookers/orders/order1/respond',
+                                   json={'userId': 'chef2', 'action': 'reject', 'reason': 'Closed'})
+
+        self.assertEqual(response.status_code, 200)
+        fields = mock_db.transaction.return_value.update.call_args[0][1]
+        self.assertEqual(fields['status'], 'cancelled')
+        self.assertEqual(fields['rejectionReason'], 'Closed')
+        mock_notify.assert_called_once()
+
+    @patch('app.routes.cooker_routes.db')
+    def test_chef_status_vocabulary(self, mock_db, mock_notify, mock_transactional):
+        """Chef status updates accept the canonical names and list them when rejected"""
+        mock_db.collection.return_value.document.return_value.get.return_value = \
+            make_order_db(ORDER).collection.return_value.document.return_value.get.return_value
+
+        response = self.client.put('/api/cookers/orders/order1/status',
+                                   json={'userId': 'chef1', 'status': 'on_the_way'})
+        self.assertEqual(response.status_code, 200)
+
+        response = self.client.put('/api/cookers/orders/order1/status',
+                                   json={'userId': 'chef1', 'status': 'pending'})
+        self.assertEqual(response.status_code, 400)
+        error = response.get_json()['error']
+        for status in ('accepted', 'on_the_way', 'delivered', 'out_for_delivery', 'completed'):
+            self.assertIn(status, error)
+
+
+def make_order_snapshot(order_id, order, update_time='t1'):
+    snapshot = MagicMock()
+    snapshot.id = order_id
+    snapshot.exists = order is not None
+    snapshot.to_dict.return_value = dict(order or {})
+    snapshot.update_time = update_time
+    return snapshot
+
+
+@patch('app.services.order_state._run_in_background', side_effect=lambda fn: fn())
+@patch('app.services.order_state.firestore.transactional', side_effect=lambda fn: fn)
+@patch('app.services.order_state.handle_order_status_change')
+class TestBulkTransition(unittest.TestCase):
+
+    def setUp(self):
+        """Set up test client"""
+        self.app = create_app()
+        self.client = self.app.test_client()
+        self.app.config['TESTING'] = True
+
+    @patch('app.routes.cooker_routes.db')
+    @patch('app.routes.auth_routes.get_db')
+    @patch('app.routes.auth_routes.verify_token')
+    def test_bulk_ready_in_one_transaction(self, mock_verify, mock_auth_db, mock_db,
+                                           mock_notify, mock_transactional, mock_background):
+        """Owned orders move together; others are reported and skipped"""
+        mock_verify.return_value = {'uid': 'chef1'}
+        mock_db.get_all.return_value = [
+            make_order_snapshot('o1', dict(ORDER, status='preparing', chefId='chef1')),
+            make_order_snapshot('o2', dict(ORDER, status='accepted', chefId='chef1')),
+            make_order_snapshot('o3', dict(ORDER, status='delivered', chefId='chef1')),
+            make_order_snapshot('o4', {'chefId': 'chef9', 'status': 'preparing'}),
+        ]
+
+        response = self.client.put('/api/cookers/orders/status', headers={'Authorization': 'Bearer mock-token'},
+                                   json={'status': 'ready', 'orderIds': ['o1', 'o2', 'o3', 'o4', 'o5']})
+
+        data = response.get_json()
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(sorted(data['updated']), ['o1', 'o2'])
+        self.assertEqual({k: v['status'] for k, v in data['failed'].items()}, {'o3': 409, 'o4': 403, 'o5': 404})
+        mock_db.get_all.assert_called_once()
+        mock_db.transaction.assert_called_once()
+        self.assertEqual(mock_db.transaction.return_value.update.call_count, 2)
+        self.assertEqual(mock_notify.call_count, 2)
+        mock_background.assert_called_once()
+
+    @patch('app.routes.cooker_routes.db')
+    @patch('app.routes.auth_routes.get_db')
+    @patch('app.routes.auth_routes.verify_token')
+    def test_bulk_requires_chef(self, mock_verify, mock_auth_db, mock_db,
+                                mock_notify, mock_transactional, mock_background):
+        """Only an authenticated chef may move orders, and only their own"""
+        response = self.client.put('/api/cookers/orders/status', json={
+            'userId': 'chef1', 'status': 'delivered', 'orderIds': ['o1']
+        })
+        self.assertEqual(response.status_code, 401)
+
+        mock_verify.return_value = {'uid': 'chef9'}
+        mock_db.get_all.return_value = [make_order_snapshot('o1', dict(ORDER, status='on_the_way', chefId='chef1'))]
+        response = self.client.put('/api/cookers/orders/status', headers={'Authorization': 'Bearer mock-token'},
+                                   json={'userId': 'chef1', 'status': 'delivered', 'orderIds': ['o1']})
+        self.assertEqual(response.get_json()['failed']['o1']['status'], 403)
+        mock_db.transaction.return_value.update.assert_not_called()
+
+    def test_bulk_delivery_sums_counters(self, mock_notify, mock_transactional, mock_background):
+        """Delivering several orders credits each chef once with the summed amounts"""
+        db = MagicMock()
+        cooker = make_ref_snapshot('cookers', 'chef1')
+        db.get_all.side_effect = [
+            [make_order_snapshot('o1', {'status': 'on_the_way', 'items': [{'cookerId': 'chef1', 'price': 10, 'quantity': 1}]}),
+             make_order_snapshot('o2', {'status': 'on_the_way', 'items': [{'cookerId': 'chef1', 'price': 5, 'quantity': 2}]})],
+            [cooker],
+        ]
+
+        with patch('app.services.order_state.firestore.Increment', side_effect=lambda n: ('inc', n)):
+            results = order_state.transition_many(db, ['o1', 'o2'], 'delivered',
+                                                  authorize=lambda order: order_state.ROLE_CHEF)
+
+        self.assertEqual(results, {'o1': None, 'o2': None})
+        credit = db.transaction.return_value.update.call_args_list[-1][0]
+        self.assertIs(credit[0], cooker.reference)
+        self.assertEqual(credit[1], {'totalEarnings': ('inc', 20.0), 'totalOrders': ('inc', 2)})
+
+    def test_bulk_limit(self, mock_notify, mock_transactional, mock_background):
+        """Too many ids are rejected before any read"""
+        db = MagicMock()
+        with self.assertRaises(TransitionError) as ctx:
+            order_state.transition_many(db, [f'o{i}' for i in range(order_state.MAX_BULK_ORDERS + 1)],
+                                        'ready', authorize=lambda order: order_state.ROLE_CHEF)
+        self.assertEqual(ctx.exception.status_code, 400)
+        db.get_all.assert_not_called()
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,87 @@
+"""
+Unit Tests for Payments
+=======================
+Tests that a payment covers a whole cart: its group total and every sub-order
+"""
+
+import unittest
+from unittest.mock import patch, MagicMock
+import sys
+import os
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from application import create_app, request_counts
+
+ORDERS = {
+    'order1': {'userId': 'user123', 'groupId': 'group1', 'total': 53.0},
+    'order2': {'userId': 'user123', 'groupId': 'group1', 'total': 8.0},
+    'legacy': {'userId': 'user123', 'total': 20.0},
+}
+GROUPS = {
+    'group1': {'userId': 'user123', 'orderIds': ['order1', 'order2'], 'total': 61.0},
+}
+
+
+def make_ref(collection, doc_id):
+    ref = MagicMock()
+    ref.id = doc_id
+    data = {'orders': ORDERS, 'order_groups': GROUPS}.get(collection, {}).get(doc_id)
+    ref.get.return_value.exists = data is not None
+    ref.get.return_value.to_dict.return_value = data
+    return ref
+
+
+def make_payment_db():
+    db = MagicMock()
+    db.collection.side_effect = lambda name: MagicMock(
+        document=lambda doc_id=None: make_ref(name, doc_id or 'payment1'))
+    return db
+
+
+class TestConfirmPayment(unittest.TestCase):
+
+    def setUp(self):
+        """Set up test client (with a fresh per-IP rate limit window: the suite shares one)"""
+        request_counts.clear()
+        self.app = create_app()
+        self.client = self.app.test_client()
+        self.app.config['TESTING'] = True
+        self.auth_headers = {
+            'Authorization': 'Bearer mock-token',
+            'Content-Type': 'application/json'
+        }
+
+    def confirm(self, body):
+        return self.client.post('/api/payments/confirm', headers=self.auth_headers,
+                                json=dict(body, paymentMethod='card'))
+
+    @patch('app.routes.payment_routes.db', new_callable=make_payment_db)
+    @patch('app.routes.auth_routes.verify_token')
+    def test_order_id_pays_its_whole_group(self, mock_verify, mock_db):
+        """The first sub-order's id charges the group total and marks every sub-order"""
+        mock_verify.return_value = {'uid': 'user123'}
+
+        response = self.confirm({'orderId': 'order1'})
+
+        self.assertEqual(response.status_code, 200)
+        body = response.get_json()
+        self.assertEqual(body['amount'], 61.0)
+        self.assertEqual(body['orderIds'], ['order1', 'order2'])
+        batch = mock_db.batch.return_value
+        self.assertEqual([call[0][0].id for call in batch.update.call_args_list], ['order1', 'order2'])
+        batch.commit.assert_called_once()
+
+    @patch('app.routes.payment_routes.db', new_callable=make_payment_db)
+    @patch('app.routes.auth_routes.verify_token')
+    def test_group_id_and_legacy_orders(self, mock_verify, mock_db):
+        """groupId is accepted directly; orders without a group are paid alone"""
+        mock_verify.return_value = {'uid': 'user123'}
+
+        self.assertEqual(self.confirm({'groupId': 'group1'}).get_json()['amount'], 61.0)
+        legacy = self.confirm({'orderId': 'legacy'}).get_json()
+        self.assertEqual((legacy['amount'], legacy['orderIds']), (20.0, ['legacy']))
+        self.assertEqual(self.confirm({'groupId': 'missing'}).status_code, 404)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,92 @@
+"""
+Unit Tests for Sparse Fieldsets
+===============================
+Tests fields= parsing, response trimming and Firestore select() projections
+"""
+
+import unittest
+from unittest.mock import patch, MagicMock
+import sys
+import os
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from application import create_app
+from app.utils.projection import parse_fields, select_fields, project
+from tests.helpers import make_doc, build_registry, build_catalog
+
+
+class TestProjectionHelpers(unittest.TestCase):
+
+    def test_parse_fields(self):
+        """fields= is split, deduplicated and validated"""
+        self.assertIsNone(parse_fields(None))
+        self.assertEqual(parse_fields('name, price,id,name'), ['name', 'price'])
+        self.assertEqual(parse_fields('deliverySettings.deliveryFee'), ['deliverySettings.deliveryFee'])
+        with self.assertRaises(ValueError):
+            parse_fields('name,price;drop')
+
+    def test_project(self):
+        """Only id and requested fields are kept, including nested ones"""
+        doc = {'id': 'd1', 'name': 'Couscous', 'price': 12, 'images': ['a', 'b'],
+               'deliverySettings': {'deliveryFee': 3, 'deliveryRadius': 10}}
+        self.assertEqual(project(doc, ['name', 'missing', 'deliverySettings.deliveryFee']),
+                         {'id': 'd1', 'name': 'Couscous', 'deliverySettings': {'deliveryFee': 3}})
+        self.assertIs(project(doc, None), doc)
+
+    def test_select_fields(self):
+        """select() includes fields the endpoint needs internally"""
+        query = MagicMock()
+        select_fields(query, ['name'], required=['createdAt', 'name'])
+        query.select.assert_called_once_with(['name', 'createdAt'])
+
+        query = MagicMock()
+        self.assertIs(select_fields(query, None), query)
+        query.select.assert_not_called()
+
+
+class TestProjectionRoutes(unittest.TestCase):
+
+    def setUp(self):
+        """Set up test client"""
+        self.app = create_app()
+        self.client = self.app.test_client()
+        self.app.config['TESTING'] = True
+
+    @patch('app.routes.cooker_routes.db')
+    def test_chef_dishes_fields(self, mock_db):
+        """Chef dish list projects in Firestore and trims the JSON"""
+        selected = mock_db.collection.return_value.where.return_value.select.return_value
+        selected.stream.return_value = [
+            make_doc('d1', {'name': 'Couscous', 'price': 12, 'createdAt': '2024-01-01T10:00:00'}),
+        ]
+
+        response = self.client.get('/api/cookers/dishes?userId=chef1&fields=name,price')
+
+        self.assertEqual(response.status_code, 200)
+        mock_db.collection.return_value.where.return_value.select.assert_called_once_with(
+            ['name', 'price', 'createdAt'])
+        self.assertEqual(response.get_json()['dishes'], [{'id': 'd1', 'name': 'Couscous', 'price': 12}])
+
+    def test_invalid_fields(self):
+        """Malformed field names are rejected"""
+        response = self.client.get('/api/cookers/dishes?userId=chef1&fields=na-me')
+        self.assertEqual(response.status_code, 400)
+
+    def test_dish_listing_fields(self):
+        """Catalog-served listings are trimmed too"""
+        registry = build_registry({'chef1': {'name': 'Chef Ali'}})
+        catalog = build_catalog({'d1': {'name': 'Brik', 'price': 4, 'cookerId': 'chef1',
+                                        'isAvailable': True, 'description': 'x' * 500}})
+
+        with patch('app.routes.dish_routes.cooker_registry', registry), \
+             patch('app.routes.dish_routes.dish_catalog', catalog), \
+             patch('app.services.live_collection.get_db'):
+            response = self.client.get('/api/dishes/?fields=name,price,cookerName')
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.get_json()['dishes'],
+                         [{'id': 'd1', 'name': 'Brik', 'price': 4, 'cookerName': 'Chef Ali'}])
+
+
+if __name__ == '__main__':
+    unittest.main()